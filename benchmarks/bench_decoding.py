@@ -0,0 +1,72 @@
+from typing import List, Optional
+
+from harness import benchmark, Operation
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.device.registers.enum_definition import EnumDefinition
+from modbus_client.device.registers.flag_definition import FlagDefinition
+from modbus_client.registers.read_session import ModbusReadSession
+from modbus_client.registers.register_value_type import RegisterValueType
+from modbus_client.registers.registers import NumericRegister, IRegister, EnumRegister, BoolRegister, FlagsRegister, \
+    StringRegister
+
+RegistersPerSnapshot = 100
+
+HR = ModbusRegisterType.HoldingRegister
+
+
+def _create_session() -> ModbusReadSession:
+    return ModbusReadSession(registers_dict={(HR, i): (0x1234 + i * 0x0101) & 0xFFFF for i in range(1000)})
+
+
+def _decode_benchmark(registers: List[IRegister], session: Optional[ModbusReadSession] = None) -> Operation:
+    if session is None:
+        session = _create_session()
+
+    def op() -> None:
+        for reg in registers:
+            reg.get_value_from_read_session(session)
+
+    return op
+
+
+def _register_numeric_benchmark(value_type: RegisterValueType) -> None:
+    @benchmark(f"decoding.{value_type.value}")
+    def factory() -> Operation:
+        return _decode_benchmark([NumericRegister(f"r{i}", HR, i * 4, value_type, scale=0.1)
+                                  for i in range(RegistersPerSnapshot)])
+
+
+for _value_type in RegisterValueType:
+    _register_numeric_benchmark(_value_type)
+
+
+@benchmark("decoding.uint16_bits")
+def bench_bits() -> Operation:
+    return _decode_benchmark([NumericRegister(f"r{i}", HR, i, RegisterValueType.U16, bits=[4, 5, 6, 7])
+                              for i in range(RegistersPerSnapshot)])
+
+
+@benchmark("decoding.enum")
+def bench_enum() -> Operation:
+    enum = [EnumDefinition(name=f"value{i}", value=i) for i in range(0, 256, 3)]
+    return _decode_benchmark([EnumRegister(f"r{i}", HR, i, enum=enum, bits=list(range(0, 8)))
+                              for i in range(RegistersPerSnapshot)])
+
+
+@benchmark("decoding.bool")
+def bench_bool() -> Operation:
+    return _decode_benchmark([BoolRegister(f"r{i}", HR, i, bit=i % 16) for i in range(RegistersPerSnapshot)])
+
+
+@benchmark("decoding.flags")
+def bench_flags() -> Operation:
+    flags = [FlagDefinition(name=f"flag{i}", bit=i) for i in range(16)]
+    return _decode_benchmark([FlagsRegister(f"r{i}", HR, i, flags=flags) for i in range(RegistersPerSnapshot)])
+
+
+@benchmark("decoding.string")
+def bench_string() -> Operation:
+    # "MODEL-01" followed by null padding
+    words = [0x4D4F, 0x4445, 0x4C2D, 0x3031, 0, 0, 0, 0]
+    session = ModbusReadSession(registers_dict={(HR, i): words[i % 8] for i in range(RegistersPerSnapshot * 8)})
+    return _decode_benchmark([StringRegister(f"r{i}", HR, i * 8, words=8) for i in range(RegistersPerSnapshot)], session)
@@ -0,0 +1,17 @@
+import glob
+import os
+
+from harness import benchmark, Operation
+from modbus_client.device.device_config import load_device_config
+
+devices_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../src/modbus_client/device/devices")
+
+
+def _register_device_benchmark(path: str) -> None:
+    @benchmark(f"device_config.load.{os.path.splitext(os.path.basename(path))[0]}")
+    def factory() -> Operation:
+        return lambda: load_device_config(path)
+
+
+for _path in sorted(glob.glob(os.path.join(devices_dir, "*.yaml"))):
+    _register_device_benchmark(_path)
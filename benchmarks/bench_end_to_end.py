@@ -0,0 +1,36 @@
+from contextlib import asynccontextmanager, closing
+from typing import AsyncIterator, Dict, Any
+
+from harness import async_benchmark, AsyncOperation
+from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusTcpClient
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.simulator.simulator import Simulator
+from modbus_client.simulator.simulator_config import SimulatorConfig, SimulatorEndpointConfig, SimulatedUnitsConfig, \
+    TcpConfig
+
+
+def _register_end_to_end_benchmark(device: str) -> None:
+    @async_benchmark(f"end_to_end.read_registers.{device}")
+    @asynccontextmanager
+    async def factory() -> AsyncIterator[AsyncOperation]:
+        simulator = Simulator(SimulatorConfig(endpoints=[
+            SimulatorEndpointConfig(units=[SimulatedUnitsConfig(device=device, units=1)], tcp=TcpConfig(port=0)),
+        ]))
+        await simulator.start()
+        try:
+            port = simulator.endpoints[0].tcp_port
+            assert port is not None
+            modbus_device = ModbusDeviceFactory.from_file(device).create_device(1)
+            registers = modbus_device.get_device_config().get_all_registers()
+
+            with closing(PyAsyncModbusTcpClient(host="127.0.0.1", port=port, timeout=3)) as client:
+                async def op() -> Dict[str, Any]:
+                    return await modbus_device.read_registers(client, registers)
+
+                yield op
+        finally:
+            await simulator.close()
+
+
+for _device in ("DDS238", "GROWATT_SPF6000ES", "TAC4300CT"):
+    _register_end_to_end_benchmark(_device)
@@ -0,0 +1,67 @@
+import asyncio
+import random
+from typing import List
+
+from harness import benchmark, Operation
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.registers.address_range import AddressRange, merge_address_ranges
+from modbus_client.registers.read_session import ModbusReadSession
+from modbus_client.registers.register_value_type import RegisterValueType
+from modbus_client.registers.registers import NumericRegister
+
+
+def create_synthetic_map(count: int, seed: int = 1) -> List[AddressRange]:
+    # mix of 1, 2 and 4 word registers with occasional holes, in random order
+    rng = random.Random(seed)
+    ranges = []
+    address = 0
+    for _ in range(count):
+        size = rng.choice((1, 1, 2, 2, 4))
+        ranges.append(AddressRange(address, size))
+        address += size + (rng.randint(1, 20) if rng.random() < 0.1 else 0)
+    rng.shuffle(ranges)
+    return ranges
+
+
+def create_synthetic_registers(count: int) -> List[NumericRegister]:
+    types = (RegisterValueType.U16, RegisterValueType.S16, RegisterValueType.U32BE, RegisterValueType.F32LE)
+    registers = []
+    for rng in create_synthetic_map(count):
+        value_type = {1: types[rng.address % 2], 2: types[2 + rng.address % 2], 4: RegisterValueType.U64BE}[rng.count]
+        registers.append(NumericRegister(f"reg{rng.address}", ModbusRegisterType.HoldingRegister, rng.address, value_type))
+    return registers
+
+
+def _merge_benchmark(count: int, allow_holes: bool) -> Operation:
+    ranges = create_synthetic_map(count)
+    return lambda: merge_address_ranges(ranges, allow_holes=allow_holes, max_read_size=100)
+
+
+@benchmark("planning.merge_address_ranges.1k")
+def bench_merge_1k() -> Operation:
+    return _merge_benchmark(1000, allow_holes=False)
+
+
+@benchmark("planning.merge_address_ranges.10k_holes")
+def bench_merge_10k_holes() -> Operation:
+    return _merge_benchmark(10000, allow_holes=True)
+
+
+@benchmark("planning.merge_address_ranges.100k_holes")
+def bench_merge_100k_holes() -> Operation:
+    return _merge_benchmark(100000, allow_holes=True)
+
+
+@benchmark("read_session.populate.1k")
+def bench_read_session_populate() -> Operation:
+    registers = create_synthetic_registers(1000)
+    last_address = max(x.address + x.count for x in registers)
+    client = MockModbusClient(input_registers={}, holding_registers={i: i & 0xFFFF for i in range(last_address)})
+    loop = asyncio.new_event_loop()
+
+    def op() -> ModbusReadSession:
+        return loop.run_until_complete(ModbusReadSession.read_registers(client, unit=1, registers=registers,
+                                                                        allow_holes=True, max_read_size=100))
+
+    return op
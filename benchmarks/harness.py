@@ -0,0 +1,121 @@
+import asyncio
+import statistics
+import time
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, asdict
+from typing import Callable, Any, Dict, Union, Awaitable, List, TypeVar
+
+Operation = Callable[[], Any]
+AsyncOperation = Callable[[], Awaitable[Any]]
+BenchmarkFactory = Callable[[], Operation]
+AsyncBenchmarkFactory = Callable[[], AbstractAsyncContextManager[AsyncOperation]]
+
+TFactory = TypeVar("TFactory", BenchmarkFactory, AsyncBenchmarkFactory)
+
+
+@dataclass
+class BenchmarkResult:
+    loops: int
+    repeat: int
+    min_us: float
+    median_us: float
+    mean_us: float
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class BenchmarkDefinition:
+    name: str
+    factory: Union[BenchmarkFactory, AsyncBenchmarkFactory]
+    is_async: bool
+
+
+registry: Dict[str, BenchmarkDefinition] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchmarkFactory], BenchmarkFactory]:
+    """
+    Registers a factory which does the setup and returns the operation to measure.
+    """
+
+    def decorator(factory: BenchmarkFactory) -> BenchmarkFactory:
+        registry[name] = BenchmarkDefinition(name, factory, is_async=False)
+        return factory
+
+    return decorator
+
+
+def async_benchmark(name: str) -> Callable[[AsyncBenchmarkFactory], AsyncBenchmarkFactory]:
+    """
+    Registers an async context manager factory which does the setup (and teardown) and yields the coroutine function
+    to measure.
+    """
+
+    def decorator(factory: AsyncBenchmarkFactory) -> AsyncBenchmarkFactory:
+        registry[name] = BenchmarkDefinition(name, factory, is_async=True)
+        return factory
+
+    return decorator
+
+
+def _make_result(loops: int, timings: List[float]) -> BenchmarkResult:
+    per_op = [x / loops * 1e6 for x in timings]
+    return BenchmarkResult(loops=loops, repeat=len(timings),
+                           min_us=min(per_op), median_us=statistics.median(per_op), mean_us=statistics.mean(per_op))
+
+
+def measure(op: Operation, min_time: float, repeat: int) -> BenchmarkResult:
+    # calibrate the number of loops, so a single repetition takes at least min_time
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            op()
+        timings.append(time.perf_counter() - start)
+
+    return _make_result(loops, timings)
+
+
+async def measure_async(op: AsyncOperation, min_time: float, repeat: int) -> BenchmarkResult:
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            await op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            await op()
+        timings.append(time.perf_counter() - start)
+
+    return _make_result(loops, timings)
+
+
+def run_benchmark(definition: BenchmarkDefinition, min_time: float, repeat: int) -> BenchmarkResult:
+    if not definition.is_async:
+        op = definition.factory()
+        return measure(op, min_time, repeat)
+
+    async def run() -> BenchmarkResult:
+        async with definition.factory() as async_op:
+            return await measure_async(async_op, min_time, repeat)
+
+    return asyncio.run(run())
@@ -0,0 +1,110 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+from fnmatch import fnmatch
+from typing import Dict, Any, List
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(script_dir, "../src"))
+
+from harness import registry, run_benchmark  # noqa: E402
+
+import bench_planning  # noqa: E402,F401
+import bench_decoding  # noqa: E402,F401
+import bench_device_config  # noqa: E402,F401
+import bench_end_to_end  # noqa: E402,F401
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+
+    print()
+    print(f"{'benchmark':<55} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<55} {'-':>12} {result['median_us']:>10.2f}us {'new':>8}")
+            continue
+
+        change = result["median_us"] / base["median_us"] - 1
+        marker = ""
+        if change > threshold:
+            marker = " REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = " improved"
+        print(f"{name:<55} {base['median_us']:>10.2f}us {result['median_us']:>10.2f}us {change:>+7.1%}{marker}")
+
+    return regressions
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description="Runs modbus_client benchmarks")
+    argparser.add_argument("filter", nargs="*", help="glob patterns of benchmark names to run")
+    argparser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    argparser.add_argument("--output", type=str, help="write JSON results to file")
+    argparser.add_argument("--compare", type=str, metavar="BASELINE", help="compare against saved JSON results")
+    argparser.add_argument("--threshold", type=float, default=0.15,
+                           help="relative slowdown of the median reported as a regression (default 0.15)")
+    argparser.add_argument("--min-time", type=float, default=0.1, help="minimum time of a single repetition in seconds")
+    argparser.add_argument("--repeat", type=int, default=5)
+    argparser.add_argument("--quick", action="store_true", help="shortcut for --min-time 0.01 --repeat 3")
+
+    args = argparser.parse_args()
+
+    if args.quick:
+        args.min_time = 0.01
+        args.repeat = 3
+
+    names = [x for x in registry.keys() if len(args.filter) == 0 or any(fnmatch(x, f) for f in args.filter)]
+
+    if args.list:
+        for name in names:
+            print(name)
+        return
+
+    results: Dict[str, Any] = {}
+    failed: List[str] = []
+    for name in names:
+        try:
+            result = run_benchmark(registry[name], min_time=args.min_time, repeat=args.repeat)
+        except Exception as e:
+            failed.append(name)
+            print(f"{name:<55} FAILED: {type(e).__name__}: {e}", flush=True)
+            continue
+        results[name] = result.to_json()
+        print(f"{name:<55} {result.median_us:>12.2f}us (min {result.min_us:.2f}us, {result.loops} loops)", flush=True)
+
+    if args.output is not None:
+        with open(args.output, "wt") as f:
+            json.dump({
+                "meta": {
+                    "date": datetime.datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "min_time": args.min_time,
+                    "repeat": args.repeat,
+                },
+                "results": results,
+                "failed": failed,
+            }, f, indent=2, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare, "rt") as f:
+            baseline = json.load(f)["results"]
+
+        regressions = compare_results(results, baseline, args.threshold)
+        if len(regressions) > 0:
+            print()
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            exit(1)
+
+    if len(failed) > 0:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,2 @@
 #!/bin/bash
-mypy -p modbus_client.client -p modbus_client.device -p modbus_client.cli -p modbus_client.registers -p modbus_client.server
+mypy -p modbus_client.client -p modbus_client.device -p modbus_client.cli -p modbus_client.registers -p modbus_client.server -p modbus_client.protocol -p modbus_client.simulator -p modbus_client.gateway -p modbus_client.poller
@@ -9,17 +9,22 @@ from dataclasses import dataclass
 from fnmatch import fnmatch
 from typing import Tuple, Any, Optional, List, Sequence, cast, Callable, Union, Dict
 
-from modbus_client.cli.argument_parsers import interval_parser, mode_parser, ModeTupleType
+from modbus_client.cli.argument_parsers import interval_parser, mode_parser, ModeTupleType, host_port_parser, units_parser
 from modbus_client.cli.system_file import load_system_config
 from modbus_client.cli.system_file_finder import find_system_file
-from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.async_modbus_client import AsyncModbusClient, DefaultMaxReadSize
 from modbus_client.client.defaults import DefaultTimeout, DefaultSilentInterval
+from modbus_client.client.types import ModbusRegisterType
 from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusTcpClient, PyAsyncModbusRtuClient, PyAsyncModbusRtuOverTcpClient
+from modbus_client.client.retry import RequestClass, RetryPolicy
 from modbus_client.device.registers.device_register import IDeviceRegister, DeviceHoldingRegister, DeviceInputRegister, DeviceSwitch
 from modbus_client.registers.read_session import ModbusReadSession
 from modbus_client.registers.registers import IRegister
 from modbus_client.device.device_config import DeviceConfig
 from modbus_client.device.modbus_device import create_modbus_register, ModbusDevice, create_modbus_coil, ModbusDeviceFactory
+from modbus_client.device.bus_scanner import scan, get_probe_timeout
+from modbus_client.device.register_discovery import discover_registers, create_skeleton_device_yaml
+from modbus_client.registers.address_map import save_readable_ranges
 
 script_dir = os.path.dirname(os.path.realpath(__file__))
 root_dir = os.path.join(script_dir, "../../..")
@@ -44,6 +49,9 @@ class Args:
     interval: float
     timeout: float
     silent_interval: float
+    static_cache: Optional[str]
+    learned_map: Optional[str]
+    retries: int
     verbose: bool
 
 
@@ -136,7 +144,7 @@ async def query_device(client: AsyncModbusClient, device: ModbusDevice,
     modbus_registers_map.update({register.name: create_modbus_register(device_config, register)
                                  for register in registers})
     modbus_registers_map.update({switch.name: create_modbus_coil(device_config, switch) for switch in switches})
-    modbus_registers = list(modbus_registers_map.values())
+    modbus_coils = [modbus_registers_map[switch.name] for switch in switches]
 
     read_ses: ModbusReadSession
 
@@ -148,7 +156,11 @@ async def query_device(client: AsyncModbusClient, device: ModbusDevice,
                 if show_register_names:
                     print(f"{(register.name + ' '):-<{max_name_len}.{max_name_len}s} = ", end="")
 
-                print(f"{modbus_register.format(read_ses)}")
+                error = read_ses.get_register_error(modbus_register)
+                if error is not None:
+                    print(f"READ ERROR: {error}")
+                else:
+                    print(f"{modbus_register.format(read_ses)}")
 
         if format == "json":
             data: Any
@@ -158,7 +170,10 @@ async def query_device(client: AsyncModbusClient, device: ModbusDevice,
                 data = []
             for register in registers_to_print:
                 modbus_register = modbus_registers_map[register.name]
-                value = modbus_register.get_value_from_read_session(read_ses)
+                if read_ses.get_register_error(modbus_register) is not None:
+                    value = None
+                else:
+                    value = modbus_register.get_value_from_read_session(read_ses)
                 if show_register_names:
                     data[register.name] = value
                 else:
@@ -169,8 +184,10 @@ async def query_device(client: AsyncModbusClient, device: ModbusDevice,
             data = []
             for register in registers_to_print:
                 modbus_register = modbus_registers_map[register.name]
-                value = modbus_register.get_value_from_read_session(read_ses)
-                data.append(value)
+                if read_ses.get_register_error(modbus_register) is not None:
+                    data.append("")
+                else:
+                    data.append(modbus_register.get_value_from_read_session(read_ses))
             sys.stdout.write(",".join([f"{x}" for x in data]) + "\n")
 
         sys.stdout.flush()
@@ -180,9 +197,19 @@ async def query_device(client: AsyncModbusClient, device: ModbusDevice,
         read_num += 1
 
         try:
-            read_ses = await ModbusReadSession.read_registers(client=client, unit=device.get_unit(), registers=modbus_registers,
-                                                              allow_holes=device_config.allow_holes,
-                                                              max_read_size=device_config.max_read_size)
+            # goes through the device cache, so static registers are read only once. When watching, a failed request
+            # only fails the registers it was to read
+            read_ses = await device.read_session(client, registers, partial=interval is not None)
+            if len(modbus_coils) > 0:
+                coils_ses = await ModbusReadSession.read_registers(client=client, unit=device.get_unit(), registers=modbus_coils,
+                                                                   allow_holes=device_config.allow_holes,
+                                                                   max_read_size=device_config.max_read_size,
+                                                                   partial=interval is not None)
+                read_ses.registers_dict.update(coils_ses.registers_dict)
+                read_ses.bucket_errors.extend(coils_ses.bucket_errors)
+            if len(read_ses.bucket_errors) > 0 and all(read_ses.get_register_error(x) is not None
+                                                       for x in modbus_registers_map.values()):
+                raise read_ses.bucket_errors[0].error
         except Exception as e:
             if interval is None:
                 print(f"ERROR: {e}")
@@ -358,12 +385,99 @@ async def handle_toggle(client: AsyncModbusClient, device: ModbusDevice,
     await device.switch_toggle(client, switch)
 
 
+def create_scan_clients(args: argparse.Namespace) -> List[AsyncModbusClient]:
+    silent_interval = args.silent_interval or DefaultSilentInterval
+
+    clients: List[AsyncModbusClient] = []
+    if args.scan_mode == "rtu":
+        baudrate, parity, stopbits = args.mode
+        timeout = args.timeout or get_probe_timeout(baudrate)
+        for path in args.path:
+            clients.append(PyAsyncModbusRtuClient(path=path, baudrate=baudrate, stopbits=stopbits, parity=parity,
+                                                  timeout=timeout, silent_interval=silent_interval))
+    else:
+        timeout = args.timeout or get_probe_timeout()
+        for host, port in args.address:
+            if args.scan_mode == "tcp":
+                clients.append(PyAsyncModbusTcpClient(host=host, port=port, timeout=timeout,
+                                                      silent_interval=silent_interval))
+            else:
+                clients.append(PyAsyncModbusRtuOverTcpClient(host=host, port=port, timeout=timeout,
+                                                             silent_interval=silent_interval))
+    return clients
+
+
+async def handle_scan(args: argparse.Namespace) -> None:
+    clients = create_scan_clients(args)
+    try:
+        results = await scan(clients, units=args.units, fingerprint=args.fingerprint)
+    finally:
+        for client in clients:
+            client.close()
+
+    if args.format == "json":
+        sys.stdout.write(json.dumps([{
+            "endpoint": x.client.get_endpoint(),
+            "unit": x.unit,
+            "response_time": round(x.response_time, 4),
+            "exception_code": x.exception_code,
+            "devices": x.devices,
+        } for x in results]) + "\n")
+    elif args.format == "raw":
+        for x in results:
+            print(f"{x.client.get_endpoint()},{x.unit}")
+    else:
+        for x in results:
+            line = f"{x.client.get_endpoint()} unit {x.unit:>3}: {x.response_time * 1000:.1f} ms"
+            if x.exception_code is not None:
+                line += f", exception {x.exception_code}"
+            if len(x.devices) > 0:
+                line += f", matches: {', '.join(x.devices)}"
+            print(line)
+        print(f"found {len(results)} unit(s)")
+
+
+async def handle_discover(args: argparse.Namespace) -> None:
+    timeout = args.timeout or DefaultTimeout
+    silent_interval = args.silent_interval or DefaultSilentInterval
+
+    client: AsyncModbusClient
+    if args.discover_mode == "tcp":
+        client = PyAsyncModbusTcpClient(host=args.host, port=args.port, timeout=timeout, silent_interval=silent_interval)
+    elif args.discover_mode == "rtu":
+        client = PyAsyncModbusRtuClient(path=args.path, baudrate=args.mode[0], stopbits=args.mode[2], parity=args.mode[1],
+                                        timeout=timeout, silent_interval=silent_interval)
+    else:
+        client = PyAsyncModbusRtuOverTcpClient(host=args.host, port=args.port, timeout=timeout,
+                                               silent_interval=silent_interval)
+
+    reg_types = [{"input": ModbusRegisterType.InputRegister, "holding": ModbusRegisterType.HoldingRegister}[x]
+                 for x in args.types.split(",")]
+
+    try:
+        result = await discover_registers(client, args.unit, reg_types=reg_types, start=args.start, end=args.end,
+                                          block_size=args.block_size, resolution=args.resolution)
+    finally:
+        client.close()
+
+    ranges_file = f"{args.output}.ranges.yaml"
+    device_file = f"{args.output}.yaml"
+    save_readable_ranges(ranges_file, result.ranges)
+    with open(device_file, "wt") as f:
+        f.write(create_skeleton_device_yaml(result, os.path.basename(ranges_file), args.block_size))
+
+    print(f"{result.requests_count} requests, written {device_file} and {ranges_file}")
+
+
 async def main() -> None:
     argparser = argparse.ArgumentParser()
 
     argparser.add_argument("--format", type=str, choices=("raw", "pretty", "json"), default="pretty")
     argparser.add_argument("--timeout", type=float)
     argparser.add_argument("--silent-interval", type=float)
+    argparser.add_argument("--static-cache", type=str, help="file to persist values of static registers in")
+    argparser.add_argument("--learned-map", type=str, help="file to persist addresses found unreadable in")
+    argparser.add_argument("--retries", type=int, default=0, help="retries of reads which timed out")
     argparser.add_argument("-v", "--verbose", action='store_true')
 
     mode_subparser = argparser.add_subparsers(title='standalone device', description='valid subcommands')
@@ -399,6 +513,52 @@ async def main() -> None:
     system_p.add_argument("system-file", type=str)
     system_p.add_argument("device-name", type=str)
 
+    scan_p = mode_subparser.add_parser("scan", help="find responding units")
+    scan_p.add_argument("--units", type=units_parser, default="1-247", help="default 1-247")
+    scan_p.add_argument("--fingerprint", action='store_true', help="match responders against bundled device files")
+    scan_sp = scan_p.add_subparsers(title="MODBUS mode")
+
+    scan_tcp_p = scan_sp.add_parser("tcp")
+    scan_tcp_p.set_defaults(scan_mode="tcp")
+    scan_tcp_p.add_argument("address", type=host_port_parser(), nargs="+", metavar="HOST:PORT")
+
+    scan_rtu_p = scan_sp.add_parser("rtu")
+    scan_rtu_p.set_defaults(scan_mode="rtu")
+    scan_rtu_p.add_argument("path", type=str, nargs="+")
+    scan_rtu_p.add_argument("--mode", type=mode_parser, default="9600n1", help="default 9600n1")
+
+    scan_rtu_over_tcp_p = scan_sp.add_parser("rtu-over-tcp")
+    scan_rtu_over_tcp_p.set_defaults(scan_mode="rtu-over-tcp")
+    scan_rtu_over_tcp_p.add_argument("address", type=host_port_parser(), nargs="+", metavar="HOST:PORT")
+
+    discover_p = mode_subparser.add_parser("discover", help="find readable registers of an undocumented device")
+    discover_p.add_argument("output", type=str, help="writes OUTPUT.yaml device skeleton and OUTPUT.ranges.yaml")
+    discover_p.add_argument("--types", type=str, choices=("input", "holding", "input,holding"), default="input,holding")
+    discover_p.add_argument("--start", type=lambda x: int(x, 0), default=0)
+    discover_p.add_argument("--end", type=lambda x: int(x, 0), default=0xFFFF)
+    discover_p.add_argument("--block-size", type=int, default=DefaultMaxReadSize)
+    discover_p.add_argument("--resolution", type=int, default=1,
+                            help="smallest chunk of addresses examined, larger values make unmapped areas cheaper")
+    discover_sp = discover_p.add_subparsers(title="MODBUS mode")
+
+    discover_tcp_p = discover_sp.add_parser("tcp")
+    discover_tcp_p.set_defaults(discover_mode="tcp")
+    discover_tcp_p.add_argument("--host", type=str, required=True)
+    discover_tcp_p.add_argument("--port", type=int, required=True)
+    discover_tcp_p.add_argument("--unit", type=int, required=True)
+
+    discover_rtu_p = discover_sp.add_parser("rtu")
+    discover_rtu_p.set_defaults(discover_mode="rtu")
+    discover_rtu_p.add_argument("--path", type=str, required=True)
+    discover_rtu_p.add_argument("--mode", type=mode_parser, default="9600n1", help="default 9600n1")
+    discover_rtu_p.add_argument("--unit", type=int, required=True)
+
+    discover_rtu_over_tcp_p = discover_sp.add_parser("rtu-over-tcp")
+    discover_rtu_over_tcp_p.set_defaults(discover_mode="rtu-over-tcp")
+    discover_rtu_over_tcp_p.add_argument("--host", type=str, required=True)
+    discover_rtu_over_tcp_p.add_argument("--port", type=int, required=True)
+    discover_rtu_over_tcp_p.add_argument("--unit", type=int, required=True)
+
     def add_commands_parser(sp: argparse.ArgumentParser) -> None:
         subparsers = sp.add_subparsers(title='subcommands', description='valid subcommands', help='additional help')
 
@@ -448,6 +608,14 @@ async def main() -> None:
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="[%(asctime)s] [%(name)s] %(message)s",
                         datefmt="%Y-%m-%d %H:%M:%S")
 
+    if "scan_mode" in cast(Any, args):
+        await handle_scan(cast(argparse.Namespace, args))
+        return
+
+    if "discover_mode" in cast(Any, args):
+        await handle_discover(cast(argparse.Namespace, args))
+        return
+
     if "create_device" not in cast(Any, args):
         argparser.print_help()
         exit(1)
@@ -460,6 +628,13 @@ async def main() -> None:
     modbus_device: ModbusDevice
     modbus_device, client = res
 
+    if args.static_cache is not None:
+        modbus_device.set_static_cache_file(args.static_cache)
+    if args.learned_map is not None:
+        modbus_device.get_address_map().set_learned_file(args.learned_map)
+    if args.retries > 0:
+        client.set_retry_policy(RequestClass.Read, RetryPolicy(retries=args.retries))
+
     device_config = modbus_device.get_device_config()
 
     if "cmd" not in cast(Any, args):
@@ -1,6 +1,6 @@
 import argparse
 import re
-from typing import Tuple, Any
+from typing import Tuple, Any, List, Optional, Callable, Union
 
 ModeTupleType = Tuple[int, str, int]
 
@@ -24,8 +24,59 @@ def interval_parser(arg_value: Any) -> float:
             raise argparse.ArgumentTypeError
 
 
+def host_port_parser(default_host: Optional[str] = None) -> Callable[[Any], Tuple[str, int]]:
+    """
+    Returns a parser of HOST:PORT arguments, or [HOST:]PORT if `default_host` is given.
+    """
+
+    def host_port(arg_value: Any) -> Tuple[str, int]:
+        m = re.match(r"^(?:(.+):)?(\d+)$", arg_value)
+        host = m.group(1) or default_host if m else None
+        if m and host is not None:
+            return host, int(m.group(2))
+        else:
+            raise argparse.ArgumentTypeError
+
+    return host_port
+
+
+def parse_units(units: Union[int, str]) -> List[int]:
+    """
+    Parses unit lists like `1`, `"1-32"` or `"1-4,10,20-22"`.
+    """
+    result: List[int] = []
+    if isinstance(units, int):
+        result.append(units)
+    else:
+        for part in units.split(","):
+            m = re.match(r"^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$", part)
+            if m is None:
+                raise ValueError(f"invalid units definition /{units}/")
+            first = int(m.group(1))
+            last = int(m.group(2)) if m.group(2) is not None else first
+            if last < first:
+                raise ValueError(f"invalid units definition /{units}/")
+            result += range(first, last + 1)
+
+    for unit in result:
+        if not 1 <= unit <= 247:
+            raise ValueError(f"unit /{unit}/ out of range")
+
+    return result
+
+
+def units_parser(arg_value: Any) -> List[int]:
+    try:
+        return parse_units(arg_value)
+    except ValueError:
+        raise argparse.ArgumentTypeError
+
+
 __all__ = [
     "ModeTupleType",
     "mode_parser",
     "interval_parser",
+    "host_port_parser",
+    "parse_units",
+    "units_parser",
 ]
@@ -0,0 +1,36 @@
+import argparse
+import unittest
+
+from modbus_client.cli.argument_parsers import parse_units, units_parser, host_port_parser
+
+
+class ArgumentParsersTest(unittest.TestCase):
+    def test_parse_units(self) -> None:
+        self.assertEqual([7], parse_units(7))
+        self.assertEqual([3], parse_units("3"))
+        self.assertEqual([1, 2, 3, 4, 10], parse_units("1-4,10"))
+        self.assertEqual([1, 2, 20, 21, 22], parse_units(" 1 - 2 , 20-22 "))
+        self.assertEqual([1, 247], parse_units("1,247"))
+
+        for units in ["0", "248", "240-250"]:
+            with self.assertRaisesRegex(ValueError, "out of range"):
+                parse_units(units)
+        with self.assertRaisesRegex(ValueError, "out of range"):
+            parse_units(0)
+
+        for units in ["", "a", "1-", "1,,2", "1-2-3", "0x10", "-5", "5-4"]:
+            with self.assertRaisesRegex(ValueError, "invalid units"):
+                parse_units(units)
+
+    def test_units_parser(self) -> None:
+        self.assertEqual([1, 2], units_parser("1-2"))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            units_parser("1-300")
+
+    def test_host_port_parser(self) -> None:
+        self.assertEqual(("10.0.0.1", 502), host_port_parser()("10.0.0.1:502"))
+        self.assertEqual(("0.0.0.0", 502), host_port_parser("0.0.0.0")("502"))
+        self.assertEqual(("localhost", 5020), host_port_parser("0.0.0.0")("localhost:5020"))
+        for value in ["502", "host:", "host:port", ""]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                host_port_parser()(value)
@@ -1,10 +1,66 @@
 from abc import abstractmethod
-from typing import List
+from typing import List, Optional, Tuple, Any, ContextManager, TYPE_CHECKING, Mapping
+
+from modbus_client.client.metrics import MetricsRegistry
+from modbus_client.client.retry import RequestClass, RetryPolicy, CircuitBreaker
+from modbus_client.client.tracing import RequestHook, Span, NullSpan, TracingSpan
+
+if TYPE_CHECKING:
+    from modbus_client.registers.read_coalescer import ReadCoalescer
 
 DefaultMaxReadSize = 100
 
 
 class AsyncModbusClient:
+    metrics: Optional[MetricsRegistry] = None
+    hooks: Tuple[RequestHook, ...] = ()
+    coalescer: Optional["ReadCoalescer"] = None
+    retry_policies: Mapping[RequestClass, RetryPolicy] = {}
+    circuit_breaker: Optional[CircuitBreaker] = None
+
+    def set_metrics(self, metrics: Optional[MetricsRegistry]) -> None:
+        self.metrics = metrics
+
+    def set_coalescer(self, coalescer: Optional["ReadCoalescer"]) -> None:
+        """
+        Enables single-flight coalescing of concurrent overlapping `ModbusReadSession.read_registers` calls.
+        """
+        self.coalescer = coalescer
+
+    def set_retry_policy(self, request_class: RequestClass, policy: Optional[RetryPolicy]) -> None:
+        policies = dict(self.retry_policies)
+        if policy is None:
+            policies.pop(request_class, None)
+        else:
+            policies[request_class] = policy
+        self.retry_policies = policies
+
+    def set_circuit_breaker(self, circuit_breaker: Optional[CircuitBreaker]) -> None:
+        """
+        Enables rejecting requests to units which stopped responding, see `CircuitBreaker`.
+        """
+        self.circuit_breaker = circuit_breaker
+
+    def add_hook(self, hook: RequestHook) -> None:
+        self.hooks = (*self.hooks, hook)
+
+    def remove_hook(self, hook: RequestHook) -> None:
+        self.hooks = tuple(x for x in self.hooks if x is not hook)
+
+    def span(self, name: str, unit: int, **attributes: Any) -> ContextManager[Optional[Span]]:
+        """
+        Returns a context manager reporting a span to registered hooks, or a no-op one if there are none.
+        """
+        if len(self.hooks) == 0:
+            return NullSpan
+        return TracingSpan(self.hooks, name, unit, attributes)
+
+    def get_endpoint(self) -> str:
+        """
+        Returns a name of the transport used in metrics, e.g. tcp://10.0.0.1:502.
+        """
+        return type(self).__name__
+
     @abstractmethod
     async def write_coil(self, unit: int, address: int, value: bool) -> None:
         pass
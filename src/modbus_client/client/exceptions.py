@@ -1,12 +1,31 @@
-class ReadErrorException(Exception):
+from typing import Optional
+
+
+class ModbusRequestException(Exception):
+    def __init__(self, message: str, exception_code: Optional[int] = None, timeout: bool = False) -> None:
+        super().__init__(message)
+        self.exception_code = exception_code
+        self.timeout = timeout
+
+
+class ReadErrorException(ModbusRequestException):
+    pass
+
+
+class WriteErrorException(ModbusRequestException):
     pass
 
 
-class WriteErrorException(Exception):
+class CircuitOpenException(ModbusRequestException):
+    """
+    Raised without sending the request, when the unit's circuit breaker is open.
+    """
     pass
 
 
 __all__ = [
+    "ModbusRequestException",
     "ReadErrorException",
     "WriteErrorException",
+    "CircuitOpenException",
 ]
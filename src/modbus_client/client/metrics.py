@@ -0,0 +1,250 @@
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Tuple, List, Optional, Iterator
+
+from modbus_client.client.types import ModbusFunctionCode
+
+LabelsType = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram with log-linear buckets: values below `SubBuckets` units are counted exactly, above that every
+    power of two range is split into `SubBuckets` equal buckets, which bounds the relative error to 1/SubBuckets.
+    """
+
+    SubBuckets = 16
+    Resolution = 1e-6  # seconds per unit
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @classmethod
+    def _get_index(cls, value: float) -> int:
+        units = int(value / cls.Resolution)
+        if units < cls.SubBuckets:
+            return max(units, 0)
+        mantissa, exponent = math.frexp(units)
+        sub_bucket = int((mantissa * 2 - 1) * cls.SubBuckets)
+        return cls.SubBuckets * (exponent - cls.SubBuckets.bit_length() + 1) + sub_bucket
+
+    @classmethod
+    def get_bucket_lower_bound(cls, index: int) -> float:
+        if index < cls.SubBuckets:
+            return index * cls.Resolution
+        octave, sub_bucket = divmod(index - cls.SubBuckets, cls.SubBuckets)
+        return (1 << (octave + cls.SubBuckets.bit_length() - 1)) * (1 + sub_bucket / cls.SubBuckets) * cls.Resolution
+
+    def record(self, value: float) -> None:
+        index = self._get_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns the upper bound of the bucket containing the q-th percentile (0-100), clamped to the maximum value.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        cumulative = 0
+        for index in sorted(self.counts.keys()):
+            cumulative += self.counts[index]
+            if cumulative >= rank:
+                return min(self.get_bucket_lower_bound(index + 1), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: List[float]) -> List[int]:
+        """
+        Returns the number of recorded values in buckets starting at or below each of the bounds. A bucket straddling
+        a bound is counted in full, so values up to a bucket width (1/SubBuckets relative) above the bound may be
+        included, but a value at or below the bound is never left out.
+        """
+        result = []
+        items = sorted(self.counts.items())
+        cumulative = 0
+        i = 0
+        for bound in bounds:
+            while i < len(items) and self.get_bucket_lower_bound(items[i][0]) <= bound:
+                cumulative += items[i][1]
+                i += 1
+            result.append(cumulative)
+        return result
+
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    retries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    exceptions: Dict[int, int] = field(default_factory=dict)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+@dataclass(frozen=True)
+class RequestKey:
+    endpoint: str
+    unit: int
+    function_code: int
+
+
+def _function_name(function_code: int) -> str:
+    try:
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", ModbusFunctionCode(function_code).name).lower()
+    except ValueError:
+        return str(function_code)
+
+
+def get_pdu_sizes(function_code: int, count: int) -> Tuple[int, int]:
+    """
+    Returns sizes of (request, response) PDUs of a successful transaction.
+    """
+    if function_code in (ModbusFunctionCode.ReadCoils, ModbusFunctionCode.ReadDiscreteInputs):
+        return 5, 2 + (count + 7) // 8
+    elif function_code in (ModbusFunctionCode.ReadHoldingRegisters, ModbusFunctionCode.ReadInputRegisters):
+        return 5, 2 + 2 * count
+    elif function_code in (ModbusFunctionCode.WriteSingleCoil, ModbusFunctionCode.WriteSingleRegister):
+        return 5, 5
+    elif function_code == ModbusFunctionCode.WriteMultipleCoils:
+        return 6 + (count + 7) // 8, 5
+    elif function_code == ModbusFunctionCode.WriteMultipleRegisters:
+        return 6 + 2 * count, 5
+    else:
+        return 0, 0
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelsType) -> str:
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+
+class MetricsRegistry:
+    """
+    Per endpoint, unit and function code request statistics, exportable in Prometheus text format.
+    """
+
+    LatencyBuckets = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    def __init__(self) -> None:
+        self._stats: Dict[RequestKey, RequestStats] = {}
+        # (endpoint, unit) -> circuit breaker state (0 closed, 1 half-open, 2 open) and rejected requests count
+        self._circuits: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+    def get_stats(self, endpoint: str, unit: int, function_code: int) -> RequestStats:
+        key = RequestKey(endpoint, unit, int(function_code))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = RequestStats()
+        return stats
+
+    def record_request(self, endpoint: str, unit: int, function_code: int, count: int, duration: float,
+                       framing_overhead: int = 0, exception_code: Optional[int] = None, timeout: bool = False,
+                       error: bool = False) -> None:
+        stats = self.get_stats(endpoint, unit, function_code)
+        stats.requests += 1
+        stats.latency.record(duration)
+
+        request_size, response_size = get_pdu_sizes(function_code, count)
+        stats.bytes_sent += request_size + framing_overhead
+
+        if timeout:
+            stats.timeouts += 1
+            stats.errors += 1
+        elif exception_code is not None:
+            stats.exceptions[exception_code] = stats.exceptions.get(exception_code, 0) + 1
+            stats.errors += 1
+            stats.bytes_received += 2 + framing_overhead
+        elif error:
+            stats.errors += 1
+        else:
+            stats.bytes_received += response_size + framing_overhead
+
+    def record_retry(self, endpoint: str, unit: int, function_code: int) -> None:
+        self.get_stats(endpoint, unit, function_code).retries += 1
+
+    def set_circuit_state(self, endpoint: str, unit: int, state: int) -> None:
+        _, rejected = self._circuits.get((endpoint, unit), (0, 0))
+        self._circuits[(endpoint, unit)] = (int(state), rejected)
+
+    def record_rejected(self, endpoint: str, unit: int) -> None:
+        state, rejected = self._circuits.get((endpoint, unit), (0, 0))
+        self._circuits[(endpoint, unit)] = (state, rejected + 1)
+
+    def get_circuit(self, endpoint: str, unit: int) -> Tuple[int, int]:
+        """
+        Returns the circuit breaker state and the number of requests it rejected.
+        """
+        return self._circuits.get((endpoint, unit), (0, 0))
+
+    def items(self) -> Iterator[Tuple[RequestKey, RequestStats]]:
+        return iter(sorted(self._stats.items(), key=lambda x: (x[0].endpoint, x[0].unit, x[0].function_code)))
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def emit(name: str, metric_type: str, help_text: str, samples: List[Tuple[LabelsType, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        def base_labels(key: RequestKey) -> LabelsType:
+            return (("endpoint", key.endpoint), ("unit", str(key.unit)), ("function", _function_name(key.function_code)))
+
+        items = list(self.items())
+
+        emit("modbus_requests_total", "counter", "Modbus requests sent",
+             [(base_labels(k), s.requests) for k, s in items])
+        emit("modbus_request_errors_total", "counter", "Modbus requests that failed for any reason",
+             [(base_labels(k), s.errors) for k, s in items])
+        emit("modbus_request_timeouts_total", "counter", "Modbus requests without response",
+             [(base_labels(k), s.timeouts) for k, s in items])
+        emit("modbus_request_retries_total", "counter", "Modbus requests retried",
+             [(base_labels(k), s.retries) for k, s in items])
+        emit("modbus_exception_responses_total", "counter", "Modbus exception responses by exception code",
+             [(base_labels(k) + (("code", str(code)),), n) for k, s in items for code, n in sorted(s.exceptions.items())])
+        emit("modbus_sent_bytes_total", "counter", "Estimated bytes sent on the wire",
+             [(base_labels(k), s.bytes_sent) for k, s in items])
+        emit("modbus_received_bytes_total", "counter", "Estimated bytes received on the wire",
+             [(base_labels(k), s.bytes_received) for k, s in items])
+
+        circuits = sorted(self._circuits.items())
+        emit("modbus_circuit_state", "gauge", "Circuit breaker state: 0 closed, 1 half-open, 2 open",
+             [((("endpoint", endpoint), ("unit", str(unit))), state) for (endpoint, unit), (state, _) in circuits])
+        emit("modbus_circuit_rejected_total", "counter", "Modbus requests rejected by an open circuit breaker",
+             [((("endpoint", endpoint), ("unit", str(unit))), rejected) for (endpoint, unit), (_, rejected) in circuits])
+
+        name = "modbus_request_duration_seconds"
+        lines.append(f"# HELP {name} Modbus request latency")
+        lines.append(f"# TYPE {name} histogram")
+        for key, stats in items:
+            labels = base_labels(key)
+            for bound, count in zip(self.LatencyBuckets, stats.latency.cumulative_counts(self.LatencyBuckets)):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {stats.latency.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {stats.latency.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {stats.latency.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "LatencyHistogram",
+    "RequestStats",
+    "RequestKey",
+    "MetricsRegistry",
+]
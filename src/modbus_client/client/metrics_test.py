@@ -0,0 +1,81 @@
+import re
+import unittest
+from typing import Dict, List
+
+from modbus_client.client.metrics import LatencyHistogram, MetricsRegistry
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_bucket_bounds(self) -> None:
+        for index in range(400):
+            lower_bound = LatencyHistogram.get_bucket_lower_bound(index)
+            upper_bound = LatencyHistogram.get_bucket_lower_bound(index + 1)
+            self.assertEqual(index, LatencyHistogram._get_index(lower_bound))
+            self.assertEqual(index, LatencyHistogram._get_index(upper_bound * (1 - 1e-9)))
+            if index >= LatencyHistogram.SubBuckets:
+                self.assertLessEqual(upper_bound - lower_bound, lower_bound / LatencyHistogram.SubBuckets * 1.000001)
+
+    def test_percentile(self) -> None:
+        histogram = LatencyHistogram()
+        self.assertEqual(0.0, histogram.percentile(50))
+
+        for i in range(1, 101):
+            histogram.record(i * 0.001)
+
+        for q in [1, 50, 90, 99]:
+            expected = q * 0.001
+            self.assertGreaterEqual(histogram.percentile(q), expected * (1 - 1e-9))
+            self.assertLessEqual(histogram.percentile(q), expected * (1 + 1 / LatencyHistogram.SubBuckets))
+        self.assertEqual(0.1, histogram.percentile(100))
+        self.assertEqual((100, 0.001, 0.1), (histogram.count, histogram.min, histogram.max))
+
+    def test_cumulative_counts(self) -> None:
+        histogram = LatencyHistogram()
+        # just below and just above the 1 ms bound, both in the bucket straddling it
+        for value in [0.0005, 0.000995, 0.001001, 0.002]:
+            histogram.record(value)
+
+        self.assertEqual([0, 3, 4, 4], histogram.cumulative_counts([0.0001, 0.001, 0.002, 1.0]))
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    def parse_samples(self, text: str) -> Dict[str, float]:
+        samples = {}
+        for line in text.splitlines():
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_prometheus(self) -> None:
+        metrics = MetricsRegistry()
+        endpoint = 'tcp://host"a"\\b\nc:502'
+        fc = ModbusFunctionCode.ReadHoldingRegisters
+        for duration in [0.0004, 0.003, 0.003, 0.2, 20.0]:
+            metrics.record_request(endpoint, 1, fc, 10, duration, framing_overhead=7)
+        metrics.record_request(endpoint, 1, fc, 10, 0.001, exception_code=ModbusExceptionCode.IllegalDataAddress)
+
+        text = metrics.to_prometheus()
+        samples = self.parse_samples(text)
+
+        labels = 'endpoint="tcp://host\\"a\\"\\\\b\\nc:502",unit="1",function="read_holding_registers"'
+        self.assertEqual(6, samples[f"modbus_requests_total{{{labels}}}"])
+        self.assertEqual(1, samples[f"modbus_request_errors_total{{{labels}}}"])
+        self.assertEqual(1, samples[f'modbus_exception_responses_total{{{labels},code="2"}}'])
+        self.assertEqual(5 * (5 + 7) + 5, samples[f"modbus_sent_bytes_total{{{labels}}}"])
+        self.assertEqual(5 * (22 + 7) + 2, samples[f"modbus_received_bytes_total{{{labels}}}"])
+
+        buckets: List[float] = []
+        for bound in MetricsRegistry.LatencyBuckets:
+            buckets.append(samples[f'modbus_request_duration_seconds_bucket{{{labels},le="{bound}"}}'])
+        inf_bucket = samples[f'modbus_request_duration_seconds_bucket{{{labels},le="+Inf"}}']
+        self.assertEqual(sorted(buckets), buckets)
+        self.assertEqual([2, 2, 4, 4, 4, 4, 4, 5, 5, 5, 5, 5, 5], buckets)
+        self.assertEqual(6, inf_bucket)
+        self.assertEqual(inf_bucket, samples[f"modbus_request_duration_seconds_count{{{labels}}}"])
+        self.assertAlmostEqual(20.2074, samples[f"modbus_request_duration_seconds_sum{{{labels}}}"])
+
+        # one line per sample, the newline in the endpoint is escaped
+        for line in text.splitlines():
+            self.assertRegex(line, re.compile(r"^(# (HELP|TYPE) \w+ .+|\w+(\{.*\})? \S+)$"))
@@ -0,0 +1,58 @@
+from typing import List, Dict, Optional
+
+from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.exceptions import ReadErrorException
+
+
+class MockModbusClient(AsyncModbusClient):
+    """
+    In-process client backed by plain dictionaries (address -> word), shared by all units.
+    """
+
+    def __init__(self, input_registers: Dict[int, int], holding_registers: Dict[int, int],
+                 coils: Optional[Dict[int, bool]] = None, missing_as_zero: bool = False) -> None:
+        self.input_registers = input_registers
+        self.holding_registers = holding_registers
+        self.coils = coils if coils is not None else {}
+        self.missing_as_zero = missing_as_zero
+
+    def _read(self, registers: Dict[int, int], address: int, count: int) -> List[int]:
+        values = []
+        for i in range(address, address + count):
+            value = registers.get(i)
+            if value is None:
+                if not self.missing_as_zero:
+                    raise ReadErrorException(f"address {i} not available")
+                value = 0
+            values.append(value)
+        return values
+
+    async def write_coil(self, unit: int, address: int, value: bool) -> None:
+        self.coils[address] = value
+
+    async def read_coils(self, unit: int, address: int, count: int) -> List[bool]:
+        return [self.coils.get(i, False) for i in range(address, address + count)]
+
+    async def read_discrete_inputs(self, unit: int, address: int, count: int) -> List[int]:
+        return [0] * count
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        return self._read(self.input_registers, address, count)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        return self._read(self.holding_registers, address, count)
+
+    async def write_holding_register(self, unit: int, address: int, value: int) -> None:
+        self.holding_registers[address] = value
+
+    async def write_holding_registers(self, unit: int, address: int, values: List[int]) -> None:
+        for i, value in enumerate(values):
+            self.holding_registers[address + i] = value
+
+    def close(self) -> None:
+        pass
+
+
+__all__ = [
+    "MockModbusClient",
+]
@@ -1,33 +1,167 @@
 import asyncio
 import functools
 import logging
+import time
 from concurrent.futures.thread import ThreadPoolExecutor
-from typing import List, cast, Any, Callable, Optional
+from typing import List, cast, Any, Callable, Optional, Dict
 
 import pymodbus.bit_read_message
 import pymodbus.client
+import pymodbus.exceptions
+import pymodbus.pdu
 import pymodbus.register_read_message
 import pymodbus.register_write_message
 from pymodbus.framer.rtu_framer import ModbusRtuFramer
 
 from modbus_client.client.async_modbus_client import AsyncModbusClient
-from modbus_client.client.exceptions import ReadErrorException, WriteErrorException
+from modbus_client.client.exceptions import ReadErrorException, WriteErrorException, CircuitOpenException
+from modbus_client.client.metrics import get_pdu_sizes
+from modbus_client.client.retry import get_request_class, RetryableExceptionCodes
+from modbus_client.client.tracing import RequestEvent, get_current_span
+from modbus_client.client.types import ModbusFunctionCode, NoResponseExceptionCodes
+
+TcpFramingOverhead = 7  # MBAP header
+RtuFramingOverhead = 3  # unit and CRC
+
+
+def get_error_details(result: Any) -> Dict[str, Any]:
+    """
+    Returns ReadErrorException/WriteErrorException arguments describing a failed pymodbus result.
+    """
+    if isinstance(result, pymodbus.pdu.ExceptionResponse):
+        return dict(exception_code=result.exception_code)
+    elif isinstance(result, pymodbus.exceptions.ModbusIOException):
+        return dict(timeout=True)
+    else:
+        return {}
 
 
 class PyAsyncModbusClient(AsyncModbusClient):
-    def __init__(self, client: pymodbus.client.base.ModbusBaseClient):
+    def __init__(self, client: pymodbus.client.base.ModbusBaseClient, endpoint: Optional[str] = None,
+                 framing_overhead: int = 0):
         self.client = client
         self.executor = ThreadPoolExecutor(1)
+        self.endpoint = endpoint
+        self.framing_overhead = framing_overhead
+
+    def get_endpoint(self) -> str:
+        return self.endpoint or super().get_endpoint()
 
     async def _run(self, fn: Callable[..., Any], *args: List[Any], **kwargs: Any) -> Any:
         return await asyncio.get_event_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
 
+    async def _execute(self, function_code: ModbusFunctionCode, unit: int, address: int, quantity: int,
+                       fn: Callable[..., Any], **kwargs: Any) -> Any:
+        circuit_breaker = self.circuit_breaker
+        policy = self.retry_policies.get(get_request_class(function_code)) if len(self.retry_policies) > 0 else None
+        if circuit_breaker is None and policy is None:
+            return await self._execute_once(function_code, unit, address, quantity, fn, **kwargs)
+
+        if circuit_breaker is not None:
+            allowed = circuit_breaker.allow_request(unit)
+            self._update_circuit_metrics(unit)
+            if not allowed:
+                if self.metrics is not None:
+                    self.metrics.record_rejected(self.get_endpoint(), unit)
+                raise CircuitOpenException(f"unit {unit} is not responding, circuit open")
+
+        retry = 0
+        while True:
+            try:
+                result = await self._execute_once(function_code, unit, address, quantity, fn, **kwargs)
+            except Exception:
+                self._record_circuit(unit, failed=True)
+                raise
+
+            error_details = get_error_details(result)
+            exception_code = error_details.get("exception_code")
+            timeout = error_details.get("timeout", False)
+            retryable = timeout or exception_code in RetryableExceptionCodes
+            if not retryable or policy is None or retry >= policy.retries:
+                break
+
+            if self.metrics is not None:
+                self.metrics.record_retry(self.get_endpoint(), unit, function_code)
+            await asyncio.sleep(policy.get_delay(retry))
+            retry += 1
+
+        self._record_circuit(unit, failed=timeout or exception_code in NoResponseExceptionCodes)
+        return result
+
+    def _record_circuit(self, unit: int, failed: bool) -> None:
+        circuit_breaker = self.circuit_breaker
+        if circuit_breaker is None:
+            return
+        if failed:
+            circuit_breaker.record_failure(unit)
+        else:
+            circuit_breaker.record_success(unit)
+        self._update_circuit_metrics(unit)
+
+    def _update_circuit_metrics(self, unit: int) -> None:
+        if self.metrics is not None and self.circuit_breaker is not None:
+            self.metrics.set_circuit_state(self.get_endpoint(), unit, self.circuit_breaker.get_state(unit))
+
+    async def _execute_once(self, function_code: ModbusFunctionCode, unit: int, address: int, quantity: int,
+                            fn: Callable[..., Any], **kwargs: Any) -> Any:
+        metrics = self.metrics
+        hooks = self.hooks
+        if metrics is None and len(hooks) == 0:
+            return await self._run(fn, slave=unit, address=address, **kwargs)
+
+        event: Optional[RequestEvent] = None
+        if len(hooks) > 0:
+            request_size, response_size = get_pdu_sizes(function_code, quantity)
+            event = RequestEvent(endpoint=self.get_endpoint(), unit=unit, function_code=function_code, address=address,
+                                 count=quantity, request_size=request_size, response_size=response_size,
+                                 span=get_current_span(), start_time=time.perf_counter())
+            for hook in hooks:
+                hook.on_request(event)
+
+        start = time.perf_counter()
+        try:
+            result = await self._run(fn, slave=unit, address=address, **kwargs)
+        except Exception as e:
+            duration = time.perf_counter() - start
+            if metrics is not None:
+                metrics.record_request(self.get_endpoint(), unit, function_code, quantity, duration,
+                                       framing_overhead=self.framing_overhead, error=True)
+            if event is not None:
+                event.duration = duration
+                event.error = e
+                for hook in hooks:
+                    hook.on_error(event)
+            raise
+
+        duration = time.perf_counter() - start
+        error_details = get_error_details(result)
+        is_error = isinstance(result, (Exception, pymodbus.pdu.ExceptionResponse))
+
+        if metrics is not None:
+            metrics.record_request(self.get_endpoint(), unit, function_code, quantity, duration,
+                                   framing_overhead=self.framing_overhead,
+                                   error=isinstance(result, Exception), **error_details)
+        if event is not None:
+            event.duration = duration
+            if is_error:
+                event.exception_code = error_details.get("exception_code")
+                event.timeout = error_details.get("timeout", False)
+                event.response_size = 2 if event.exception_code is not None else 0
+                for hook in hooks:
+                    hook.on_error(event)
+            else:
+                for hook in hooks:
+                    hook.on_response(event)
+
+        return result
+
     async def write_coil(self, unit: int, address: int, value: bool) -> None:
-        await self._run(self.client.write_coil, slave=unit, address=address, value=value)
+        await self._execute(ModbusFunctionCode.WriteSingleCoil, unit, address, 1, self.client.write_coil, value=value)
 
     async def read_coils(self, unit: int, address: int, count: int) -> List[bool]:
         bytes_count = (count + 7) // 8
-        result = await self._run(self.client.read_coils, slave=unit, address=address, count=bytes_count)
+        result = await self._execute(ModbusFunctionCode.ReadCoils, unit, address, bytes_count,
+                                     self.client.read_coils, count=bytes_count)
         if isinstance(result, pymodbus.bit_read_message.ReadCoilsResponse):
             if result.byte_count != bytes_count:
                 raise ReadErrorException("invalid count")
@@ -35,10 +169,11 @@ class PyAsyncModbusClient(AsyncModbusClient):
             # noinspection PyTypeChecker
             return cast(List[bool], result.bits[:count])
         else:
-            raise ReadErrorException(str(result))
+            raise ReadErrorException(str(result), **get_error_details(result))
 
     async def read_discrete_inputs(self, unit: int, address: int, count: int) -> List[int]:
-        result = await self._run(self.client.read_discrete_inputs, slave=unit, address=address, count=count)
+        result = await self._execute(ModbusFunctionCode.ReadDiscreteInputs, unit, address, count,
+                                     self.client.read_discrete_inputs, count=count)
         if isinstance(result, pymodbus.bit_read_message.ReadDiscreteInputsResponse):
             if result.byte_count != count:
                 raise ReadErrorException("invalid count")
@@ -53,42 +188,46 @@ class PyAsyncModbusClient(AsyncModbusClient):
                 values.append(value)
             return values
         else:
-            raise ReadErrorException(str(result))
+            raise ReadErrorException(str(result), **get_error_details(result))
 
     async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
         logging.debug(f"read {address} count: {count}")
-        result = await self._run(self.client.read_input_registers, slave=unit, address=address, count=count)
+        result = await self._execute(ModbusFunctionCode.ReadInputRegisters, unit, address, count,
+                                     self.client.read_input_registers, count=count)
         if isinstance(result, pymodbus.register_read_message.ReadInputRegistersResponse):
             if len(result.registers) != count:
                 raise ReadErrorException("invalid count")
             # noinspection PyTypeChecker
             return cast(List[int], result.registers)
         else:
-            raise ReadErrorException(str(result))
+            raise ReadErrorException(str(result), **get_error_details(result))
 
     async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
         logging.debug(f"read {address} count: {count}")
-        result = await self._run(self.client.read_holding_registers, slave=unit, address=address, count=count)
+        result = await self._execute(ModbusFunctionCode.ReadHoldingRegisters, unit, address, count,
+                                     self.client.read_holding_registers, count=count)
         if isinstance(result, pymodbus.register_read_message.ReadHoldingRegistersResponse):
             if len(result.registers) != count:
                 raise ReadErrorException("invalid count")
             # noinspection PyTypeChecker
             return cast(List[int], result.registers)
         else:
-            raise ReadErrorException(str(result))
+            raise ReadErrorException(str(result), **get_error_details(result))
 
     async def write_holding_register(self, unit: int, address: int, value: int) -> None:
         logging.debug(f"write {address} value: 0x{value:04x}")
-        result = await self._run(self.client.write_register, slave=unit, address=address, value=value)
+        result = await self._execute(ModbusFunctionCode.WriteSingleRegister, unit, address, 1,
+                                     self.client.write_register, value=value)
         if not isinstance(result, pymodbus.register_write_message.WriteSingleRegisterResponse):
-            raise WriteErrorException(str(result))
+            raise WriteErrorException(str(result), **get_error_details(result))
 
     async def write_holding_registers(self, unit: int, address: int, values: List[int]) -> None:
         s = ", ".join(f"0x{value:04x}" for value in values)
         logging.debug(f"write {address} values: {s}")
-        result = await self._run(self.client.write_registers, slave=unit, address=address, values=values)
+        result = await self._execute(ModbusFunctionCode.WriteMultipleRegisters, unit, address, len(values),
+                                     self.client.write_registers, values=values)
         if not isinstance(result, pymodbus.register_write_message.WriteMultipleRegistersResponse):
-            raise WriteErrorException(str(result))
+            raise WriteErrorException(str(result), **get_error_details(result))
 
     def close(self) -> None:
         self.client.close()
@@ -101,7 +240,7 @@ class PyAsyncModbusTcpClient(PyAsyncModbusClient):
         if silent_interval is not None:
             cl.silent_interval = silent_interval
 
-        super().__init__(cl)
+        super().__init__(cl, endpoint=f"tcp://{host}:{port}", framing_overhead=TcpFramingOverhead)
 
 
 class PyAsyncModbusRtuClient(PyAsyncModbusClient):
@@ -113,7 +252,7 @@ class PyAsyncModbusRtuClient(PyAsyncModbusClient):
         if silent_interval is not None:
             cl.silent_interval = silent_interval
 
-        super().__init__(cl)
+        super().__init__(cl, endpoint=f"rtu://{path}", framing_overhead=RtuFramingOverhead)
 
 
 class PyAsyncModbusRtuOverTcpClient(PyAsyncModbusClient):
@@ -123,7 +262,7 @@ class PyAsyncModbusRtuOverTcpClient(PyAsyncModbusClient):
         if silent_interval is not None:
             cl.silent_interval = silent_interval
 
-        super().__init__(cl)
+        super().__init__(cl, endpoint=f"rtu-over-tcp://{host}:{port}", framing_overhead=RtuFramingOverhead)
 
 
 __all__ = [
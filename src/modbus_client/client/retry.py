@@ -0,0 +1,119 @@
+import enum
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode
+
+# exceptions meaning the unit (or the gateway in front of it) may answer if asked again
+RetryableExceptionCodes = (ModbusExceptionCode.Acknowledge, ModbusExceptionCode.SlaveDeviceBusy,
+                           ModbusExceptionCode.GatewayTargetDeviceFailedToRespond)
+
+
+class RequestClass(enum.Enum):
+    Read = "read"
+    Write = "write"
+
+
+def get_request_class(function_code: int) -> RequestClass:
+    if function_code in (ModbusFunctionCode.ReadCoils, ModbusFunctionCode.ReadDiscreteInputs,
+                         ModbusFunctionCode.ReadHoldingRegisters, ModbusFunctionCode.ReadInputRegisters):
+        return RequestClass.Read
+    return RequestClass.Write
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries of requests which timed out or got a retryable exception response. The n-th retry waits
+    `backoff * backoff_multiplier ** n` seconds, at most `max_backoff`, reduced by a random fraction of up to `jitter`,
+    so units polled in lockstep don't retry in lockstep.
+    """
+    retries: int = 0
+    backoff: float = 0.05
+    backoff_multiplier: float = 2.0
+    max_backoff: float = 1.0
+    jitter: float = 0.5
+
+    def get_delay(self, retry: int) -> float:
+        delay = min(self.backoff * self.backoff_multiplier ** retry, self.max_backoff)
+        return delay * (1 - self.jitter * random.random())
+
+
+class CircuitState(enum.IntEnum):
+    Closed = 0
+    HalfOpen = 1
+    Open = 2
+
+
+@dataclass
+class CircuitBreakerConfig:
+    # consecutive failed requests opening the circuit
+    failure_threshold: int = 3
+    # time after which an open circuit lets a single probe request through, doubled after each failed probe
+    open_time: float = 10.0
+    max_open_time: float = 300.0
+
+
+class _Circuit:
+    def __init__(self) -> None:
+        self.state = CircuitState.Closed
+        self.failures = 0
+        self.open_time = 0.0
+        self.open_until = 0.0
+
+
+class CircuitBreaker:
+    """
+    Per-unit circuit breaker. After `failure_threshold` consecutive requests to a unit failed without a response
+    (timeouts, connection errors), the circuit opens and requests to the unit are rejected at once instead of blocking
+    the bus for the full timeout. Once `open_time` passes, a single probe request is let through: a response closes the
+    circuit, a failure opens it again for twice as long. Exception responses count as responses, the unit is alive.
+    """
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None) -> None:
+        self.config = config if config is not None else CircuitBreakerConfig()
+        self._circuits: Dict[int, _Circuit] = {}
+
+    def get_state(self, unit: int) -> CircuitState:
+        circuit = self._circuits.get(unit)
+        return CircuitState.Closed if circuit is None else circuit.state
+
+    def allow_request(self, unit: int) -> bool:
+        circuit = self._circuits.get(unit)
+        if circuit is None or circuit.state == CircuitState.Closed:
+            return True
+        now = time.monotonic()
+        # a half-open circuit lets another probe through if the previous one never reported back
+        if now >= circuit.open_until:
+            circuit.state = CircuitState.HalfOpen
+            circuit.open_until = now + circuit.open_time
+            return True
+        return False
+
+    def record_success(self, unit: int) -> None:
+        self._circuits.pop(unit, None)
+
+    def record_failure(self, unit: int) -> None:
+        circuit = self._circuits.setdefault(unit, _Circuit())
+        if circuit.state == CircuitState.HalfOpen:
+            circuit.open_time = min(circuit.open_time * 2, self.config.max_open_time)
+        else:
+            circuit.failures += 1
+            if circuit.failures < self.config.failure_threshold:
+                return
+            circuit.open_time = self.config.open_time
+        circuit.state = CircuitState.Open
+        circuit.open_until = time.monotonic() + circuit.open_time
+
+
+__all__ = [
+    "RetryableExceptionCodes",
+    "RequestClass",
+    "get_request_class",
+    "RetryPolicy",
+    "CircuitState",
+    "CircuitBreakerConfig",
+    "CircuitBreaker",
+]
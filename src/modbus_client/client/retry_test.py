@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from typing import Any, List
+
+import pymodbus.exceptions
+import pymodbus.register_read_message
+
+from modbus_client.client.exceptions import ReadErrorException, CircuitOpenException
+from modbus_client.client.metrics import MetricsRegistry
+from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusClient
+from modbus_client.client.retry import RequestClass, RetryPolicy, CircuitBreaker, CircuitBreakerConfig, CircuitState
+from modbus_client.client.types import ModbusFunctionCode
+
+
+class FlakySyncClient:
+    def __init__(self) -> None:
+        # units not responding, and the number of requests left to time out for the others
+        self.dead_units = {2}
+        self.timeouts_left = 0
+        self.requests: List[int] = []
+
+    def read_holding_registers(self, slave: int, address: int, count: int) -> Any:
+        self.requests.append(slave)
+        if slave in self.dead_units or self.timeouts_left > 0:
+            self.timeouts_left -= 1
+            return pymodbus.exceptions.ModbusIOException("no response")
+        return pymodbus.register_read_message.ReadHoldingRegistersResponse([address] * count)
+
+    def close(self) -> None:
+        pass
+
+
+class RetryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.sync_client = FlakySyncClient()
+        self.client = PyAsyncModbusClient(self.sync_client, endpoint="test")  # type: ignore
+        self.metrics = MetricsRegistry()
+        self.client.set_metrics(self.metrics)
+
+    async def test_retry(self) -> None:
+        self.client.set_retry_policy(RequestClass.Read, RetryPolicy(retries=2, backoff=0.001))
+
+        self.sync_client.timeouts_left = 2
+        self.assertEqual([5], await self.client.read_holding_registers(1, 5, 1))
+
+        self.sync_client.timeouts_left = 3
+        with self.assertRaises(ReadErrorException):
+            await self.client.read_holding_registers(1, 5, 1)
+
+        stats = self.metrics.get_stats("test", 1, ModbusFunctionCode.ReadHoldingRegisters)
+        self.assertEqual((6, 4), (stats.requests, stats.retries))
+
+    async def test_circuit_breaker(self) -> None:
+        self.client.set_circuit_breaker(CircuitBreaker(CircuitBreakerConfig(failure_threshold=2, open_time=0.05)))
+
+        for _ in range(2):
+            with self.assertRaises(ReadErrorException):
+                await self.client.read_holding_registers(2, 0, 1)
+        with self.assertRaises(CircuitOpenException):
+            await self.client.read_holding_registers(2, 0, 1)
+        # other units are not affected
+        await self.client.read_holding_registers(1, 0, 1)
+
+        self.assertEqual([2, 2, 1], self.sync_client.requests)
+        self.assertEqual((CircuitState.Open, 1), self.metrics.get_circuit("test", 2))
+        self.assertIn('modbus_circuit_state{endpoint="test",unit="2"} 2', self.metrics.to_prometheus())
+
+        # after the open time a single probe is let through, and the unit is back
+        await asyncio.sleep(0.06)
+        self.sync_client.dead_units.clear()
+        await self.client.read_holding_registers(2, 0, 1)
+        self.assertEqual((CircuitState.Closed, 1), self.metrics.get_circuit("test", 2))
+
@@ -0,0 +1,99 @@
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Optional, Dict, Any, Sequence, ContextManager, Type
+
+NullSpan: ContextManager[None] = nullcontext()
+
+
+@dataclass
+class Span:
+    name: str
+    unit: int
+    attributes: Dict[str, Any]
+    parent: Optional["Span"]
+    start_time: float
+    duration: Optional[float] = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class RequestEvent:
+    endpoint: str
+    unit: int
+    function_code: int
+    address: int
+    count: int
+    request_size: int
+    response_size: int
+    span: Optional[Span]
+    start_time: float
+    duration: Optional[float] = None
+    exception_code: Optional[int] = None
+    timeout: bool = False
+    error: Optional[BaseException] = field(default=None)
+
+
+class RequestHook:
+    """
+    Base class for tracing hooks, override the methods of interest. Times are `time.perf_counter()` values, sizes are
+    PDU sizes in bytes.
+    """
+
+    def on_request(self, event: RequestEvent) -> None:
+        pass
+
+    def on_response(self, event: RequestEvent) -> None:
+        pass
+
+    def on_error(self, event: RequestEvent) -> None:
+        pass
+
+    def on_span_start(self, span: Span) -> None:
+        pass
+
+    def on_span_end(self, span: Span) -> None:
+        pass
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("modbus_current_span", default=None)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class TracingSpan:
+    def __init__(self, hooks: Sequence[RequestHook], name: str, unit: int, attributes: Dict[str, Any]) -> None:
+        self._hooks = hooks
+        self._span = Span(name=name, unit=unit, attributes=attributes, parent=_current_span.get(), start_time=0)
+        self._token: Any = None
+
+    def __enter__(self) -> Span:
+        span = self._span
+        span.start_time = time.perf_counter()
+        self._token = _current_span.set(span)
+        for hook in self._hooks:
+            hook.on_span_start(span)
+        return span
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        span = self._span
+        span.duration = time.perf_counter() - span.start_time
+        span.error = exc
+        _current_span.reset(self._token)
+        for hook in self._hooks:
+            hook.on_span_end(span)
+
+
+__all__ = [
+    "NullSpan",
+    "Span",
+    "RequestEvent",
+    "RequestHook",
+    "TracingSpan",
+    "get_current_span",
+]
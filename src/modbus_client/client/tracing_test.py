@@ -0,0 +1,151 @@
+import unittest
+from typing import Any, List, Tuple, Dict
+
+import pymodbus.pdu
+import pymodbus.register_read_message
+import pymodbus.register_write_message
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusClient
+from modbus_client.client.tracing import RequestHook, RequestEvent, Span
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+
+config = """
+zero_mode: True
+
+registers:
+  holding_registers:
+    - voltage/0x0000/uint16
+    - current/0x0001/uint16
+    - mode/0x0002/uint16,bits=3:0
+"""
+
+
+class SyncClient:
+    def __init__(self) -> None:
+        self.words = {0: 230, 1: 5, 2: 0x1230}
+
+    def read_holding_registers(self, slave: int, address: int, count: int) -> Any:
+        if address == 10:
+            return pymodbus.pdu.ExceptionResponse(ModbusFunctionCode.ReadHoldingRegisters,
+                                                  ModbusExceptionCode.IllegalDataAddress)
+        if address == 20:
+            raise ConnectionError("connection lost")
+        return pymodbus.register_read_message.ReadHoldingRegistersResponse(
+                [self.words[x] for x in range(address, address + count)])
+
+    def write_register(self, slave: int, address: int, value: int) -> Any:
+        self.words[address] = value
+        return pymodbus.register_write_message.WriteSingleRegisterResponse(address, value)
+
+    def close(self) -> None:
+        pass
+
+
+class RecordingHook(RequestHook):
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, RequestEvent]] = []
+        self.spans: List[Tuple[str, Span]] = []
+
+    def on_request(self, event: RequestEvent) -> None:
+        self.events.append(("request", event))
+
+    def on_response(self, event: RequestEvent) -> None:
+        self.events.append(("response", event))
+
+    def on_error(self, event: RequestEvent) -> None:
+        self.events.append(("error", event))
+
+    def on_span_start(self, span: Span) -> None:
+        self.spans.append(("start", span))
+
+    def on_span_end(self, span: Span) -> None:
+        self.spans.append(("end", span))
+
+
+class TracingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.sync_client = SyncClient()
+        self.client = PyAsyncModbusClient(self.sync_client, endpoint="test")  # type: ignore
+        self.hook = RecordingHook()
+        self.client.add_hook(self.hook)
+
+    async def test_request_events(self) -> None:
+        await self.client.read_holding_registers(3, 0, 2)
+
+        self.assertEqual(["request", "response"], [x[0] for x in self.hook.events])
+        event = self.hook.events[1][1]
+        self.assertIs(self.hook.events[0][1], event)
+        self.assertEqual(("test", 3, ModbusFunctionCode.ReadHoldingRegisters, 0, 2),
+                         (event.endpoint, event.unit, event.function_code, event.address, event.count))
+        self.assertEqual((5, 6), (event.request_size, event.response_size))
+        self.assertIsNotNone(event.duration)
+        self.assertGreaterEqual(event.start_time, 0)
+        self.assertIsNone(event.span)
+
+    async def test_error_events(self) -> None:
+        with self.assertRaises(ReadErrorException):
+            await self.client.read_holding_registers(1, 10, 1)
+        with self.assertRaises(ConnectionError):
+            await self.client.read_holding_registers(1, 20, 1)
+
+        self.assertEqual(["request", "error", "request", "error"], [x[0] for x in self.hook.events])
+
+        exception_event = self.hook.events[1][1]
+        self.assertEqual(ModbusExceptionCode.IllegalDataAddress, exception_event.exception_code)
+        self.assertEqual(2, exception_event.response_size)
+        self.assertIsNone(exception_event.error)
+        self.assertIsNotNone(exception_event.duration)
+
+        raised_event = self.hook.events[3][1]
+        self.assertIsInstance(raised_event.error, ConnectionError)
+        self.assertIsNone(raised_event.exception_code)
+        self.assertIsNotNone(raised_event.duration)
+
+    async def test_spans(self) -> None:
+        device = ModbusDeviceFactory.from_config(config).create_device(1)
+
+        # bitfield writes read the current word first
+        await device.write_register(self.client, "mode", 5)
+
+        started = [x[1].name for x in self.hook.spans if x[0] == "start"]
+        self.assertEqual(["device.write_register", "read_session.read_registers", "read_session.plan"], started)
+        spans: Dict[str, Span] = {x[1].name: x[1] for x in self.hook.spans}
+        write_span = spans["device.write_register"]
+        read_span = spans["read_session.read_registers"]
+        self.assertIsNone(write_span.parent)
+        self.assertEqual({"register": "mode", "value": 5}, write_span.attributes)
+        self.assertIs(write_span, read_span.parent)
+        self.assertIs(read_span, spans["read_session.plan"].parent)
+        self.assertEqual({"registers": 1, "buckets": 1}, read_span.attributes)
+        for span in spans.values():
+            self.assertEqual(1, span.unit)
+            self.assertIsNotNone(span.duration)
+            self.assertIsNone(span.error)
+        # plan ends first, write last
+        self.assertEqual(["read_session.plan", "read_session.read_registers", "device.write_register"],
+                         [x[1].name for x in self.hook.spans if x[0] == "end"])
+
+        # requests are attributed to the innermost span
+        self.assertEqual([(ModbusFunctionCode.ReadHoldingRegisters, read_span),
+                          (ModbusFunctionCode.WriteSingleRegister, write_span)],
+                         [(x[1].function_code, x[1].span) for x in self.hook.events if x[0] == "response"])
+        self.assertEqual(0x1235, self.sync_client.words[2])
+
+    async def test_span_error(self) -> None:
+        with self.assertRaises(ValueError):
+            with self.client.span("outer", 1) as span:
+                raise ValueError()
+        self.assertIsNotNone(span)
+        self.assertIsInstance(self.hook.spans[-1][1].error, ValueError)
+
+    async def test_no_hooks(self) -> None:
+        self.client.remove_hook(self.hook)
+        with self.client.span("read_session.read_registers", 1) as span:
+            self.assertIsNone(span)
+
+        with MockModbusClient({}, {}).span("read_session.read_registers", 1) as span:
+            self.assertIsNone(span)
+        self.assertEqual([], self.hook.spans)
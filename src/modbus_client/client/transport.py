@@ -0,0 +1,115 @@
+from typing import Protocol, Optional, Tuple, Sequence, Dict, List, TypeVar
+
+from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.defaults import DefaultTimeout, DefaultSilentInterval
+from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusTcpClient, PyAsyncModbusRtuClient, \
+    PyAsyncModbusRtuOverTcpClient
+from modbus_client.device.device_config import DeviceConfig
+
+
+class RtuConfigTrait(Protocol):
+    @property
+    def path(self) -> str: ...
+
+    @property
+    def baudrate(self) -> int: ...
+
+
+class TcpConfigTrait(Protocol):
+    @property
+    def host(self) -> str: ...
+
+    @property
+    def port(self) -> int: ...
+
+
+class TransportConfigTrait(Protocol):
+    """
+    A device connected over one of the transports, like devices of the server config or of a system file.
+    """
+
+    @property
+    def name(self) -> str: ...
+
+    @property
+    def rtu(self) -> Optional[RtuConfigTrait]: ...
+
+    @property
+    def tcp(self) -> Optional[TcpConfigTrait]: ...
+
+    @property
+    def rtu_over_tcp(self) -> Optional[TcpConfigTrait]: ...
+
+
+TTransportConfig = TypeVar("TTransportConfig", bound=TransportConfigTrait)
+
+TransportKey = Tuple[str, str, int]
+
+
+def has_transport(device: TransportConfigTrait) -> bool:
+    return device.tcp is not None or device.rtu is not None or device.rtu_over_tcp is not None
+
+
+def get_transport_key(device: TransportConfigTrait) -> TransportKey:
+    if device.tcp is not None:
+        return "tcp", device.tcp.host, device.tcp.port
+    elif device.rtu is not None:
+        return "rtu", device.rtu.path, 0
+    elif device.rtu_over_tcp is not None:
+        return "rtu-over-tcp", device.rtu_over_tcp.host, device.rtu_over_tcp.port
+    else:
+        raise Exception(f"no transport configured for device /{device.name}/")
+
+
+def group_by_transport(devices: Sequence[TTransportConfig]) -> Dict[TransportKey, List[TTransportConfig]]:
+    lines: Dict[TransportKey, List[TTransportConfig]] = {}
+    for device in devices:
+        lines.setdefault(get_transport_key(device), []).append(device)
+    return lines
+
+
+def check_line(devices: Sequence[TransportConfigTrait]) -> None:
+    """
+    Checks that devices on the same line can share a client.
+    """
+    baudrates = {x.rtu.baudrate for x in devices if x.rtu is not None}
+    if len(baudrates) > 1:
+        raise Exception(f"devices on {get_transport_key(devices[0])[1]} use different baudrates")
+
+
+def create_line_client(devices: Sequence[TransportConfigTrait],
+                       device_configs: Sequence[DeviceConfig]) -> AsyncModbusClient:
+    """
+    Creates a client shared by devices on the same line, `device_configs` being their configs. The slowest device on
+    the line determines the timings.
+    """
+    check_line(devices)
+
+    timeout = max(x.default_timeout or DefaultTimeout for x in device_configs)
+    silent_interval = max(x.default_silent_interval or DefaultSilentInterval for x in device_configs)
+
+    device = devices[0]
+    if device.tcp is not None:
+        return PyAsyncModbusTcpClient(host=device.tcp.host, port=device.tcp.port, timeout=timeout,
+                                      silent_interval=silent_interval)
+    elif device.rtu is not None:
+        return PyAsyncModbusRtuClient(path=device.rtu.path, baudrate=device.rtu.baudrate, timeout=timeout,
+                                      silent_interval=silent_interval)
+    elif device.rtu_over_tcp is not None:
+        return PyAsyncModbusRtuOverTcpClient(host=device.rtu_over_tcp.host, port=device.rtu_over_tcp.port,
+                                             timeout=timeout, silent_interval=silent_interval)
+    else:
+        raise Exception(f"no transport configured for device /{device.name}/")
+
+
+__all__ = [
+    "RtuConfigTrait",
+    "TcpConfigTrait",
+    "TransportConfigTrait",
+    "TransportKey",
+    "has_transport",
+    "get_transport_key",
+    "group_by_transport",
+    "check_line",
+    "create_line_client",
+]
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class ModbusRegisterType(Enum):
@@ -8,6 +8,35 @@ class ModbusRegisterType(Enum):
     HoldingRegister = 5
 
 
+class ModbusFunctionCode(IntEnum):
+    ReadCoils = 0x01
+    ReadDiscreteInputs = 0x02
+    ReadHoldingRegisters = 0x03
+    ReadInputRegisters = 0x04
+    WriteSingleCoil = 0x05
+    WriteSingleRegister = 0x06
+    WriteMultipleCoils = 0x0F
+    WriteMultipleRegisters = 0x10
+
+
+class ModbusExceptionCode(IntEnum):
+    IllegalFunction = 0x01
+    IllegalDataAddress = 0x02
+    IllegalDataValue = 0x03
+    SlaveDeviceFailure = 0x04
+    Acknowledge = 0x05
+    SlaveDeviceBusy = 0x06
+    GatewayPathUnavailable = 0x0A
+    GatewayTargetDeviceFailedToRespond = 0x0B
+
+
+# exceptions generated by gateways on behalf of a unit that did not respond
+NoResponseExceptionCodes = (ModbusExceptionCode.GatewayPathUnavailable,
+                            ModbusExceptionCode.GatewayTargetDeviceFailedToRespond)
+
 __all__ = [
     "ModbusRegisterType",
+    "ModbusFunctionCode",
+    "ModbusExceptionCode",
+    "NoResponseExceptionCodes",
 ]
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Union, Sequence, Iterable, Tuple
+
+from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.exceptions import ModbusRequestException
+from modbus_client.client.types import NoResponseExceptionCodes
+from modbus_client.device.device_config import DeviceConfig, load_device_config
+from modbus_client.device.device_config_finder import get_bundled_device_files
+from modbus_client.device.modbus_device import create_modbus_register
+from modbus_client.device.registers.device_register import IDeviceRegister
+from modbus_client.registers.read_session import ModbusReadSession
+from modbus_client.registers.registers import EnumRegister
+
+logger = logging.getLogger("bus_scanner")
+
+ProbeAddress = 0
+# fingerprinting reads are kept short, so they fit in the probe timeout too
+FingerprintMaxReadSize = 16
+FingerprintMaxRegisters = 8
+# device processing time and USB adapter latency, on top of the transmission time
+ProbeProcessingTime = 0.1
+NetworkProbeTimeout = 0.5
+
+
+@dataclass
+class ScanResult:
+    client: AsyncModbusClient
+    unit: int
+    response_time: float
+    # the unit responded with an exception to the probe, which still proves it's present
+    exception_code: Optional[int] = None
+    # names of matching device files, best matches first, if fingerprinting was requested
+    devices: List[str] = field(default_factory=list)
+
+
+def get_probe_timeout(baudrate: Optional[int] = None) -> float:
+    """
+    Returns a timeout just long enough for a device to answer a probe at the given baud rate (None for network
+    transports), as the full default timeout would be paid for every missing unit.
+    """
+    if baudrate is None:
+        return NetworkProbeTimeout
+
+    # 11 bits per character, request and response of a FingerprintMaxReadSize read including inter-frame gaps
+    chars_count = 8 + 5 + 2 * FingerprintMaxReadSize + 2 * 3.5
+    return chars_count * 11 / baudrate + ProbeProcessingTime
+
+
+def load_bundled_device_configs() -> Dict[str, DeviceConfig]:
+    return {os.path.splitext(os.path.basename(x))[0]: load_device_config(x) for x in get_bundled_device_files()}
+
+
+async def probe_unit(client: AsyncModbusClient, unit: int) -> Optional[ScanResult]:
+    """
+    Sends a cheap request to the unit, returns None if it didn't respond.
+    """
+    start = time.perf_counter()
+    try:
+        await client.read_holding_registers(unit, ProbeAddress, 1)
+    except ModbusRequestException as e:
+        if e.exception_code is None or e.exception_code in NoResponseExceptionCodes:
+            return None
+        return ScanResult(client, unit, time.perf_counter() - start, exception_code=e.exception_code)
+    return ScanResult(client, unit, time.perf_counter() - start)
+
+
+def get_fingerprint_registers(device_config: DeviceConfig) -> List[IDeviceRegister]:
+    # enums are the most telling, as their values are checked against the definition
+    registers = sorted(device_config.get_all_registers(),
+                       key=lambda x: (x.enum is None, not x.static, x.address))
+    return registers[:FingerprintMaxRegisters]
+
+
+async def fingerprint_unit(client: AsyncModbusClient, unit: int, device_configs: Dict[str, DeviceConfig]) -> List[str]:
+    """
+    Returns names of device configs whose characteristic registers are all readable on the unit, and whose enum
+    registers hold defined values, ordered by the number of registers checked.
+    """
+    matches: List[Tuple[int, str]] = []
+    for name, device_config in device_configs.items():
+        registers = get_fingerprint_registers(device_config)
+        if len(registers) == 0:
+            continue
+
+        modbus_registers = [create_modbus_register(device_config, x) for x in registers]
+        plan = ModbusReadSession.plan(modbus_registers, allow_holes=False,
+                                      max_read_size=min(FingerprintMaxReadSize, device_config.max_read_size))
+        try:
+            read_session = await ModbusReadSession.execute_plan(client, unit, plan)
+        except ModbusRequestException:
+            continue
+
+        enums_valid = all(x.get_value_from_read_session(read_session).enum_name is not None
+                          for x in modbus_registers if isinstance(x, EnumRegister))
+        if enums_valid:
+            matches.append((len(registers), name))
+
+    return [name for _, name in sorted(matches, key=lambda x: (-x[0], x[1]))]
+
+
+async def scan_bus(client: AsyncModbusClient, units: Iterable[int] = range(1, 248),
+                   device_configs: Optional[Dict[str, DeviceConfig]] = None) -> List[ScanResult]:
+    """
+    Probes units one by one, as requests on a bus can't overlap. Responders are fingerprinted against
+    `device_configs`, if given.
+    """
+    results = []
+    for unit in units:
+        result = await probe_unit(client, unit)
+        if result is None:
+            continue
+        if device_configs is not None:
+            result.devices = await fingerprint_unit(client, unit, device_configs)
+        results.append(result)
+    return results
+
+
+async def scan(client: Union[AsyncModbusClient, Sequence[AsyncModbusClient]], units: Iterable[int] = range(1, 248),
+               fingerprint: bool = False) -> List[ScanResult]:
+    """
+    Finds units responding on the buses behind the given clients. Clients should be created with a short timeout
+    (see `get_probe_timeout`). Each bus is scanned sequentially, different clients (e.g. TCP gateways of separate
+    buses) are scanned concurrently. With `fingerprint`, responders are matched against the bundled device files.
+    A bus whose connection fails is skipped with a warning.
+    """
+    clients = [client] if isinstance(client, AsyncModbusClient) else list(client)
+    units = list(units)
+    device_configs = load_bundled_device_configs() if fingerprint else None
+
+    async def scan_client(scanned_client: AsyncModbusClient) -> List[ScanResult]:
+        # a broken connection ends the scan of its bus only
+        try:
+            return await scan_bus(scanned_client, units, device_configs)
+        except Exception as e:
+            logger.warning(f"scan of {scanned_client.get_endpoint()} failed: {e}")
+            return []
+
+    buses_results = await asyncio.gather(*[scan_client(x) for x in clients])
+    return [result for bus_results in buses_results for result in bus_results]
+
+
+__all__ = [
+    "ScanResult",
+    "get_probe_timeout",
+    "load_bundled_device_configs",
+    "probe_unit",
+    "fingerprint_unit",
+    "scan_bus",
+    "scan",
+]
@@ -0,0 +1,53 @@
+import unittest
+from typing import List, Dict
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.types import ModbusExceptionCode
+from modbus_client.device.bus_scanner import scan, get_probe_timeout
+
+
+class BusMockModbusClient(MockModbusClient):
+    def __init__(self, units: Dict[int, int]) -> None:
+        super().__init__(input_registers={1: 215, 2: 480}, holding_registers={0x101: 1, 0x102: 0, 0x103: 0, 0x104: 0})
+        # unit -> exception code sent for unknown addresses, 0x0B means the gateway got no response
+        self.units = units
+
+    async def _read_unit(self, unit: int, registers: Dict[int, int], address: int, count: int) -> List[int]:
+        if unit not in self.units:
+            raise ReadErrorException("no response", timeout=True)
+        if any(x not in registers for x in range(address, address + count)):
+            raise ReadErrorException("exception", exception_code=self.units[unit])
+        return [registers[x] for x in range(address, address + count)]
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        return await self._read_unit(unit, self.input_registers, address, count)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        return await self._read_unit(unit, self.holding_registers, address, count)
+
+
+class BusScannerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_scan(self) -> None:
+        client = BusMockModbusClient({3: ModbusExceptionCode.IllegalDataAddress,
+                                      7: ModbusExceptionCode.GatewayTargetDeviceFailedToRespond})
+
+        results = await scan(client, units=range(1, 11))
+
+        self.assertEqual([3], [x.unit for x in results])
+        self.assertEqual(ModbusExceptionCode.IllegalDataAddress, results[0].exception_code)
+        self.assertEqual([], results[0].devices)
+
+    async def test_scan_fingerprint(self) -> None:
+        clients = [BusMockModbusClient({1: ModbusExceptionCode.IllegalDataAddress}),
+                   BusMockModbusClient({2: ModbusExceptionCode.IllegalDataAddress})]
+
+        results = await scan(clients, units=[1, 2], fingerprint=True)
+
+        self.assertEqual([(clients[0], 1), (clients[1], 2)], [(x.client, x.unit) for x in results])
+        self.assertIn("XY-MD02", results[0].devices)
+        self.assertNotIn("DDS238", results[0].devices)
+
+    def test_probe_timeout(self) -> None:
+        self.assertLess(get_probe_timeout(9600), 0.2)
+        self.assertLess(get_probe_timeout(115200), get_probe_timeout(9600))
@@ -0,0 +1,170 @@
+import hashlib
+import importlib.util
+import os
+from typing import Callable, Dict, Union, List, Optional, cast
+
+from pydantic import TypeAdapter
+
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.device.device_config import DeviceConfig
+from modbus_client.device.modbus_device import create_modbus_register
+from modbus_client.registers.read_session import WordsMap, WordKey
+from modbus_client.registers.registers import EnumValue, FlagsCollection, IRegister, BoolRegister, EnumRegister, \
+    FlagsRegister, StringRegister, NumericRegister
+from modbus_client.registers.type_converters import get_type_converter
+
+# bump when the generated code changes, so decoders cached on disk are regenerated
+GeneratorVersion = 3
+
+DeviceDecoder = Callable[[WordsMap], Dict[str, Union[int, float, EnumValue, FlagsCollection, str]]]
+
+SignedFormats = {"h", "i", "q"}
+
+
+class _DecoderGenerator:
+    def __init__(self, device_config: DeviceConfig) -> None:
+        self.registers = [create_modbus_register(device_config, x) for x in device_config.get_all_registers()]
+        self.constants: List[str] = []
+        self.loads: List[str] = []
+        self.word_vars: Dict[WordKey, str] = {}
+
+    def generate(self) -> str:
+        body: List[str] = []
+        last_condition = None
+        for i, register in enumerate(self.registers):
+            words = [self._word(register.reg_type, register.address + j) for j in range(register.get_count())]
+            # consecutive registers of the same words (e.g. bitfields) share the check
+            condition = f"    if {' and '.join(f'{x} is not None' for x in words)}:"
+            if condition != last_condition:
+                body.append(condition)
+                last_condition = condition
+            body.append(f"        values[{register.name!r}] = {self._value_expr(i, register, words)}")
+
+        lines = [
+            "# generated by modbus_client.device.decoder_compiler, do not edit",
+            "import struct",
+            "",
+            "from modbus_client.client.types import ModbusRegisterType",
+            "from modbus_client.registers.bitfield import Bitfield",
+            "from modbus_client.registers.registers import EnumValue, FlagValue, FlagsCollection",
+            "",
+            "_U32 = struct.Struct('<I')",
+            "_F32 = struct.Struct('<f')",
+            *self.constants,
+            "",
+            "",
+            "def decode(words):",
+            "    get = words.get",
+            *self.loads,
+            "    values = {}",
+            *body,
+            "    return values",
+            "",
+        ]
+        return "\n".join(lines)
+
+    def _word(self, reg_type: ModbusRegisterType, address: int) -> str:
+        key = (reg_type, address)
+        var = self.word_vars.get(key)
+        if var is None:
+            var = f"w{len(self.word_vars)}"
+            self.word_vars[key] = var
+            self.constants.append(f"_K_{var} = (ModbusRegisterType.{key[0].name}, {address})")
+            self.loads.append(f"    {var} = get(_K_{var})")
+        return var
+
+    def _raw_expr(self, i: int, register: IRegister, words: List[str]) -> str:
+        converter = get_type_converter(register.value_type)
+        ordered = list(reversed(words)) if converter.reverse_bytes else words
+
+        if register.bitfield is not None:
+            bitfield = register.bitfield
+            if not bitfield.is_contiguous():
+                self.constants.append(f"_BF{i} = Bitfield({bitfield.bits!r})")
+                return f"_BF{i}.extract({words[0]})"
+            shifted = f"({words[0]} >> {bitfield.shift})" if bitfield.shift > 0 else words[0]
+            return f"({shifted} & {bitfield.mask:#x})"
+
+        unsigned = " | ".join(f"({x} << {16 * j})" if j > 0 else x for j, x in enumerate(ordered))
+        if converter.format_str in SignedFormats:
+            sign = 1 << (16 * len(words) - 1)
+            return f"((({unsigned}) ^ {sign:#x}) - {sign:#x})"
+        elif converter.format_str == "f":
+            return f"_F32.unpack(_U32.pack({unsigned}))[0]"
+        else:
+            return f"({unsigned})" if len(words) > 1 else unsigned
+
+    def _value_expr(self, i: int, register: IRegister, words: List[str]) -> str:
+        if isinstance(register, BoolRegister):
+            return f"{self._raw_expr(i, register, words)} != 0"
+        elif isinstance(register, EnumRegister):
+            enum_values = ", ".join(f"{x.value}: EnumValue({x.name!r}, {x.value}, {x.display!r})"
+                                    for x in register.enum_by_value.values())
+            self.constants.append(f"_E{i} = {{{enum_values}}}")
+            return f"_E{i}.get(raw := {self._raw_expr(i, register, words)}) or EnumValue(None, raw, None)"
+        elif isinstance(register, FlagsRegister):
+            flag_values = ", ".join(
+                    f"{bit}: FlagValue({x.name!r}, {bit}, {x.display!r})" if x is not None
+                    else f"{bit}: FlagValue(None, {bit}, None)"
+                    for bit, x in ((bit, register.bit_to_flag.get(bit)) for bit in range(16)))
+            self.constants.append(f"_F{i} = {{{flag_values}}}")
+            return f"FlagsCollection.from_mask({self._raw_expr(i, register, words)}, _F{i})"
+        elif isinstance(register, StringRegister):
+            self.constants.append(f"_S{i} = struct.Struct('>{len(words)}H')")
+            return f"_S{i}.pack({', '.join(words)}).split(b'\\x00', 1)[0].decode('ascii')"
+        elif isinstance(register, NumericRegister):
+            raw = self._raw_expr(i, register, words)
+            if isinstance(register.scale, int) and register.scale == 1:
+                return raw
+            return f"{raw} * {register.scale!r}"
+        else:
+            raise ValueError(f"unsupported register type {type(register)}")
+
+
+def generate_decoder_source(device_config: DeviceConfig) -> str:
+    """
+    Generates a module with a `decode(words)` function decoding all registers of the device from a words map (as in
+    `ModbusReadSession.registers_dict`), with word keys, struct formats, scales and bit masks inlined. Registers with
+    missing words are left out of the result.
+    """
+    return _DecoderGenerator(device_config).generate()
+
+
+def get_decoder_key(device_config: DeviceConfig) -> str:
+    config_json = TypeAdapter(DeviceConfig).dump_json(device_config)
+    return hashlib.sha256(f"{GeneratorVersion}:".encode("ascii") + config_json).hexdigest()[:16]
+
+
+def compile_decoder(device_config: DeviceConfig, cache_dir: Optional[str] = None) -> DeviceDecoder:
+    """
+    Returns a decoder specialized for the device, equivalent to decoding each register with its `IRegister`. Given
+    `cache_dir`, the generated module is stored there (named by a hash of the device config) and imported, so it is
+    only generated once and its bytecode is cached by Python.
+    """
+    if cache_dir is None:
+        namespace: Dict[str, object] = {}
+        exec(compile(generate_decoder_source(device_config), "<decoder>", "exec"), namespace)
+        return cast(DeviceDecoder, namespace["decode"])
+
+    key = get_decoder_key(device_config)
+    path = os.path.join(cache_dir, f"decoder_{key}.py")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wt") as f:
+            f.write(generate_decoder_source(device_config))
+        os.replace(tmp_path, path)
+
+    spec = importlib.util.spec_from_file_location(f"modbus_client_decoder_{key}", path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return cast(DeviceDecoder, module.decode)
+
+
+__all__ = [
+    "DeviceDecoder",
+    "generate_decoder_source",
+    "get_decoder_key",
+    "compile_decoder",
+]
@@ -0,0 +1,115 @@
+import os
+import random
+import tempfile
+import unittest
+
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.device.decoder_compiler import compile_decoder, get_decoder_key
+from modbus_client.device.modbus_device import ModbusDeviceFactory, create_modbus_register
+from modbus_client.registers.read_session import ModbusReadSession
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+    - current/0x0002/int16*0.01[A]
+    - energy/0x0003/uint32be[Wh]
+    - energy_le/0x0005/uint32le*10[Wh]
+    - power/0x0007/int32be[W]
+    - total/0x0009/uint64le
+    - offset/0x000d/int64be
+    - frequency/0x0011/float32be
+    - temperature/0x0013/float32le*1.0
+    - serial/0x0015/string,words=3,readonly
+
+  holding_registers:
+    - pulse_enabled   / 0x0010 / bool,bit=15
+    - baudrate        / 0x0010 / uint16,bits=10:8
+    - slave_id        / 0x0010 / uint16,bits=7:0
+    - name: parity
+      address: 0x0010
+      type: enum
+      bits: "12:11"
+      enum:
+        - { name: none, value: 0 }
+        - { name: odd, value: 1, display: Odd parity }
+    - name: mode
+      address: 0x0011
+      type: enum
+      enum:
+        - { name: idle, value: 0 }
+        - { name: run, value: 1 }
+    - name: status
+      address: 0x0012
+      type: flags
+      readonly: true
+      flags:
+        - alarm/1
+        - { name: run, bit: 4, display: Running }
+    - raw/0x0012/int16
+"""
+
+
+class DecoderCompilerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.device_config = ModbusDeviceFactory.from_config(config).get_device_config()
+        self.registers = [create_modbus_register(self.device_config, x)
+                          for x in self.device_config.get_all_registers()]
+
+    def random_session(self, rnd: random.Random) -> ModbusReadSession:
+        read_session = ModbusReadSession()
+        for address in range(0x01, 0x18):
+            read_session.registers_dict[(ModbusRegisterType.InputRegister, address)] = rnd.choice(
+                    [0, 1, 0x7fff, 0x8000, 0xffff, rnd.randrange(0x10000)])
+        for address in range(0x10, 0x13):
+            read_session.registers_dict[(ModbusRegisterType.HoldingRegister, address)] = rnd.randrange(0x10000)
+        # printable characters, as strings are decoded as ASCII
+        for address in range(0x15, 0x18):
+            read_session.registers_dict[(ModbusRegisterType.InputRegister, address)] = \
+                rnd.randrange(0x20, 0x7f) << 8 | rnd.choice([0, rnd.randrange(0x20, 0x7f)])
+        return read_session
+
+    def assertDecodedEqual(self, expected: object, actual: object) -> None:
+        if isinstance(expected, float) and expected != expected:
+            self.assertTrue(isinstance(actual, float) and actual != actual)
+        else:
+            self.assertEqual(type(expected), type(actual))
+            self.assertEqual(expected, actual)
+
+    def test_equivalent_to_registers(self) -> None:
+        decode = compile_decoder(self.device_config)
+        rnd = random.Random(0)
+
+        for _ in range(500):
+            read_session = self.random_session(rnd)
+            values = decode(read_session.registers_dict)
+
+            self.assertEqual([x.name for x in self.registers], list(values))
+            for register in self.registers:
+                self.assertDecodedEqual(register.get_value_from_read_session(read_session), values[register.name])
+
+    def test_missing_words(self) -> None:
+        decode = compile_decoder(self.device_config)
+        read_session = self.random_session(random.Random(1))
+        del read_session.registers_dict[(ModbusRegisterType.InputRegister, 0x04)]
+        del read_session.registers_dict[(ModbusRegisterType.HoldingRegister, 0x10)]
+
+        values = decode(read_session.registers_dict)
+
+        self.assertEqual({"energy", "pulse_enabled", "baudrate", "slave_id", "parity"},
+                         {x.name for x in self.registers} - set(values))
+
+    def test_disk_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            decode = compile_decoder(self.device_config, cache_dir)
+            path = os.path.join(cache_dir, f"decoder_{get_decoder_key(self.device_config)}.py")
+            self.assertTrue(os.path.exists(path))
+            mtime = os.stat(path).st_mtime_ns
+
+            words = {(reg_type, address): 0x4142 for reg_type in (ModbusRegisterType.InputRegister,
+                                                                  ModbusRegisterType.HoldingRegister)
+                     for address in range(0x01, 0x18)}
+            self.assertEqual(decode(words), compile_decoder(self.device_config, cache_dir)(words))
+            self.assertEqual(mtime, os.stat(path).st_mtime_ns)
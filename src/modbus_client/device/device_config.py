@@ -1,4 +1,5 @@
 import io
+import os
 from dataclasses import field
 from typing import List, Optional
 
@@ -19,6 +20,8 @@ class DeviceConfig:
     max_read_size: int = DefaultMaxReadSize
     default_timeout: float | None = None
     default_silent_interval: float | None = None
+    # readable ranges file (see `load_readable_ranges`), relative to the device file
+    readable_ranges: Optional[str] = None
 
     def find_register(self, name: str) -> Optional[IDeviceRegister]:
         for reg in self.get_all_registers():
@@ -41,4 +44,7 @@ def load_device_config_from_yaml(config: str) -> DeviceConfig:
 
 
 def load_device_config(path: str) -> DeviceConfig:
-    return DeviceConfig(**yaml.load(open(path, "rt"), Loader=yaml.SafeLoader))
+    device_config = DeviceConfig(**yaml.load(open(path, "rt"), Loader=yaml.SafeLoader))
+    if device_config.readable_ranges is not None:
+        device_config.readable_ranges = os.path.join(os.path.dirname(path), device_config.readable_ranges)
+    return device_config
@@ -1,4 +1,5 @@
 import os
+from typing import List
 
 script_dir = os.path.dirname(os.path.realpath(__file__))
 root_dir = os.path.join(script_dir, "../../..")
@@ -20,3 +21,11 @@ def find_device_file(name: str) -> str:
             return full_path
 
     raise Exception("config file not found")
+
+
+def get_bundled_device_files() -> List[str]:
+    """
+    Returns paths of device files shipped with the package.
+    """
+    devices_path = os.path.join(script_dir, "devices")
+    return sorted(os.path.join(devices_path, x) for x in os.listdir(devices_path) if x.endswith(".yaml"))
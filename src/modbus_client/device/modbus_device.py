@@ -1,12 +1,20 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
 from collections.abc import Sequence
-from typing import Union, Dict
+from dataclasses import dataclass, field
+from typing import Union, Dict, Optional, Tuple, List, Any, cast
 
 from modbus_client.client.async_modbus_client import AsyncModbusClient
 from modbus_client.device.registers.device_register import DeviceInputRegister, DeviceHoldingRegister, SwitchRegisterTypeEnum, \
     IDeviceRegister, DeviceSwitch
 from modbus_client.device.registers.enum_definition import EnumDefinition
 from modbus_client.device.registers.register_type import RegisterType
-from modbus_client.registers.read_session import ModbusReadSession
+from modbus_client.registers.address_map import AddressMap, load_readable_ranges
+from modbus_client.registers.read_session import ModbusReadSession, WordKey, RegisterValue, get_register_words, ReadPlan
 from modbus_client.registers.register_value_type import RegisterValueType
 from modbus_client.registers.registers import NumericRegister, Coil, IRegister, EnumValue, EnumRegister, BoolRegister, FlagsRegister, \
     FlagsCollection, StringRegister
@@ -14,6 +22,8 @@ from modbus_client.client.types import ModbusRegisterType
 from modbus_client.device.device_config import DeviceConfig, load_device_config, load_device_config_from_yaml
 from modbus_client.device.device_config_finder import find_device_file
 
+logger = logging.getLogger("modbus_device")
+
 
 def create_modbus_register(device: DeviceConfig, register: IDeviceRegister) -> Union[
     NumericRegister, EnumRegister, BoolRegister, FlagsRegister, StringRegister]:
@@ -63,12 +73,25 @@ def create_modbus_coil(device: DeviceConfig, register: DeviceSwitch) -> Coil:
     return Coil(name=register.name, reg_type=reg_type, number=number)
 
 
+def create_address_map(device: DeviceConfig) -> AddressMap:
+    if device.readable_ranges is None:
+        return AddressMap()
+    return AddressMap(readable=load_readable_ranges(device.readable_ranges))
+
+
 class ModbusDeviceFactory:
     def __init__(self, device_config: DeviceConfig):
         self._device_config = device_config
+        self._address_map = create_address_map(device_config)
+
+    def get_device_config(self) -> DeviceConfig:
+        return self._device_config
+
+    def get_address_map(self) -> AddressMap:
+        return self._address_map
 
     def create_device(self, unit: int) -> 'ModbusDevice':
-        return ModbusDevice(self._device_config, unit)
+        return ModbusDevice(self._device_config, unit, address_map=self._address_map)
 
     @staticmethod
     def from_file(path: str) -> 'ModbusDeviceFactory':
@@ -82,9 +105,23 @@ class ModbusDeviceFactory:
 
 
 class ModbusDevice:
-    def __init__(self, device_config: DeviceConfig, unit: int):
+    """
+    Values read by `read_register` and `read_registers` are cached per word. Given `max_age` (or the register's `ttl`
+    from the device config if `max_age` is None), registers read within last `max_age` seconds are served from the cache
+    and only the stale ones are read. Words written by `write_register` are updated in the cache, so all registers
+    sharing them (e.g. bitfields of one word) see the new value. Registers marked `static` in the device config (serial
+    numbers, firmware versions, ...) are read once and then served from the cache for the lifetime of the object,
+    regardless of reconnections of the client, until `invalidate_cache` is called (e.g. when a different device may
+    have been connected) or an explicit `max_age` is given. With `set_static_cache_file`, static values are also
+    persisted, so they are not read again after a restart.
+    """
+
+    def __init__(self, device_config: DeviceConfig, unit: int, address_map: Optional[AddressMap] = None):
         self._device_config = device_config
         self._unit = unit
+        self._address_map = create_address_map(device_config) if address_map is None else address_map
+        self._words_cache: Dict[WordKey, Tuple[RegisterValue, float]] = {}
+        self._static_cache_file: Optional[str] = None
 
     def get_device_config(self) -> DeviceConfig:
         return self._device_config
@@ -92,6 +129,9 @@ class ModbusDevice:
     def get_unit(self) -> int:
         return self._unit
 
+    def get_address_map(self) -> AddressMap:
+        return self._address_map
+
     def get_register(self, name: str) -> IDeviceRegister:
         reg = self._device_config.find_register(name)
         if reg is None:
@@ -120,29 +160,167 @@ class ModbusDevice:
         else:
             raise Exception("Invalid switch type")
 
-    async def read_register(self, client: AsyncModbusClient, register: Union[str, IDeviceRegister]) \
-            -> Union[int, float, EnumValue, FlagsCollection, str]:
+    def invalidate_cache(self) -> None:
+        self._words_cache.clear()
+
+    def set_static_cache_file(self, path: Optional[str]) -> None:
+        """
+        Loads values of static registers from `path` if it exists and saves them there whenever they are read.
+        Entries not matching the current device config (e.g. a register was moved) are ignored. A file of a different
+        unit is neither loaded nor overwritten.
+        """
+        self._static_cache_file = path
+        if path is None or not os.path.exists(path):
+            return
+
+        with open(path, "rt") as f:
+            data = json.load(f)
+        if data.get("unit") != self._unit:
+            logger.warning(f"static cache {path} belongs to unit {data.get('unit')}, not {self._unit}, not using it")
+            self._static_cache_file = None
+            return
+
+        now = time.monotonic()
+        entries: Dict[str, Any] = data.get("registers", {})
+        for register in self._device_config.get_all_registers():
+            entry = entries.get(register.name)
+            if not register.static or entry is None:
+                continue
+            modbus_register = self.create_modbus_register(register)
+            words = entry.get("words", [])
+            if entry.get("reg_type") != modbus_register.reg_type.name or entry.get("address") != modbus_register.address \
+                    or len(words) != modbus_register.get_count():
+                continue
+            for i, word_value in enumerate(words):
+                self._words_cache[(modbus_register.reg_type, modbus_register.address + i)] = (int(word_value), now)
+
+    def _save_static_cache(self) -> None:
+        if self._static_cache_file is None:
+            return
+
+        entries: Dict[str, Any] = {}
+        for register in self._device_config.get_all_registers():
+            if not register.static:
+                continue
+            modbus_register = self.create_modbus_register(register)
+            words = [self._words_cache.get((modbus_register.reg_type, modbus_register.address + i))
+                     for i in range(modbus_register.get_count())]
+            if any(x is None for x in words):
+                continue
+            entries[register.name] = {
+                "reg_type": modbus_register.reg_type.name,
+                "address": modbus_register.address,
+                "words": [int(x[0]) for x in words if x is not None],
+            }
+
+        tmp_path = f"{self._static_cache_file}.tmp"
+        with open(tmp_path, "wt") as f:
+            json.dump({"unit": self._unit, "registers": entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._static_cache_file)
+
+    def _is_cached(self, modbus_register: IRegister, max_age: float, now: float) -> bool:
+        if max_age <= 0:
+            return False
+        for word in get_register_words(modbus_register):
+            entry = self._words_cache.get(word)
+            if entry is None or now - entry[1] > max_age:
+                return False
+        return True
+
+    def store_words(self, read_session: ModbusReadSession) -> None:
+        """
+        Updates the words cache with words read outside of this device, e.g. by `read_many`.
+        """
+        now = time.monotonic()
+        for word, value in read_session.registers_dict.items():
+            self._words_cache[word] = (value, now)
+
+    async def _read_modbus_registers(self, client: AsyncModbusClient, registers: Sequence[IDeviceRegister],
+                                     modbus_registers: Sequence[IRegister],
+                                     max_age: Optional[float], partial: bool = False) -> ModbusReadSession:
+        now = time.monotonic()
+
+        read_session = ModbusReadSession()
+        stale_registers: List[IRegister] = []
+        any_static_stale = False
+        for register, modbus_register in zip(registers, modbus_registers):
+            if max_age is not None:
+                register_max_age = max_age
+            elif register.static:
+                register_max_age = math.inf
+            else:
+                register_max_age = register.ttl or 0
+            if self._is_cached(modbus_register, register_max_age, now):
+                for word in get_register_words(modbus_register):
+                    read_session.registers_dict[word] = self._words_cache[word][0]
+            else:
+                stale_registers.append(modbus_register)
+                any_static_stale = any_static_stale or register.static
+
+        if len(stale_registers) > 0:
+            stale_session = await ModbusReadSession.read_registers(client=client,
+                                                                   unit=self._unit,
+                                                                   registers=stale_registers,
+                                                                   allow_holes=self._device_config.allow_holes,
+                                                                   max_read_size=self._device_config.max_read_size,
+                                                                   address_map=self._address_map,
+                                                                   partial=partial)
+            self.store_words(stale_session)
+            read_session.registers_dict.update(stale_session.registers_dict)
+            read_session.bucket_errors.extend(stale_session.bucket_errors)
+
+            if any_static_stale:
+                self._save_static_cache()
+
+        return read_session
+
+    async def read_session(self, client: AsyncModbusClient, registers: Sequence[Union[str, IDeviceRegister]],
+                           max_age: Optional[float] = None, partial: bool = False) -> ModbusReadSession:
+        """
+        Like `read_registers`, but returns the raw words instead of decoded values. With `partial`, failed buckets are
+        recorded in the session's `bucket_errors` instead of failing the read.
+        """
+        device_registers = [self.get_register(x) if isinstance(x, str) else x for x in registers]
+        modbus_registers = [self.create_modbus_register(x) for x in device_registers]
+        return await self._read_modbus_registers(client, device_registers, modbus_registers, max_age, partial)
+
+    async def read_register(self, client: AsyncModbusClient, register: Union[str, IDeviceRegister],
+                            max_age: Optional[float] = None) -> Union[int, float, EnumValue, FlagsCollection, str]:
+        if isinstance(register, str):
+            register = self.get_register(register)
         modbus_register = self.create_modbus_register(register)
 
-        read_session = await ModbusReadSession.read_registers(client=client,
-                                                              unit=self._unit,
-                                                              registers=[modbus_register],
-                                                              allow_holes=self._device_config.allow_holes,
-                                                              max_read_size=self._device_config.max_read_size)
+        with client.span("device.read_registers", self._unit, registers=1):
+            read_session = await self._read_modbus_registers(client, [register], [modbus_register], max_age)
 
-        return modbus_register.get_value_from_read_session(read_session)
+            with client.span("device.decode", self._unit, registers=1):
+                return modbus_register.get_value_from_read_session(read_session)
 
-    async def read_registers(self, client: AsyncModbusClient, registers: Sequence[Union[str, IDeviceRegister]]) \
+    async def read_registers(self, client: AsyncModbusClient, registers: Sequence[Union[str, IDeviceRegister]],
+                             max_age: Optional[float] = None,
+                             errors: Optional[Dict[str, Exception]] = None) \
             -> Dict[str, Union[int, float, EnumValue, FlagsCollection, str]]:
-        modbus_registers = [self.create_modbus_register(x) for x in registers]
-
-        read_session = await ModbusReadSession.read_registers(client=client,
-                                                              unit=self._unit,
-                                                              registers=modbus_registers,
-                                                              allow_holes=self._device_config.allow_holes,
-                                                              max_read_size=self._device_config.max_read_size)
-
-        return {x.name: x.get_value_from_read_session(read_session) for x in modbus_registers}
+        """
+        Reads and decodes given registers. Given an `errors` dict, a failed read request doesn't fail the whole read:
+        registers read by other requests are returned, and the failed ones are left out and their errors are stored
+        in `errors`.
+        """
+        with client.span("device.read_registers", self._unit, registers=len(registers)):
+            device_registers = [self.get_register(x) if isinstance(x, str) else x for x in registers]
+            modbus_registers = [self.create_modbus_register(x) for x in device_registers]
+
+            read_session = await self._read_modbus_registers(client, device_registers, modbus_registers, max_age,
+                                                             partial=errors is not None)
+
+            with client.span("device.decode", self._unit, registers=len(modbus_registers)):
+                values = {}
+                for modbus_register in modbus_registers:
+                    error = read_session.get_register_error(modbus_register)
+                    if error is not None and errors is not None:
+                        errors[modbus_register.name] = error
+                    else:
+                        values[modbus_register.name] = modbus_register.get_value_from_read_session(read_session)
+                return values
 
     async def write_register(self, client: AsyncModbusClient, register: Union[str, IDeviceRegister],
                              value: Union[float, int, str, EnumDefinition]) -> None:
@@ -165,16 +343,32 @@ class ModbusDevice:
 
         modbus_register = self.create_modbus_register(register)
 
-        ses = ModbusReadSession()
-        if modbus_register.requires_existing_reading():
-            ses = await ModbusReadSession.read_registers(client=client, unit=self._unit, registers=[modbus_register])
+        with client.span("device.write_register", self._unit, register=register.name, value=value):
+            ses = ModbusReadSession()
+            if modbus_register.requires_existing_reading():
+                # read-modify-write always starts from the current device state
+                ses = await ModbusReadSession.read_registers(client=client, unit=self._unit, registers=[modbus_register])
+                self.store_words(ses)
 
-        modbus_values = modbus_register.value_to_modbus_registers(value, ses)
+            modbus_values = modbus_register.value_to_modbus_registers(value, ses)
 
-        if self._device_config.force_multiple_write or len(modbus_values) > 1:
-            await client.write_holding_registers(unit=self._unit, address=modbus_register.address, values=modbus_values)
-        else:
-            await client.write_holding_register(unit=self._unit, address=modbus_register.address, value=modbus_values[0])
+            try:
+                if self._device_config.force_multiple_write or len(modbus_values) > 1:
+                    await client.write_holding_registers(unit=self._unit, address=modbus_register.address, values=modbus_values)
+                else:
+                    await client.write_holding_register(unit=self._unit, address=modbus_register.address, value=modbus_values[0])
+            except BaseException:
+                # the device state is unknown after a failed or cancelled write
+                for i in range(len(modbus_values)):
+                    self._words_cache.pop((modbus_register.reg_type, modbus_register.address + i), None)
+                raise
+
+            now = time.monotonic()
+            for i, word_value in enumerate(modbus_values):
+                self._words_cache[(modbus_register.reg_type, modbus_register.address + i)] = (word_value, now)
+
+            if register.static:
+                self._save_static_cache()
 
     async def read_switch(self, client: AsyncModbusClient, switch: Union[str, DeviceSwitch]) -> bool:
         modbus_register = self.create_modbus_switch(switch)
@@ -192,3 +386,91 @@ class ModbusDevice:
     async def switch_toggle(self, client: AsyncModbusClient, switch: Union[str, DeviceSwitch]) -> None:
         current_value = await self.read_switch(client, switch)
         await self.switch_set(client, switch, not current_value)
+
+
+DeviceReadRequest = Tuple[ModbusDevice, Sequence[Union[str, IDeviceRegister]]]
+# a request read through its own client, e.g. a unit behind a specific gateway
+BoundDeviceReadRequest = Tuple[AsyncModbusClient, ModbusDevice, Sequence[Union[str, IDeviceRegister]]]
+
+
+@dataclass
+class UnitReadResult:
+    device: ModbusDevice
+    values: Dict[str, Union[int, float, EnumValue, FlagsCollection, str]] = field(default_factory=dict)
+    error: Optional[Exception] = None
+
+
+async def read_many(client: Union[AsyncModbusClient, Sequence[AsyncModbusClient], None],
+                    requests: Sequence[Union[DeviceReadRequest, BoundDeviceReadRequest]]) -> List[UnitReadResult]:
+    """
+    Reads registers of many units, e.g. the same registers of all meters on a bus. Requests for devices created by the
+    same factory share one read plan. Units are read one after another in the order of their unit numbers, all
+    requests of a unit back to back.
+
+    `(device, registers)` requests are read through `client`. Given several clients, they must be connections to the
+    same bus (e.g. several TCP connections to one gateway): units are read concurrently, each by whichever client is
+    free. `(client, device, registers)` requests are read through their own client, so units on different buses can be
+    read in one call; each client reads one unit at a time, different clients concurrently.
+
+    A failure of a unit is reported in its result and doesn't affect the others. Results are returned in the order of
+    `requests`. The device caches are not consulted, but they are updated with the read values.
+    """
+    shared_clients = [] if client is None else [client] if isinstance(client, AsyncModbusClient) else list(client)
+
+    # each request is read by a client taken from its pool
+    pools: Dict[int, asyncio.Queue[AsyncModbusClient]] = {}
+    shared_pool: asyncio.Queue[AsyncModbusClient] = asyncio.Queue()
+    for x in shared_clients:
+        shared_pool.put_nowait(x)
+
+    unit_requests: List[Tuple[asyncio.Queue[AsyncModbusClient], ModbusDevice, Sequence[Union[str, IDeviceRegister]]]] = []
+    for request in requests:
+        if len(request) == 3:
+            request_client, device, registers = cast(BoundDeviceReadRequest, request)
+            if id(request_client) not in pools:
+                pools[id(request_client)] = asyncio.Queue()
+                pools[id(request_client)].put_nowait(request_client)
+            unit_requests.append((pools[id(request_client)], device, registers))
+        else:
+            if len(shared_clients) == 0:
+                raise ValueError("at least one client is required")
+            device, registers = cast(DeviceReadRequest, request)
+            unit_requests.append((shared_pool, device, registers))
+
+    plans: Dict[Tuple[int, int, Tuple[str, ...]], Tuple[List[IRegister], ReadPlan]] = {}
+    unit_plans: List[Tuple[List[IRegister], ReadPlan]] = []
+    for _, device, registers in unit_requests:
+        device_config = device.get_device_config()
+        key = (id(device_config), id(device.get_address_map()), tuple(x if isinstance(x, str) else x.name for x in registers))
+        if key not in plans:
+            modbus_registers = [device.create_modbus_register(x) for x in registers]
+            plans[key] = (modbus_registers, ModbusReadSession.plan(modbus_registers,
+                                                                   allow_holes=device_config.allow_holes,
+                                                                   max_read_size=device_config.max_read_size,
+                                                                   address_map=device.get_address_map()))
+        unit_plans.append(plans[key])
+
+    results = [UnitReadResult(device) for _, device, _ in unit_requests]
+
+    async def read_unit(index: int) -> None:
+        result = results[index]
+        unit = result.device.get_unit()
+        modbus_registers, plan = unit_plans[index]
+
+        free_clients = unit_requests[index][0]
+        unit_client = await free_clients.get()
+        try:
+            with unit_client.span("device.read_many", unit, registers=len(modbus_registers)):
+                read_session = await ModbusReadSession.execute_plan(unit_client, unit, plan)
+            result.device.store_words(read_session)
+            result.values = {x.name: x.get_value_from_read_session(read_session) for x in modbus_registers}
+        except Exception as e:
+            result.error = e
+        finally:
+            free_clients.put_nowait(unit_client)
+
+    # waiters of the queue are woken in FIFO order, so units are read in this order
+    order = sorted(range(len(requests)), key=lambda i: results[i].device.get_unit())
+    await asyncio.gather(*[read_unit(i) for i in order])
+
+    return results
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from typing import List, Tuple, Dict
+from unittest import mock
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.types import ModbusExceptionCode
+from modbus_client.device.modbus_device import ModbusDeviceFactory, read_many
+from modbus_client.registers.read_session import ModbusReadSession
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+    - energy/0x0002/uint32be[Wh],ttl=60
+    - serial/0x0004/uint16,static
+
+  holding_registers:
+    - pulse_enabled   / 0x0010 / bool,bit=15
+    - baudrate        / 0x0010 / uint16,bits=10:8
+    - slave_id        / 0x0010 / uint16,bits=7:0
+"""
+
+
+class CountingMockModbusClient(MockModbusClient):
+    def __init__(self) -> None:
+        super().__init__(input_registers={1: 123, 2: 1, 3: 50, 4: 777}, holding_registers={0x10: 0x0301})
+        self.requests: List[Tuple[int, int]] = []
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        return await super().read_input_registers(unit, address, count)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        return await super().read_holding_registers(unit, address, count)
+
+
+class ModbusDeviceCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = CountingMockModbusClient()
+        self.device = ModbusDeviceFactory.from_config(config).create_device(1)
+
+    async def test_no_cache_by_default(self) -> None:
+        await self.device.read_register(self.client, "voltage")
+        await self.device.read_register(self.client, "voltage")
+
+        self.assertEqual(2, len(self.client.requests))
+
+    async def test_max_age(self) -> None:
+        self.assertEqual(12.3, await self.device.read_register(self.client, "voltage", max_age=10))
+        self.client.input_registers[1] = 200
+        self.assertEqual(12.3, await self.device.read_register(self.client, "voltage", max_age=10))
+        self.assertEqual(20.0, await self.device.read_register(self.client, "voltage", max_age=0))
+
+        self.assertEqual(2, len(self.client.requests))
+
+    async def test_only_stale_registers_read(self) -> None:
+        await self.device.read_registers(self.client, ["voltage", "energy"])
+        self.client.requests.clear()
+
+        # energy has ttl of 60 s in the config
+        values = await self.device.read_registers(self.client, ["voltage", "energy"])
+
+        self.assertEqual({"voltage": 12.3, "energy": 65586}, values)
+        self.assertEqual([(1, 1)], self.client.requests)
+
+    async def test_write_updates_shared_word(self) -> None:
+        self.assertEqual(1, await self.device.read_register(self.client, "slave_id", max_age=10))
+        self.client.requests.clear()
+
+        await self.device.write_register(self.client, "baudrate", 5)
+
+        values = await self.device.read_registers(self.client, ["baudrate", "slave_id", "pulse_enabled"], max_age=10)
+        self.assertEqual({"baudrate": 5, "slave_id": 1, "pulse_enabled": False}, values)
+        self.assertEqual(0x0501, self.client.holding_registers[0x10])
+        # only the read of the read-modify-write
+        self.assertEqual([(0x10, 1)], self.client.requests)
+
+    async def test_cancelled_write_clears_cache(self) -> None:
+        await self.device.read_register(self.client, "slave_id", max_age=10)
+        self.client.requests.clear()
+
+        with mock.patch.object(self.client, "write_holding_register", side_effect=asyncio.CancelledError):
+            with self.assertRaises(asyncio.CancelledError):
+                await self.device.write_register(self.client, "baudrate", 5)
+
+        # the word is read again, as the write may or may not have been applied
+        self.client.requests.clear()
+        await self.device.read_register(self.client, "slave_id", max_age=10)
+        self.assertEqual([(0x10, 1)], self.client.requests)
+
+
+class ModbusDeviceStaticTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = CountingMockModbusClient()
+        self.factory = ModbusDeviceFactory.from_config(config)
+
+    async def test_static_read_once(self) -> None:
+        device = self.factory.create_device(1)
+        self.assertEqual({"voltage": 12.3, "serial": 777}, await device.read_registers(self.client, ["voltage", "serial"]))
+        self.client.requests.clear()
+
+        self.client.input_registers[4] = 1
+        self.assertEqual({"voltage": 12.3, "serial": 777}, await device.read_registers(self.client, ["voltage", "serial"]))
+        self.assertEqual([(1, 1)], self.client.requests)
+
+        device.invalidate_cache()
+        self.assertEqual(1, await device.read_register(self.client, "serial"))
+
+    async def test_static_persisted(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "static.json")
+
+            device = self.factory.create_device(1)
+            device.set_static_cache_file(path)
+            await device.read_register(self.client, "serial")
+            self.client.requests.clear()
+
+            device = self.factory.create_device(1)
+            device.set_static_cache_file(path)
+            self.assertEqual(777, await device.read_register(self.client, "serial"))
+            self.assertEqual([], self.client.requests)
+
+            # cache of a different unit is ignored and kept
+            device = self.factory.create_device(2)
+            with self.assertLogs("modbus_device", "WARNING"):
+                device.set_static_cache_file(path)
+            self.client.input_registers[4] = 1
+            self.assertEqual(1, await device.read_register(self.client, "serial"))
+            self.assertEqual([(4, 1)], self.client.requests)
+            with open(path, "rt") as f:
+                self.assertEqual(1, json.load(f)["unit"])
+
+
+holes_config = """
+zero_mode: True
+allow_holes: True
+
+registers:
+  holding_registers:
+    - a/0x0000/uint16
+    - b/0x0005/uint16
+    - c/0x000a/uint16
+"""
+
+
+class HolesMockModbusClient(CountingMockModbusClient):
+    def __init__(self, exception_code: int = ModbusExceptionCode.IllegalDataAddress) -> None:
+        super().__init__()
+        self.exception_code = exception_code
+        self.hole_readable = False
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        if address <= 7 < address + count and not self.hole_readable:
+            raise ReadErrorException("illegal address", exception_code=self.exception_code)
+        return [address + i for i in range(count)]
+
+
+class ModbusDeviceLearnedMapTest(unittest.IsolatedAsyncioTestCase):
+    async def test_unreadable_hole_learned(self) -> None:
+        client = HolesMockModbusClient()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "learned.yaml")
+
+            factory = ModbusDeviceFactory.from_config(holes_config)
+            factory.get_address_map().set_learned_file(path)
+            device = factory.create_device(1)
+
+            self.assertEqual({"a": 0, "b": 5, "c": 10}, await device.read_registers(client, ["a", "b", "c"]))
+            # split at 0x0001-0x0004 first, then at 0x0006-0x0009, which is the one found unreadable
+            self.assertEqual([(0, 11), (0, 1), (5, 6), (5, 1), (10, 1)], client.requests)
+
+            client.requests.clear()
+            await device.read_registers(client, ["a", "b", "c"])
+            self.assertEqual([(0, 6), (10, 1)], client.requests)
+
+            factory = ModbusDeviceFactory.from_config(holes_config)
+            factory.get_address_map().set_learned_file(path)
+            client.requests.clear()
+            await factory.create_device(2).read_registers(client, ["a", "b", "c"])
+            self.assertEqual([(0, 6), (10, 1)], client.requests)
+
+    async def test_device_failure_learned_when_repeated(self) -> None:
+        client = HolesMockModbusClient(ModbusExceptionCode.SlaveDeviceFailure)
+        factory = ModbusDeviceFactory.from_config(holes_config)
+        device = factory.create_device(1)
+        all_split = [(0, 11), (0, 1), (5, 6), (5, 1), (10, 1)]
+
+        # a single rejection may be a transient failure
+        await device.read_registers(client, ["a", "b", "c"])
+        self.assertEqual(all_split, client.requests)
+        self.assertEqual({}, factory.get_address_map().unreadable)
+
+        # a successful read over the hole clears the suspicion
+        client.hole_readable = True
+        client.requests.clear()
+        self.assertEqual({"a": 0, "b": 5, "c": 10}, await device.read_registers(client, ["a", "b", "c"]))
+        self.assertEqual([(0, 11)], client.requests)
+
+        client.hole_readable = False
+        for _ in range(2):
+            client.requests.clear()
+            await device.read_registers(client, ["a", "b", "c"])
+            self.assertEqual(all_split, client.requests)
+
+        client.requests.clear()
+        await device.read_registers(client, ["a", "b", "c"])
+        self.assertEqual([(0, 6), (10, 1)], client.requests)
+
+    async def test_unreadable_register_raises(self) -> None:
+        client = HolesMockModbusClient()
+        device = ModbusDeviceFactory.from_config(holes_config.replace("c/0x000a", "c/0x0007")).create_device(1)
+
+        with self.assertRaises(ReadErrorException):
+            await device.read_registers(client, ["a", "b", "c"])
+
+
+class ModbusDevicePartialReadTest(unittest.IsolatedAsyncioTestCase):
+    async def test_partial_read(self) -> None:
+        client = CountingMockModbusClient()
+        device = ModbusDeviceFactory.from_config(config).create_device(1)
+
+        with mock.patch.object(client, "read_holding_registers", side_effect=ReadErrorException("timeout", timeout=True)):
+            with self.assertRaises(ReadErrorException):
+                await device.read_registers(client, ["voltage", "slave_id"])
+
+            errors: Dict[str, Exception] = {}
+            values = await device.read_registers(client, ["voltage", "slave_id", "baudrate"], errors=errors)
+
+        self.assertEqual({"voltage": 12.3}, values)
+        self.assertEqual({"slave_id", "baudrate"}, set(errors.keys()))
+        self.assertTrue(all(isinstance(x, ReadErrorException) and x.timeout for x in errors.values()))
+
+
+class UnitsMockModbusClient(MockModbusClient):
+    def __init__(self, failing_unit: int) -> None:
+        super().__init__(input_registers={1: 123, 2: 1, 3: 50}, holding_registers={})
+        self.failing_unit = failing_unit
+        self.requests: List[Tuple[int, int, int]] = []
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((unit, address, count))
+        await asyncio.sleep(0.01)
+        if unit == self.failing_unit:
+            raise ReadErrorException("timeout", timeout=True)
+        return await super().read_input_registers(unit, address, count)
+
+
+class ReadManyTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.factory = ModbusDeviceFactory.from_config(config)
+        self.devices = [self.factory.create_device(unit) for unit in (3, 1, 2)]
+
+    async def test_read_many(self) -> None:
+        client = UnitsMockModbusClient(failing_unit=2)
+
+        with mock.patch.object(ModbusReadSession, "plan", wraps=ModbusReadSession.plan) as plan:
+            results = await read_many(client, [(x, ["voltage", "energy"]) for x in self.devices])
+
+        self.assertEqual(1, plan.call_count)
+        self.assertEqual([(1, 1, 3), (2, 1, 3), (3, 1, 3)], client.requests)
+        self.assertEqual([3, 1, 2], [x.device.get_unit() for x in results])
+        self.assertEqual({"voltage": 12.3, "energy": 65586}, results[0].values)
+        self.assertIsNone(results[0].error)
+        self.assertEqual({}, results[2].values)
+        self.assertIsInstance(results[2].error, ReadErrorException)
+
+    async def test_read_many_concurrent(self) -> None:
+        clients = [UnitsMockModbusClient(failing_unit=0), UnitsMockModbusClient(failing_unit=0)]
+
+        results = await read_many(clients, [(x, ["voltage"]) for x in self.devices])
+
+        self.assertEqual([[(1, 1, 1), (3, 1, 1)], [(2, 1, 1)]], [x.requests for x in clients])
+        self.assertTrue(all(x.values == {"voltage": 12.3} for x in results))
+
+    async def test_read_many_bound_clients(self) -> None:
+        # two buses, each with its own units and values
+        bus1 = UnitsMockModbusClient(failing_unit=0)
+        bus2 = UnitsMockModbusClient(failing_unit=0)
+        bus2.input_registers = {1: 456}
+
+        results = await read_many(None, [(bus1, self.devices[0], ["voltage"]), (bus2, self.devices[1], ["voltage"]),
+                                         (bus1, self.devices[2], ["voltage"])])
+
+        self.assertEqual([(2, 1, 1), (3, 1, 1)], bus1.requests)
+        self.assertEqual([(1, 1, 1)], bus2.requests)
+        self.assertEqual([{"voltage": 12.3}, {"voltage": 45.6}, {"voltage": 12.3}], [x.values for x in results])
@@ -0,0 +1,125 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Sequence
+
+from modbus_client.client.async_modbus_client import AsyncModbusClient, DefaultMaxReadSize
+from modbus_client.client.exceptions import ModbusRequestException
+from modbus_client.client.types import ModbusRegisterType, ModbusExceptionCode
+from modbus_client.registers.address_map import ReadableRanges, UnreadableExceptionCodes, format_address_range, \
+    group_addresses
+
+logger = logging.getLogger("register_discovery")
+
+MaxAddress = 0xFFFF
+# rejected blocks up to this many resolution-sized chunks are read chunk by chunk instead of being bisected further,
+# which is cheaper for unmapped areas
+ChunkedReadThreshold = 8
+
+_skeleton_names = {
+    ModbusRegisterType.InputRegister: ("input_registers", "input"),
+    ModbusRegisterType.HoldingRegister: ("holding_registers", "holding"),
+}
+
+
+@dataclass
+class DiscoveryResult:
+    ranges: ReadableRanges = field(default_factory=dict)
+    values: Dict[ModbusRegisterType, Dict[int, int]] = field(default_factory=dict)
+    requests_count: int = 0
+
+
+async def discover_registers(client: AsyncModbusClient, unit: int,
+                             reg_types: Sequence[ModbusRegisterType] = (ModbusRegisterType.InputRegister,
+                                                                        ModbusRegisterType.HoldingRegister),
+                             start: int = 0, end: int = MaxAddress,
+                             block_size: int = DefaultMaxReadSize, resolution: int = 1) -> DiscoveryResult:
+    """
+    Finds readable addresses (zero-based) in `start`-`end` by reading `block_size` blocks and bisecting the blocks
+    rejected with an exception, so readable areas cost a single request per block. Proving addresses unreadable
+    takes about one request per `resolution` addresses, a rejected chunk of `resolution` addresses is considered
+    unreadable as a whole. A register type rejected with IllegalFunction is skipped. Other errors, like timeouts,
+    abort the discovery.
+    """
+    result = DiscoveryResult()
+
+    for reg_type in reg_types:
+        if reg_type == ModbusRegisterType.InputRegister:
+            read = client.read_input_registers
+        elif reg_type == ModbusRegisterType.HoldingRegister:
+            read = client.read_holding_registers
+        else:
+            raise ValueError(f"unsupported register type /{reg_type.name}/")
+
+        values: Dict[int, int] = {}
+
+        async def probe(address: int, count: int) -> bool:
+            result.requests_count += 1
+            try:
+                block_values = await read(unit, address, count)
+            except ModbusRequestException as e:
+                if e.exception_code == ModbusExceptionCode.IllegalFunction:
+                    return False
+                if e.exception_code not in UnreadableExceptionCodes:
+                    raise
+                if count <= resolution:
+                    return True
+                if count <= ChunkedReadThreshold * resolution:
+                    for chunk_start in range(address, address + count, resolution):
+                        if not await probe(chunk_start, min(resolution, address + count - chunk_start)):
+                            return False
+                    return True
+                half = count // 2
+                return await probe(address, half) and await probe(address + half, count - half)
+
+            values.update({address + i: x for i, x in enumerate(block_values)})
+            return True
+
+        for block_start in range(start, end + 1, block_size):
+            if not await probe(block_start, min(block_size, end + 1 - block_start)):
+                logger.info(f"{reg_type.name} not supported by the device")
+                break
+
+        logger.info(f"{reg_type.name}: {len(values)} readable addresses")
+        result.ranges[reg_type] = group_addresses(list(values.keys()))
+        result.values[reg_type] = values
+
+    return result
+
+
+def create_skeleton_device_yaml(result: DiscoveryResult, readable_ranges_file: str, block_size: int) -> str:
+    """
+    Returns a device file with a raw uint16 register for each readable address, annotated with the value read during
+    the discovery.
+    """
+    lines = [
+        "zero_mode: True",
+        "allow_holes: True",
+        f"max_read_size: {block_size}",
+        f"readable_ranges: {readable_ranges_file}",
+        "",
+    ]
+
+    registers_lines = []
+    for reg_type, (section, prefix) in _skeleton_names.items():
+        values = result.values.get(reg_type, {})
+        if len(values) == 0:
+            continue
+        registers_lines.append(f"  {section}:")
+        for rng in result.ranges[reg_type]:
+            registers_lines.append(f"    # {format_address_range(rng)}")
+            for address in range(rng.first_address, rng.last_address + 1):
+                registers_lines.append(f"    - {prefix}_0x{address:04x}/0x{address:04x}/uint16  # {values[address]}")
+
+    if len(registers_lines) > 0:
+        lines += ["registers:", *registers_lines]
+    else:
+        lines.append("registers: {}")
+
+    return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "DiscoveryResult",
+    "discover_registers",
+    "create_skeleton_device_yaml",
+]
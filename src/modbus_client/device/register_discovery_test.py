@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from typing import List, Set, Tuple
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.types import ModbusRegisterType, ModbusExceptionCode
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.device.register_discovery import discover_registers, create_skeleton_device_yaml
+from modbus_client.registers.address_map import save_readable_ranges, load_readable_ranges
+
+
+class StrictMockModbusClient(MockModbusClient):
+    def __init__(self, readable: Set[int]) -> None:
+        super().__init__(input_registers={}, holding_registers={x: x for x in readable})
+        self.requests: List[Tuple[int, int]] = []
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        raise ReadErrorException("illegal function", exception_code=ModbusExceptionCode.IllegalFunction)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        if any(x not in self.holding_registers for x in range(address, address + count)):
+            raise ReadErrorException("illegal address", exception_code=ModbusExceptionCode.IllegalDataAddress)
+        return await super().read_holding_registers(unit, address, count)
+
+
+class RegisterDiscoveryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_discover(self) -> None:
+        readable = {*range(0, 10), *range(20, 23), 40}
+        client = StrictMockModbusClient(readable)
+
+        result = await discover_registers(client, 1, start=0, end=63, block_size=32)
+
+        self.assertEqual([], result.ranges[ModbusRegisterType.InputRegister])
+        self.assertEqual([(0, 10), (20, 3), (40, 1)],
+                         [(x.address, x.count) for x in result.ranges[ModbusRegisterType.HoldingRegister]])
+        self.assertEqual(readable, set(result.values[ModbusRegisterType.HoldingRegister].keys()))
+
+    async def test_skeleton_used_by_planner(self) -> None:
+        client = StrictMockModbusClient({*range(0, 4), *range(6, 8)})
+        result = await discover_registers(client, 1, reg_types=[ModbusRegisterType.HoldingRegister], start=0, end=15,
+                                          block_size=16)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            save_readable_ranges(os.path.join(tmp_dir, "dev.ranges.yaml"), result.ranges)
+            with open(os.path.join(tmp_dir, "dev.yaml"), "wt") as f:
+                f.write(create_skeleton_device_yaml(result, "dev.ranges.yaml", 16))
+
+            self.assertEqual(result.ranges, load_readable_ranges(os.path.join(tmp_dir, "dev.ranges.yaml")))
+            device = ModbusDeviceFactory.from_file(os.path.join(tmp_dir, "dev.yaml")).create_device(1)
+
+        client.requests.clear()
+        values = await device.read_registers(client, ["holding_0x0000", "holding_0x0001", "holding_0x0007"])
+
+        self.assertEqual({"holding_0x0000": 0, "holding_0x0001": 1, "holding_0x0007": 7}, values)
+        # allow_holes is set, but the unreadable hole at 4-5 is not read over
+        self.assertEqual([(0, 2), (7, 1)], client.requests)
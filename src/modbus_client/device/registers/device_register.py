@@ -30,6 +30,9 @@ class IDeviceRegister(BaseModel):
     words: Annotated[int, Field(default=0, gt=0)]
     bit: int = 0
     description: str = ""
+    group: Optional[str] = None
+    ttl: Optional[float] = None
+    static: bool = False
 
     @field_validator('bits', mode='before')
     @classmethod
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import logging
+
+from modbus_client.cli.argument_parsers import mode_parser, host_port_parser
+from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.defaults import DefaultTimeout, DefaultSilentInterval
+from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusTcpClient, PyAsyncModbusRtuClient, \
+    PyAsyncModbusRtuOverTcpClient
+from modbus_client.gateway.gateway import ModbusGateway
+
+logger = logging.getLogger("modbus_gateway")
+
+
+def create_client(args: argparse.Namespace) -> AsyncModbusClient:
+    if args.rtu is not None:
+        baudrate, parity, stopbits = args.mode
+        return PyAsyncModbusRtuClient(path=args.rtu, baudrate=baudrate, stopbits=stopbits, parity=parity,
+                                      timeout=args.timeout, silent_interval=args.silent_interval)
+    elif args.rtu_over_tcp is not None:
+        return PyAsyncModbusRtuOverTcpClient(host=args.rtu_over_tcp[0], port=args.rtu_over_tcp[1],
+                                             timeout=args.timeout, silent_interval=args.silent_interval)
+    else:
+        return PyAsyncModbusTcpClient(host=args.tcp[0], port=args.tcp[1],
+                                      timeout=args.timeout, silent_interval=args.silent_interval)
+
+
+async def run_gateway(args: argparse.Namespace) -> None:
+    client = create_client(args)
+    gateway = ModbusGateway(client, max_age=args.max_age)
+
+    host, port = args.listen
+    port = await gateway.start_tcp(host, port)
+    logger.info(f"serving Modbus TCP on {host}:{port}")
+
+    try:
+        while True:
+            await asyncio.sleep(60)
+            stats = gateway.stats
+            logger.debug(f"requests: {stats.requests}, cache hits: {stats.cache_hits}, coalesced: {stats.coalesced}, "
+                         f"errors: {stats.errors}")
+    finally:
+        await gateway.close()
+        client.close()
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description="Modbus TCP gateway sharing a single upstream connection "
+                                                    "(e.g. a serial port) between many clients")
+    argparser.add_argument("--listen", type=host_port_parser("0.0.0.0"), default="0.0.0.0:502", metavar="[HOST:]PORT",
+                           help="default 0.0.0.0:502")
+
+    upstream_group = argparser.add_mutually_exclusive_group(required=True)
+    upstream_group.add_argument("--rtu", type=str, metavar="PATH")
+    upstream_group.add_argument("--rtu-over-tcp", type=host_port_parser(), metavar="HOST:PORT")
+    upstream_group.add_argument("--tcp", type=host_port_parser(), metavar="HOST:PORT")
+
+    argparser.add_argument("--mode", type=mode_parser, default="9600n1", help="default 9600n1")
+    argparser.add_argument("--timeout", type=float, default=DefaultTimeout)
+    argparser.add_argument("--silent-interval", type=float, default=DefaultSilentInterval)
+    argparser.add_argument("--max-age", type=float, default=0.0,
+                           help="answer reads of words read within last MAX_AGE seconds from the cache, default 0")
+    argparser.add_argument("-v", "--verbose", action='store_true')
+
+    args = argparser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="[%(asctime)s] [%(name)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+
+    try:
+        asyncio.run(run_gateway(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
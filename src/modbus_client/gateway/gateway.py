@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.exceptions import ModbusRequestException
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode, ModbusRegisterType
+from modbus_client.protocol.pdu import ModbusRequest, ModbusProtocolException, ReadFunctionRegisterTypes, \
+    WriteFunctionRegisterTypes
+from modbus_client.protocol.slave_server import ModbusSlaveServer
+
+logger = logging.getLogger("modbus_gateway")
+
+# unit, register type, address
+CacheKey = Tuple[int, ModbusRegisterType, int]
+# unit, function code, address, count
+RequestKey = Tuple[int, ModbusFunctionCode, int, int]
+
+BitReadFunctionCodes = {ModbusFunctionCode.ReadCoils, ModbusFunctionCode.ReadDiscreteInputs}
+
+
+@dataclass
+class GatewayStats:
+    requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+
+def to_protocol_exception(e: Exception) -> ModbusProtocolException:
+    """
+    Maps an upstream request failure to the exception response sent to the TCP client.
+    """
+    if isinstance(e, ModbusRequestException):
+        if e.exception_code is not None:
+            try:
+                return ModbusProtocolException(ModbusExceptionCode(e.exception_code))
+            except ValueError:
+                return ModbusProtocolException(ModbusExceptionCode.SlaveDeviceFailure)
+        if e.timeout:
+            return ModbusProtocolException(ModbusExceptionCode.GatewayTargetDeviceFailedToRespond)
+    return ModbusProtocolException(ModbusExceptionCode.GatewayPathUnavailable)
+
+
+class ModbusGateway:
+    """
+    Serves Modbus TCP clients through a single upstream client (usually RTU, as a serial port can have only one owner).
+    Requests of all clients are executed one at a time in arrival order. Identical reads arriving while one is in
+    flight wait for its result instead of being sent again, and with `max_age` reads of words read within last
+    `max_age` seconds are answered from the cache. Writes drop the written words from the cache.
+
+    `AsyncModbusClient` reads coils and discrete inputs packed into bytes rather than bit by bit, so only single-bit
+    reads of them (and single coil writes) are forwarded, longer ones are rejected with IllegalFunction.
+    """
+
+    def __init__(self, client: AsyncModbusClient, max_age: float = 0.0) -> None:
+        self.client = client
+        self.max_age = max_age
+        self.stats = GatewayStats()
+
+        self._bus_lock = asyncio.Lock()
+        self._cache: Dict[CacheKey, Tuple[int, float]] = {}
+        self._in_flight: Dict[RequestKey, asyncio.Future[List[int]]] = {}
+        self._server: Optional[ModbusSlaveServer] = None
+
+    async def start_tcp(self, host: str, port: int) -> int:
+        if self._server is None:
+            self._server = ModbusSlaveServer(self)
+        return await self._server.start_tcp(host, port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    async def handle_request(self, unit: int, request: ModbusRequest) -> Optional[List[int]]:
+        self.stats.requests += 1
+        if request.is_read():
+            return await self._handle_read(unit, request)
+        else:
+            await self._handle_write(unit, request)
+            return []
+
+    def _get_cached(self, unit: int, request: ModbusRequest) -> Optional[List[int]]:
+        if self.max_age <= 0:
+            return None
+
+        now = time.monotonic()
+        reg_type = ReadFunctionRegisterTypes[request.function_code]
+        values = []
+        for address in range(request.address, request.address + request.count):
+            entry = self._cache.get((unit, reg_type, address))
+            if entry is None or now - entry[1] > self.max_age:
+                return None
+            values.append(entry[0])
+        return values
+
+    async def _handle_read(self, unit: int, request: ModbusRequest) -> List[int]:
+        if request.function_code in BitReadFunctionCodes and request.count > 1:
+            raise ModbusProtocolException(ModbusExceptionCode.IllegalFunction)
+
+        values = self._get_cached(unit, request)
+        if values is not None:
+            self.stats.cache_hits += 1
+            return values
+
+        key = (unit, request.function_code, request.address, request.count)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            values = await self._read(unit, request)
+            future.set_result(values)
+            return values
+        except Exception as e:
+            self.stats.errors += 1
+            logger.debug(f"read of unit {unit} failed: {e!r}")
+            protocol_exception = to_protocol_exception(e)
+            future.set_exception(protocol_exception)
+            # retrieve the exception so asyncio doesn't complain if no one else is waiting
+            future.exception()
+            raise protocol_exception
+        finally:
+            del self._in_flight[key]
+
+    async def _read(self, unit: int, request: ModbusRequest) -> List[int]:
+        fc = request.function_code
+        async with self._bus_lock:
+            # a single bit is read exactly by both calls, the discrete input in the lowest bit of the returned byte
+            if fc == ModbusFunctionCode.ReadCoils:
+                values = [int(x) for x in await self.client.read_coils(unit, request.address, 1)]
+            elif fc == ModbusFunctionCode.ReadDiscreteInputs:
+                values = [x & 0x01 for x in await self.client.read_discrete_inputs(unit, request.address, 1)]
+            elif fc == ModbusFunctionCode.ReadHoldingRegisters:
+                values = await self.client.read_holding_registers(unit, request.address, request.count)
+            else:
+                values = await self.client.read_input_registers(unit, request.address, request.count)
+
+            # stored while holding the bus, so a later write can't be overwritten by an older read
+            now = time.monotonic()
+            reg_type = ReadFunctionRegisterTypes[fc]
+            for i, value in enumerate(values[:request.count]):
+                self._cache[(unit, reg_type, request.address + i)] = (value, now)
+
+        return values[:request.count]
+
+    async def _handle_write(self, unit: int, request: ModbusRequest) -> None:
+        fc = request.function_code
+        if fc == ModbusFunctionCode.WriteMultipleCoils:
+            # AsyncModbusClient can write coils only one by one, which wouldn't be atomic
+            raise ModbusProtocolException(ModbusExceptionCode.IllegalFunction)
+
+        async with self._bus_lock:
+            reg_type = WriteFunctionRegisterTypes[fc]
+            for i in range(request.count):
+                self._cache.pop((unit, reg_type, request.address + i), None)
+
+            try:
+                if fc == ModbusFunctionCode.WriteSingleCoil:
+                    await self.client.write_coil(unit, request.address, bool(request.values[0]))
+                elif fc == ModbusFunctionCode.WriteSingleRegister:
+                    await self.client.write_holding_register(unit, request.address, request.values[0])
+                else:
+                    await self.client.write_holding_registers(unit, request.address, request.values)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.debug(f"write to unit {unit} failed: {e!r}")
+                raise to_protocol_exception(e)
+
+
+__all__ = [
+    "GatewayStats",
+    "ModbusGateway",
+    "to_protocol_exception",
+]
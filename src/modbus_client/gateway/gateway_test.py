@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from typing import List, Tuple
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode
+from modbus_client.gateway.gateway import ModbusGateway
+from modbus_client.protocol.pdu import ModbusRequest, ModbusProtocolException
+
+
+class SlowMockModbusClient(MockModbusClient):
+    def __init__(self) -> None:
+        super().__init__(input_registers={}, holding_registers={i: i * 10 for i in range(10)}, coils={3: True})
+        self.requests: List[Tuple[int, int]] = []
+
+    async def read_discrete_inputs(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        # inputs are returned packed into bytes, odd inputs set
+        return [0b10101010] * ((count + 7) // 8)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        await asyncio.sleep(0.01)
+        if address + count > 10:
+            raise ReadErrorException("illegal address", exception_code=ModbusExceptionCode.IllegalDataAddress)
+        return await super().read_holding_registers(unit, address, count)
+
+
+def read_request(address: int, count: int) -> ModbusRequest:
+    return ModbusRequest(ModbusFunctionCode.ReadHoldingRegisters, address, count)
+
+
+class ModbusGatewayTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = SlowMockModbusClient()
+
+    async def test_identical_requests_coalesced(self) -> None:
+        gateway = ModbusGateway(self.client)
+
+        res = await asyncio.gather(gateway.handle_request(1, read_request(0, 2)),
+                                   gateway.handle_request(1, read_request(0, 2)),
+                                   gateway.handle_request(1, read_request(1, 2)))
+
+        self.assertEqual([[0, 10], [0, 10], [10, 20]], res)
+        self.assertEqual([(0, 2), (1, 2)], self.client.requests)
+        self.assertEqual(1, gateway.stats.coalesced)
+
+    async def test_answered_from_cache(self) -> None:
+        gateway = ModbusGateway(self.client, max_age=10)
+
+        await gateway.handle_request(1, read_request(0, 4))
+        self.assertEqual([10, 20], await gateway.handle_request(1, read_request(1, 2)))
+        # different unit
+        await gateway.handle_request(2, read_request(1, 2))
+
+        self.assertEqual([(0, 4), (1, 2)], self.client.requests)
+
+    async def test_write_invalidates_cache(self) -> None:
+        gateway = ModbusGateway(self.client, max_age=10)
+
+        await gateway.handle_request(1, read_request(0, 4))
+        await gateway.handle_request(1, ModbusRequest(ModbusFunctionCode.WriteSingleRegister, 2, 1, [5]))
+
+        self.assertEqual([0, 10, 5, 30], await gateway.handle_request(1, read_request(0, 4)))
+        self.assertEqual([(0, 4), (0, 4)], self.client.requests)
+
+    async def test_exception_forwarded(self) -> None:
+        gateway = ModbusGateway(self.client)
+
+        res = await asyncio.gather(gateway.handle_request(1, read_request(8, 4)),
+                                   gateway.handle_request(1, read_request(8, 4)), return_exceptions=True)
+
+        self.assertEqual(1, len(self.client.requests))
+        for e in res:
+            assert isinstance(e, ModbusProtocolException)
+            self.assertEqual(ModbusExceptionCode.IllegalDataAddress, e.exception_code)
+
+    async def test_bit_reads(self) -> None:
+        gateway = ModbusGateway(self.client)
+
+        self.assertEqual([1], await gateway.handle_request(1, ModbusRequest(ModbusFunctionCode.ReadCoils, 3, 1)))
+        self.assertEqual([0], await gateway.handle_request(1, ModbusRequest(ModbusFunctionCode.ReadCoils, 4, 1)))
+        self.assertEqual([0], await gateway.handle_request(1, ModbusRequest(ModbusFunctionCode.ReadDiscreteInputs,
+                                                                            0, 1)))
+
+        for fc in (ModbusFunctionCode.ReadCoils, ModbusFunctionCode.ReadDiscreteInputs):
+            with self.assertRaises(ModbusProtocolException) as cm:
+                await gateway.handle_request(1, ModbusRequest(fc, 0, 8))
+            self.assertEqual(ModbusExceptionCode.IllegalFunction, cm.exception.exception_code)
+        self.assertEqual([(0, 1)], self.client.requests)
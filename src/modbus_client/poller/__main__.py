@@ -0,0 +1,55 @@
+import argparse
+import json
+import logging
+import sys
+
+from modbus_client.cli.system_file import load_system_config
+from modbus_client.cli.system_file_finder import find_system_file
+from modbus_client.poller.supervisor import PollingSupervisor
+from modbus_client.poller.worker import PollResult
+
+
+def print_result(result: PollResult) -> None:
+    sys.stdout.write(json.dumps({
+        "device": result.device,
+        "timestamp": result.timestamp,
+        "duration": round(result.duration, 6),
+        "values": result.values,
+        "errors": result.errors,
+    }, sort_keys=True) + "\n")
+    sys.stdout.flush()
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description="Polls all devices of a system file in a pool of worker processes, "
+                                                    "writes results as JSON lines to stdout")
+    argparser.add_argument("system-file", type=str)
+    argparser.add_argument("--workers", type=int, help="number of worker processes, default: number of CPUs")
+    argparser.add_argument("--interval", type=float, default=5.0, help="poll interval, default 5 s")
+    argparser.add_argument("--heartbeat-timeout", type=float, default=15.0,
+                           help="restart workers not responding for this long, default 15 s")
+    argparser.add_argument("--shared-table", type=str, metavar="NAME",
+                           help="publish the latest values into a shared memory segment of this name")
+    argparser.add_argument("--decoder-cache", type=str, metavar="DIR",
+                           help="cache decoders generated for device models in this directory")
+    argparser.add_argument("-v", "--verbose", action='store_true')
+
+    args = argparser.parse_args()
+
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=log_level, format="[%(asctime)s] [%(name)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    system_config = load_system_config(find_system_file(vars(args)["system-file"]))
+    supervisor = PollingSupervisor(system_config.devices, workers=args.workers, poll_interval=args.interval,
+                                   sink=print_result, heartbeat_timeout=args.heartbeat_timeout,
+                                   log_level=logging.DEBUG if args.verbose else logging.WARNING,
+                                   shared_table=args.shared_table, decoder_cache_dir=args.decoder_cache)
+
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
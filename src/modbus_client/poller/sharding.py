@@ -0,0 +1,26 @@
+from typing import List, Sequence
+
+from modbus_client.cli.system_file import Device
+from modbus_client.client.transport import group_by_transport, check_line
+
+def shard_devices(devices: Sequence[Device], shards_count: int) -> List[List[Device]]:
+    """
+    Splits devices into at most `shards_count` shards of similar sizes. Devices sharing a transport (an RTU bus, a TCP
+    gateway) always end up in the same shard, as their transactions have to be serialized anyway.
+    """
+    if shards_count < 1:
+        raise ValueError("at least one shard is required")
+
+    lines = sorted(group_by_transport(devices).items(), key=lambda x: (-len(x[1]), x[0]))
+    for _, line_devices in lines:
+        check_line(line_devices)
+    shards: List[List[Device]] = [[] for _ in range(min(shards_count, len(lines)))]
+    for _, line_devices in lines:
+        smallest = min(shards, key=len)
+        smallest.extend(line_devices)
+    return shards
+
+
+__all__ = [
+    "shard_devices",
+]
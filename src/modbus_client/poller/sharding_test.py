@@ -0,0 +1,46 @@
+import unittest
+
+from modbus_client.cli.system_file import Device, RtuConfig, TcpConfig
+from modbus_client.client.transport import get_transport_key
+from modbus_client.poller.sharding import shard_devices
+
+
+def rtu_device(name: str, path: str) -> Device:
+    return Device(name=name, unit=1, device="DDS238", rtu=RtuConfig(path=path, baudrate=9600))
+
+
+def tcp_device(name: str, port: int) -> Device:
+    return Device(name=name, unit=1, device="DDS238", tcp=TcpConfig(host="10.0.0.1", port=port))
+
+
+class ShardingTest(unittest.TestCase):
+    def test_buses_not_split(self) -> None:
+        devices = [
+            *[rtu_device(f"a{i}", "/dev/ttyUSB0") for i in range(5)],
+            *[rtu_device(f"b{i}", "/dev/ttyUSB1") for i in range(3)],
+            *[tcp_device(f"c{i}", 502 + i) for i in range(4)],
+        ]
+
+        shards = shard_devices(devices, 3)
+
+        self.assertEqual(3, len(shards))
+        self.assertEqual(sorted(x.name for x in devices), sorted(x.name for shard in shards for x in shard))
+        for shard in shards:
+            for device in shard:
+                other_shards = [x for x in shards if x is not shard]
+                self.assertFalse(any(get_transport_key(device) == get_transport_key(x)
+                                     for other in other_shards for x in other))
+        # 5 | 3 + 1 | 3 TCP devices, each on its own port
+        self.assertEqual([5, 4, 3], sorted((len(x) for x in shards), reverse=True))
+
+    def test_fewer_lines_than_shards(self) -> None:
+        shards = shard_devices([rtu_device("a", "/dev/ttyUSB0"), rtu_device("b", "/dev/ttyUSB0")], 8)
+
+        self.assertEqual([["a", "b"]], [[x.name for x in shard] for shard in shards])
+
+    def test_different_baudrates(self) -> None:
+        devices = [rtu_device("a", "/dev/ttyUSB0"), rtu_device("b", "/dev/ttyUSB0")]
+        devices[1].rtu = RtuConfig(path="/dev/ttyUSB0", baudrate=19200)
+
+        with self.assertRaisesRegex(Exception, "different baudrates"):
+            shard_devices(devices, 2)
@@ -0,0 +1,305 @@
+import json
+import math
+import struct
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from multiprocessing import shared_memory, resource_tracker
+from typing import List, Sequence, Tuple, Dict, Any, Mapping, Optional
+
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.device.device_config import DeviceConfig
+from modbus_client.device.modbus_device import create_modbus_register
+from modbus_client.registers.read_session import WordsMap
+from modbus_client.registers.registers import EnumValue, FlagsCollection
+
+Magic = b"MBTABLE1"
+# magic, descriptor length
+HeaderFormat = "<8sI4x"
+# seq, timestamp
+SlotHeaderFormat = "<Qd"
+
+StatusNotRead = 0
+StatusOk = 1
+StatusError = 2
+
+
+@dataclass
+class RegisterSlot:
+    name: str
+    reg_type: int
+    address: int
+    count: int
+    index: int
+    # index of the first word in the device's words area
+    words_index: int
+
+
+@dataclass
+class DeviceSlot:
+    name: str
+    offset: int
+    registers: List[RegisterSlot] = field(default_factory=list)
+    words_count: int = 0
+
+    @property
+    def values_offset(self) -> int:
+        return self.offset + struct.calcsize(SlotHeaderFormat)
+
+    @property
+    def status_offset(self) -> int:
+        return self.values_offset + 8 * len(self.registers)
+
+    @property
+    def words_offset(self) -> int:
+        return _align(self.status_offset + len(self.registers), 2)
+
+    @property
+    def size(self) -> int:
+        return _align(self.words_offset + 2 * self.words_count, 8) - self.offset
+
+
+@dataclass
+class TableLayout:
+    devices: List[DeviceSlot] = field(default_factory=list)
+    size: int = 0
+
+    def find_device(self, name: str) -> DeviceSlot:
+        device = next((x for x in self.devices if x.name == name), None)
+        if device is None:
+            raise KeyError(f"unknown device: {name}")
+        return device
+
+
+@dataclass
+class DeviceSnapshot:
+    seq: int
+    timestamp: float
+    # registers whose last read succeeded
+    values: Dict[str, float] = field(default_factory=dict)
+    words: Dict[str, Tuple[int, ...]] = field(default_factory=dict)
+    # registers whose last read failed
+    failed: List[str] = field(default_factory=list)
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+def create_table_layout(devices: Sequence[Tuple[str, DeviceConfig]]) -> TableLayout:
+    """
+    Lays out a slot for each device: a sequence number, the timestamp of the last poll, a float64 value and a status
+    byte per register and the raw words of all registers, in the order of the device config.
+    """
+    # the descriptor describing the slots precedes them, its length depends on their offsets
+    data_offset = 0
+    while True:
+        layout = _build_layout(devices, data_offset)
+        required_offset = _align(struct.calcsize(HeaderFormat) + len(_encode_descriptor(layout)), 8)
+        if required_offset <= data_offset:
+            return layout
+        data_offset = required_offset
+
+
+def _build_layout(devices: Sequence[Tuple[str, DeviceConfig]], offset: int) -> TableLayout:
+    layout = TableLayout()
+    for name, device_config in devices:
+        device = DeviceSlot(name, offset)
+        for i, register in enumerate(device_config.get_all_registers()):
+            modbus_register = create_modbus_register(device_config, register)
+            device.registers.append(RegisterSlot(name=register.name, reg_type=modbus_register.reg_type.value,
+                                                 address=modbus_register.address, count=modbus_register.get_count(),
+                                                 index=i, words_index=device.words_count))
+            device.words_count += modbus_register.get_count()
+        layout.devices.append(device)
+        offset += device.size
+    layout.size = max(offset, 1)
+    return layout
+
+
+def _encode_descriptor(layout: TableLayout) -> bytes:
+    return json.dumps([asdict(x) for x in layout.devices], separators=(",", ":")).encode("utf-8")
+
+
+def _decode_descriptor(data: bytes, size: int) -> TableLayout:
+    devices = []
+    for x in json.loads(data.decode("utf-8")):
+        registers = [RegisterSlot(**r) for r in x.pop("registers")]
+        devices.append(DeviceSlot(registers=registers, **x))
+    return TableLayout(devices=devices, size=size)
+
+
+def to_numeric(value: Any) -> float:
+    if isinstance(value, EnumValue):
+        return float(value.enum_value)
+    elif isinstance(value, FlagsCollection):
+        return float(value.mask)
+    elif isinstance(value, (int, float)):
+        return float(value)
+    else:
+        return math.nan
+
+
+class SharedTablePublisher:
+    """
+    Writes the latest values of devices into a shared memory segment. Each device slot is guarded by a sequence
+    number, odd while the slot is being written, so readers never need a lock. Each slot must have a single writer,
+    different slots can be written by different processes attached to the same segment.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: TableLayout, owner: bool):
+        self._shm = shm
+        self.layout = layout
+        self._owner = owner
+        self._slots = {x.name: x for x in layout.devices}
+
+    @staticmethod
+    def create(layout: TableLayout, name: Optional[str] = None) -> 'SharedTablePublisher':
+        shm = shared_memory.SharedMemory(name=name, create=True, size=layout.size)
+        descriptor = _encode_descriptor(layout)
+        struct.pack_into(HeaderFormat, shm.buf, 0, Magic, len(descriptor))
+        shm.buf[struct.calcsize(HeaderFormat):struct.calcsize(HeaderFormat) + len(descriptor)] = descriptor
+        return SharedTablePublisher(shm, layout, owner=True)
+
+    @staticmethod
+    def attach(name: str) -> 'SharedTablePublisher':
+        shm, layout = _attach(name)
+        return SharedTablePublisher(shm, layout, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def publish(self, device: str, timestamp: float, words: WordsMap, values: Mapping[str, Any]) -> None:
+        """
+        Updates the slot of `device`. Registers missing from `values` are marked failed, keeping their last values.
+        """
+        slot = self._slots[device]
+        buf = self._shm.buf
+        seq, _ = struct.unpack_from(SlotHeaderFormat, buf, slot.offset)
+        seq |= 1
+        struct.pack_into("<Q", buf, slot.offset, seq)
+
+        struct.pack_into("<d", buf, slot.offset + 8, timestamp)
+        for register in slot.registers:
+            if register.name not in values:
+                if buf[slot.status_offset + register.index] != StatusNotRead:
+                    buf[slot.status_offset + register.index] = StatusError
+                continue
+            struct.pack_into("<d", buf, slot.values_offset + 8 * register.index, to_numeric(values[register.name]))
+            for i in range(register.count):
+                word = words.get((ModbusRegisterType(register.reg_type), register.address + i), 0)
+                struct.pack_into("<H", buf, slot.words_offset + 2 * (register.words_index + i), int(word))
+            buf[slot.status_offset + register.index] = StatusOk
+
+        struct.pack_into("<Q", buf, slot.offset, seq + 1)
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class SharedTableReader:
+    """
+    Reads device slots written by `SharedTablePublisher` directly from the shared memory. A read overlapping a write is
+    detected by the slot's sequence number and retried.
+    """
+
+    def __init__(self, name: str):
+        self._shm, self.layout = _attach(name)
+        self._slots = {x.name: x for x in self.layout.devices}
+
+    def get_devices(self) -> List[str]:
+        return [x.name for x in self.layout.devices]
+
+    def get_registers(self, device: str) -> List[str]:
+        return [x.name for x in self._slots[device].registers]
+
+    def get_seq(self, device: str) -> int:
+        """
+        Returns the sequence number of the device slot, which grows by 2 with every publish.
+        """
+        seq: int = struct.unpack_from("<Q", self._shm.buf, self._slots[device].offset)[0]
+        return seq
+
+    def read_device(self, device: str, timeout: float = 1.0) -> DeviceSnapshot:
+        slot = self._slots[device]
+        buf = self._shm.buf
+        deadline = time.monotonic() + timeout
+        while True:
+            seq, timestamp = struct.unpack_from(SlotHeaderFormat, buf, slot.offset)
+            if seq & 1 == 0:
+                snapshot = DeviceSnapshot(seq=seq, timestamp=timestamp)
+                for register in slot.registers:
+                    status = buf[slot.status_offset + register.index]
+                    if status == StatusOk:
+                        snapshot.values[register.name] = struct.unpack_from(
+                            "<d", buf, slot.values_offset + 8 * register.index)[0]
+                        snapshot.words[register.name] = struct.unpack_from(
+                            f"<{register.count}H", buf, slot.words_offset + 2 * register.words_index)
+                    elif status == StatusError:
+                        snapshot.failed.append(register.name)
+                if struct.unpack_from("<Q", buf, slot.offset)[0] == seq:
+                    return snapshot
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"slot of {device} is being written for too long")
+
+    def get_value(self, device: str, register: str, timeout: float = 1.0) -> Optional[float]:
+        """
+        Returns the value of a single register, None if its last read failed or it wasn't read yet.
+        """
+        slot = self._slots[device]
+        register_slot = next((x for x in slot.registers if x.name == register), None)
+        if register_slot is None:
+            raise KeyError(f"unknown register: {register}")
+
+        buf = self._shm.buf
+        deadline = time.monotonic() + timeout
+        while True:
+            seq = struct.unpack_from("<Q", buf, slot.offset)[0]
+            if seq & 1 == 0:
+                status = buf[slot.status_offset + register_slot.index]
+                value: float = struct.unpack_from("<d", buf, slot.values_offset + 8 * register_slot.index)[0]
+                if struct.unpack_from("<Q", buf, slot.offset)[0] == seq:
+                    return value if status == StatusOk else None
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"slot of {device} is being written for too long")
+
+    def close(self) -> None:
+        self._shm.close()
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    # the segment belongs to its creator, the resource tracker must not remove it when an attached process exits
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _attach(name: str) -> Tuple[shared_memory.SharedMemory, TableLayout]:
+    shm = _open_untracked(name)
+
+    magic, descriptor_size = struct.unpack_from(HeaderFormat, shm.buf, 0)
+    if magic != Magic:
+        shm.close()
+        raise ValueError(f"/{name}/ is not a values table")
+    start = struct.calcsize(HeaderFormat)
+    return shm, _decode_descriptor(bytes(shm.buf[start:start + descriptor_size]), shm.size)
+
+
+__all__ = [
+    "RegisterSlot",
+    "DeviceSlot",
+    "TableLayout",
+    "DeviceSnapshot",
+    "create_table_layout",
+    "to_numeric",
+    "SharedTablePublisher",
+    "SharedTableReader",
+]
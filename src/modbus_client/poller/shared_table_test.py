@@ -0,0 +1,72 @@
+import struct
+import unittest
+
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.poller.shared_table import create_table_layout, SharedTablePublisher, SharedTableReader
+from modbus_client.poller.worker import poll_device
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+    - energy/0x0002/uint32be[Wh]
+    - name/0x0020/string,words=2,readonly
+
+  holding_registers:
+    - name: mode
+      address: 0x0010
+      type: enum
+      enum:
+        - { name: idle, value: 0 }
+        - { name: run, value: 1 }
+"""
+
+
+class SharedTableTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.factory = ModbusDeviceFactory.from_config(config)
+        device_config = self.factory.create_device(1).get_device_config()
+        self.publisher = SharedTablePublisher.create(create_table_layout([("meter1", device_config),
+                                                                          ("meter2", device_config)]))
+        self.reader = SharedTableReader(self.publisher.name)
+
+    async def asyncTearDown(self) -> None:
+        self.reader.close()
+        self.publisher.close()
+
+    async def test_publish(self) -> None:
+        client = MockModbusClient(input_registers={1: 2301, 2: 1, 3: 2, 0x20: 0x4142, 0x21: 0x4300},
+                                  holding_registers={0x10: 1})
+
+        self.assertEqual(["meter1", "meter2"], self.reader.get_devices())
+        self.assertIsNone(self.reader.get_value("meter1", "voltage"))
+
+        await poll_device(0, client, "meter1", self.factory.create_device(1), self.publisher)
+
+        snapshot = self.reader.read_device("meter1")
+        self.assertEqual(2, snapshot.seq)
+        self.assertAlmostEqual(230.1, snapshot.values["voltage"])
+        self.assertEqual(65538.0, snapshot.values["energy"])
+        self.assertEqual(1.0, snapshot.values["mode"])
+        self.assertEqual((1, 2), snapshot.words["energy"])
+        self.assertEqual((0x4142, 0x4300), snapshot.words["name"])
+        self.assertEqual([], snapshot.failed)
+        self.assertEqual(0, self.reader.get_seq("meter2"))
+
+        await poll_device(0, MockModbusClient({}, {}), "meter1", self.factory.create_device(1), self.publisher)
+
+        snapshot = self.reader.read_device("meter1")
+        self.assertEqual(4, snapshot.seq)
+        self.assertEqual(["mode", "voltage", "energy", "name"], snapshot.failed)
+        self.assertIsNone(self.reader.get_value("meter1", "voltage"))
+
+    def test_torn_read_detected(self) -> None:
+        slot = self.publisher.layout.find_device("meter1")
+        # a writer which died mid-update leaves the sequence number odd
+        struct.pack_into("<Q", self.publisher._shm.buf, slot.offset, 1)
+
+        with self.assertRaises(TimeoutError):
+            self.reader.read_device("meter1", timeout=0.05)
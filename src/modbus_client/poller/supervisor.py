@@ -0,0 +1,216 @@
+import logging
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
+import multiprocessing.synchronize
+import os
+import time
+from dataclasses import dataclass
+from typing import Sequence, Optional, Callable, Dict, Any
+
+from modbus_client.cli.system_file import Device
+from modbus_client.device.device_config import DeviceConfig, load_device_config
+from modbus_client.device.device_config_finder import find_device_file
+from modbus_client.poller.shared_table import SharedTablePublisher, create_table_layout
+from modbus_client.poller.sharding import shard_devices
+from modbus_client.poller.worker import PollResult, Heartbeat, WorkerConfig, worker_main
+
+logger = logging.getLogger("poller_supervisor")
+
+ResultSink = Callable[[PollResult], None]
+
+StopTimeout = 5.0
+
+
+@dataclass
+class WorkerState:
+    config: WorkerConfig
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    # receiving end of the pipe and the stop event of the current process, replaced on restart
+    connection: Optional[multiprocessing.connection.Connection] = None
+    stop_event: Optional[multiprocessing.synchronize.Event] = None
+    pid: Optional[int] = None
+    started_at: float = 0.0
+    last_heartbeat: float = 0.0
+    restarts: int = 0
+    # restarts are delayed, so a worker failing at startup doesn't spin
+    restart_at: float = 0.0
+
+
+class PollingSupervisor:
+    """
+    Polls devices in a pool of worker processes, so decoding scales past a single CPU core. Devices are sharded by
+    transport (see `shard_devices`), each worker polls its lines concurrently. Results of all workers are passed to
+    `sink` in the supervisor process, and the latest result of each device is kept in `latest`.
+
+    Each worker process sends its results and heartbeats over its own pipe and gets its own stop event, so a worker
+    killed while using them breaks only its own channel. Workers send heartbeats from their event loops. A worker
+    which exited or hasn't sent one within `heartbeat_timeout` seconds is killed and restarted, after a delay growing
+    with the number of restarts.
+
+    Given `shared_table`, the supervisor creates a shared memory segment of that name on start, and workers publish the
+    latest values of their devices into it, for local consumers using `SharedTableReader`.
+
+    Workers decode values with decoders generated for each device model (see `compile_decoder`), cached in
+    `decoder_cache_dir` if given.
+    """
+
+    def __init__(self, devices: Sequence[Device], workers: Optional[int] = None, poll_interval: float = 5.0,
+                 sink: Optional[ResultSink] = None, heartbeat_interval: float = 1.0, heartbeat_timeout: float = 15.0,
+                 restart_delay: float = 1.0, max_restart_delay: float = 60.0, log_level: int = logging.WARNING,
+                 shared_table: Optional[str] = None, decoder_cache_dir: Optional[str] = None):
+        shards = shard_devices(devices, workers or os.cpu_count() or 1)
+        self.workers = [WorkerState(WorkerConfig(shard=i, devices=x, poll_interval=poll_interval,
+                                                 heartbeat_interval=heartbeat_interval, shared_table=shared_table,
+                                                 decoder_cache_dir=decoder_cache_dir))
+                        for i, x in enumerate(shards)]
+        self.devices = list(devices)
+        self.shared_table = shared_table
+        self.table: Optional[SharedTablePublisher] = None
+        self.sink = sink
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.log_level = log_level
+        self.latest: Dict[str, PollResult] = {}
+
+        # spawned workers don't inherit threads and open connections of the supervisor
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        if self.shared_table is not None:
+            device_configs: Dict[str, DeviceConfig] = {}
+            for device in self.devices:
+                if device.device not in device_configs:
+                    device_configs[device.device] = load_device_config(find_device_file(device.device))
+            layout = create_table_layout([(x.name, device_configs[x.device]) for x in self.devices])
+            self.table = SharedTablePublisher.create(layout, self.shared_table)
+
+        for worker in self.workers:
+            self._start_worker(worker)
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            if worker.process is not None and worker.stop_event is not None:
+                worker.stop_event.set()
+        deadline = time.monotonic() + StopTimeout
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(max(0.0, deadline - time.monotonic()))
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join()
+                worker.process = None
+            self._close_connection(worker)
+
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """
+        Starts the workers and processes their results until `duration` passes (forever if None).
+        """
+        self.start()
+        end = None if duration is None else time.monotonic() + duration
+        try:
+            while end is None or time.monotonic() < end:
+                self.process_messages(timeout=0.5)
+                self.check_workers()
+        finally:
+            self.stop()
+
+    def process_messages(self, timeout: float) -> None:
+        """
+        Handles messages from the workers for up to `timeout` seconds, returns earlier once there are none.
+        """
+        deadline = time.monotonic() + timeout
+        wait_timeout = timeout
+        while True:
+            connections = {x.connection: x for x in self.workers if x.connection is not None}
+            if len(connections) == 0:
+                time.sleep(wait_timeout)
+                return
+            ready = multiprocessing.connection.wait(list(connections.keys()), timeout=wait_timeout)
+            if len(ready) == 0:
+                return
+
+            for connection, worker in connections.items():
+                if connection not in ready:
+                    continue
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    # the worker exited, possibly in the middle of a message, it's restarted by check_workers
+                    self._close_connection(worker)
+                    continue
+                self._handle_message(message)
+
+            if time.monotonic() >= deadline:
+                return
+            wait_timeout = 0
+
+    def check_workers(self) -> None:
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.process is None:
+                if now >= worker.restart_at:
+                    self._start_worker(worker)
+                continue
+
+            if not worker.process.is_alive():
+                logger.warning(f"worker {worker.config.shard} exited with code {worker.process.exitcode}")
+            elif now - max(worker.last_heartbeat, worker.started_at) > self.heartbeat_timeout:
+                logger.warning(f"worker {worker.config.shard} not responding, killing")
+                worker.process.kill()
+            else:
+                continue
+
+            worker.process.join()
+            worker.process = None
+            self._close_connection(worker)
+            worker.restart_at = now + min(self.restart_delay * 2 ** worker.restarts, self.max_restart_delay)
+            worker.restarts += 1
+
+    def _start_worker(self, worker: WorkerState) -> None:
+        # not shared by the workers, as a worker killed while using them could leave them broken
+        reader, writer = self._context.Pipe(duplex=False)
+        stop_event = self._context.Event()
+        process = self._context.Process(target=worker_main, args=(worker.config, writer, stop_event, self.log_level),
+                                        name=f"modbus-poller-{worker.config.shard}", daemon=True)
+        process.start()
+        # only the worker writes, so the reader gets EOF once it exits
+        writer.close()
+        worker.process = process
+        worker.connection = reader
+        worker.stop_event = stop_event
+        worker.pid = process.pid
+        worker.started_at = time.monotonic()
+        logger.info(f"worker {worker.config.shard} started, pid {process.pid}, "
+                    f"{len(worker.config.devices)} devices")
+
+    @staticmethod
+    def _close_connection(worker: WorkerState) -> None:
+        if worker.connection is not None:
+            worker.connection.close()
+            worker.connection = None
+
+    def _handle_message(self, message: Any) -> None:
+        if isinstance(message, Heartbeat):
+            worker = self.workers[message.shard]
+            # heartbeats of a killed predecessor may still be queued
+            if message.pid == worker.pid:
+                worker.last_heartbeat = time.monotonic()
+                if worker.last_heartbeat - worker.started_at > self.max_restart_delay:
+                    worker.restarts = 0
+        elif isinstance(message, PollResult):
+            self.latest[message.device] = message
+            if self.sink is not None:
+                self.sink(message)
+
+
+__all__ = [
+    "ResultSink",
+    "WorkerState",
+    "PollingSupervisor",
+]
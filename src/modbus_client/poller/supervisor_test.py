@@ -0,0 +1,88 @@
+import logging
+import multiprocessing.connection
+import multiprocessing.synchronize
+import os
+import struct
+import time
+import unittest
+from typing import List
+from unittest import mock
+
+from modbus_client.cli.system_file import Device, TcpConfig
+from modbus_client.poller.supervisor import PollingSupervisor
+from modbus_client.poller.worker import WorkerConfig, Heartbeat, PollResult
+
+
+def hanging_worker(config: WorkerConfig, connection: multiprocessing.connection.Connection,
+                   stop_event: multiprocessing.synchronize.Event, log_level: int = logging.WARNING) -> None:
+    # a single heartbeat, then the worker stops responding
+    connection.send(Heartbeat(shard=config.shard, pid=os.getpid(), timestamp=time.time()))
+    stop_event.wait()
+
+
+def killed_while_sending_worker(config: WorkerConfig, connection: multiprocessing.connection.Connection,
+                                stop_event: multiprocessing.synchronize.Event, log_level: int = logging.WARNING) -> None:
+    if config.shard == 0:
+        # the header of a 1000 bytes message, but only a part of it, as if killed in the middle of sending it
+        os.write(connection.fileno(), struct.pack("!i", 1000) + b"x" * 10)
+        os._exit(1)
+
+    while not stop_event.is_set():
+        connection.send(Heartbeat(shard=config.shard, pid=os.getpid(), timestamp=time.time()))
+        for device in config.devices:
+            connection.send(PollResult(shard=config.shard, device=device.name, timestamp=time.time(), duration=0.0))
+        stop_event.wait(0.05)
+
+
+def tcp_device(name: str, port: int) -> Device:
+    return Device(name=name, unit=1, device="DDS238", tcp=TcpConfig(host="10.0.0.1", port=port))
+
+
+class PollingSupervisorTest(unittest.TestCase):
+    def run_supervisor(self, supervisor: PollingSupervisor, duration: float) -> List[float]:
+        """
+        Runs the supervisor loop, returns delays of the scheduled restarts.
+        """
+        restart_delays = []
+        supervisor.start()
+        try:
+            end = time.monotonic() + duration
+            while time.monotonic() < end:
+                supervisor.process_messages(timeout=0.05)
+                restarts = [x.restarts for x in supervisor.workers]
+                supervisor.check_workers()
+                for worker, restarts_before in zip(supervisor.workers, restarts):
+                    if worker.restarts > restarts_before:
+                        restart_delays.append(worker.restart_at - time.monotonic())
+        finally:
+            supervisor.stop()
+        return restart_delays
+
+    def test_hanging_worker_restarted(self) -> None:
+        supervisor = PollingSupervisor([tcp_device("meter", 502)], workers=1, heartbeat_timeout=1.0,
+                                       restart_delay=0.5)
+
+        with mock.patch("modbus_client.poller.supervisor.worker_main", hanging_worker):
+            restart_delays = self.run_supervisor(supervisor, 5.0)
+
+        # killed a second after each start, restarted after 0.5 s, then 1 s
+        self.assertGreaterEqual(len(restart_delays), 2)
+        self.assertAlmostEqual(0.5, restart_delays[0], delta=0.1)
+        self.assertAlmostEqual(1.0, restart_delays[1], delta=0.1)
+        self.assertGreater(supervisor.workers[0].last_heartbeat, 0)
+
+    def test_killed_worker_isolated(self) -> None:
+        supervisor = PollingSupervisor([tcp_device("meter1", 502), tcp_device("meter2", 503)], workers=2,
+                                       heartbeat_timeout=5.0, restart_delay=0.5)
+        broken = next(x for x in supervisor.workers if x.config.shard == 0)
+        healthy = next(x for x in supervisor.workers if x.config.shard == 1)
+
+        with mock.patch("modbus_client.poller.supervisor.worker_main", killed_while_sending_worker):
+            restart_delays = self.run_supervisor(supervisor, 2.5)
+
+        self.assertGreaterEqual(broken.restarts, 2)
+        self.assertGreaterEqual(len(restart_delays), 2)
+        # the other worker's channel keeps working
+        self.assertEqual(0, healthy.restarts)
+        device = healthy.config.devices[0].name
+        self.assertLess(time.time() - supervisor.latest[device].timestamp, 0.5)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import multiprocessing.connection
+import multiprocessing.synchronize
+import os
+import time
+from concurrent.futures.thread import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple, Optional
+
+from modbus_client.cli.system_file import Device
+from modbus_client.client.async_modbus_client import AsyncModbusClient
+from modbus_client.client.transport import group_by_transport, create_line_client
+from modbus_client.device.decoder_compiler import DeviceDecoder, compile_decoder
+from modbus_client.device.modbus_device import ModbusDeviceFactory, ModbusDevice
+from modbus_client.poller.shared_table import SharedTablePublisher
+from modbus_client.registers.read_session import WordsMap
+from modbus_client.registers.registers import value_to_json
+
+logger = logging.getLogger("poller_worker")
+
+StopCheckInterval = 0.2
+
+
+@dataclass
+class PollResult:
+    shard: int
+    device: str
+    timestamp: float
+    duration: float
+    values: Dict[str, Any] = field(default_factory=dict)
+    # names of registers which could not be read, with error messages
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Heartbeat:
+    shard: int
+    pid: int
+    timestamp: float
+
+
+@dataclass
+class WorkerConfig:
+    shard: int
+    devices: List[Device]
+    poll_interval: float
+    heartbeat_interval: float
+    # name of the shared memory values table, see `SharedTablePublisher`
+    shared_table: Optional[str] = None
+    # directory caching decoders generated for the polled device models, see `compile_decoder`
+    decoder_cache_dir: Optional[str] = None
+
+
+class SupervisorChannel:
+    """
+    Sends messages to the supervisor over a pipe owned by this worker, so a worker killed in the middle of a message
+    breaks only its own channel. Messages are sent in order from a dedicated thread, so a slow supervisor doesn't
+    block the event loop.
+    """
+
+    def __init__(self, connection: multiprocessing.connection.Connection) -> None:
+        self._connection = connection
+        self._executor = ThreadPoolExecutor(1)
+
+    def send(self, message: Any) -> None:
+        self._executor.submit(self._connection.send, message)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._connection.close()
+
+
+async def poll_device(shard: int, client: AsyncModbusClient, name: str, modbus_device: ModbusDevice,
+                      table: Optional[SharedTablePublisher] = None,
+                      decoder: Optional[DeviceDecoder] = None) -> PollResult:
+    registers = modbus_device.get_device_config().get_all_registers()
+    start = time.perf_counter()
+    result = PollResult(shard=shard, device=name, timestamp=time.time(), duration=0.0)
+
+    values: Dict[str, Any] = {}
+    errors: Dict[str, Exception] = {}
+    words: WordsMap = {}
+    try:
+        read_session = await modbus_device.read_session(client, registers, partial=True)
+        words = read_session.registers_dict
+        if decoder is not None:
+            # registers with missing words are left out by the decoder
+            values = decoder(words)
+            for register in registers:
+                if register.name not in values:
+                    error = read_session.get_register_error(modbus_device.create_modbus_register(register))
+                    errors[register.name] = error if error is not None else Exception("register not read")
+        else:
+            for register in registers:
+                modbus_register = modbus_device.create_modbus_register(register)
+                error = read_session.get_register_error(modbus_register)
+                if error is not None:
+                    errors[register.name] = error
+                else:
+                    values[register.name] = modbus_register.get_value_from_read_session(read_session)
+    except Exception as e:
+        errors = {x.name: e for x in registers}
+
+    if table is not None:
+        table.publish(name, result.timestamp, words, values)
+
+    result.values = {k: value_to_json(v) for k, v in values.items()}
+    result.errors = {k: str(v) for k, v in errors.items()}
+    result.duration = time.perf_counter() - start
+    return result
+
+
+async def poll_line(config: WorkerConfig, client: AsyncModbusClient,
+                    devices: List[Tuple[str, ModbusDevice, DeviceDecoder]], channel: SupervisorChannel,
+                    table: Optional[SharedTablePublisher]) -> None:
+    """
+    Polls devices sharing a transport one after another, every `poll_interval` seconds.
+    """
+    while True:
+        start = time.monotonic()
+        for name, modbus_device, decoder in devices:
+            channel.send(await poll_device(config.shard, client, name, modbus_device, table, decoder))
+        await asyncio.sleep(max(0.0, config.poll_interval - (time.monotonic() - start)))
+
+
+async def send_heartbeats(config: WorkerConfig, channel: SupervisorChannel) -> None:
+    # sent from the event loop, so a blocked loop stops the heartbeats too
+    while True:
+        channel.send(Heartbeat(shard=config.shard, pid=os.getpid(), timestamp=time.time()))
+        await asyncio.sleep(config.heartbeat_interval)
+
+
+async def wait_for_stop(stop_event: multiprocessing.synchronize.Event) -> None:
+    while not stop_event.is_set():
+        await asyncio.sleep(StopCheckInterval)
+
+
+async def run_shard(config: WorkerConfig, channel: SupervisorChannel,
+                    stop_event: multiprocessing.synchronize.Event) -> None:
+    factories: Dict[str, ModbusDeviceFactory] = {}
+    decoders: Dict[str, DeviceDecoder] = {}
+    clients: List[AsyncModbusClient] = []
+    tasks: List["asyncio.Task[None]"] = [asyncio.create_task(send_heartbeats(config, channel))]
+    table = SharedTablePublisher.attach(config.shared_table) if config.shared_table is not None else None
+
+    for line_devices in group_by_transport(config.devices).values():
+        devices: List[Tuple[str, ModbusDevice, DeviceDecoder]] = []
+        for device in line_devices:
+            if device.device not in factories:
+                factories[device.device] = ModbusDeviceFactory.from_file(device.device)
+                decoders[device.device] = compile_decoder(factories[device.device].get_device_config(),
+                                                          config.decoder_cache_dir)
+            devices.append((device.name, factories[device.device].create_device(device.unit),
+                            decoders[device.device]))
+
+        client = create_line_client(line_devices, [x.get_device_config() for _, x, _ in devices])
+        clients.append(client)
+        tasks.append(asyncio.create_task(poll_line(config, client, devices, channel, table)))
+
+    stop_task = asyncio.create_task(wait_for_stop(stop_event))
+    try:
+        done, _ = await asyncio.wait([stop_task, *tasks], return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task is not stop_task:
+                # a line task ended, which only happens on an unexpected error, let the supervisor restart the worker
+                task.result()
+    finally:
+        for task in [stop_task, *tasks]:
+            task.cancel()
+        for client in clients:
+            client.close()
+        if table is not None:
+            table.close()
+
+
+def worker_main(config: WorkerConfig, connection: multiprocessing.connection.Connection,
+                stop_event: multiprocessing.synchronize.Event, log_level: int = logging.WARNING) -> None:
+    """
+    Entry point of a worker process polling a single shard, sending results and heartbeats over `connection`.
+    """
+    logging.basicConfig(level=log_level, format=f"%(asctime)s [shard {config.shard}] %(levelname)s %(message)s")
+    channel = SupervisorChannel(connection)
+    try:
+        asyncio.run(run_shard(config, channel, stop_event))
+    finally:
+        channel.close()
+
+
+__all__ = [
+    "PollResult",
+    "Heartbeat",
+    "WorkerConfig",
+    "SupervisorChannel",
+    "poll_device",
+    "worker_main",
+]
@@ -0,0 +1,104 @@
+import struct
+from typing import List, Tuple
+
+from modbus_client.protocol.pdu import get_request_pdu_length, ModbusProtocolException
+
+MbapHeaderSize = 7
+MaxPduSize = 253
+
+
+class InvalidFrameException(Exception):
+    pass
+
+
+def _build_crc16_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
+_crc16_table = _build_crc16_table()
+
+
+def crc16(data: bytes) -> int:
+    crc = 0xFFFF
+    for byte in data:
+        crc = (crc >> 8) ^ _crc16_table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def encode_rtu_frame(unit: int, pdu: bytes) -> bytes:
+    frame = bytes((unit,)) + pdu
+    return frame + struct.pack("<H", crc16(frame))
+
+
+def encode_mbap_frame(transaction_id: int, unit: int, pdu: bytes) -> bytes:
+    return struct.pack(">HHHB", transaction_id, 0, len(pdu) + 1, unit) + pdu
+
+
+def decode_mbap_header(header: bytes) -> Tuple[int, int, int, int]:
+    """
+    Returns (transaction_id, protocol_id, pdu_length, unit) for a 7-byte MBAP header. Raises InvalidFrameException
+    if the length field does not cover the unit and a function code or exceeds the maximum PDU size.
+    """
+    transaction_id, protocol_id, length, unit = struct.unpack(">HHHB", header)
+    if not 2 <= length <= MaxPduSize + 1:
+        raise InvalidFrameException(f"invalid MBAP length {length}")
+    return transaction_id, protocol_id, length - 1, unit
+
+
+class RtuRequestFramer:
+    """
+    Splits a stream of bytes into RTU request frames. Frames with invalid CRC (or garbage between frames) are
+    skipped byte by byte until the stream resynchronizes.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        self._buffer += data
+
+        frames: List[Tuple[int, bytes]] = []
+        while len(self._buffer) >= 4:
+            try:
+                pdu_length = get_request_pdu_length(bytes(self._buffer[1:]))
+            except ModbusProtocolException:
+                del self._buffer[0]
+                continue
+
+            if pdu_length is None:
+                break
+
+            frame_length = 1 + pdu_length + 2
+            if len(self._buffer) < frame_length:
+                break
+
+            frame = bytes(self._buffer[:frame_length])
+            if crc16(frame[:-2]) == struct.unpack("<H", frame[-2:])[0]:
+                frames.append((frame[0], frame[1:-2]))
+                del self._buffer[:frame_length]
+            else:
+                del self._buffer[0]
+
+        return frames
+
+    def reset(self) -> None:
+        self._buffer.clear()
+
+
+__all__ = [
+    "InvalidFrameException",
+    "crc16",
+    "encode_rtu_frame",
+    "encode_mbap_frame",
+    "decode_mbap_header",
+    "RtuRequestFramer",
+]
@@ -0,0 +1,40 @@
+import unittest
+
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode
+from modbus_client.protocol.framing import crc16, encode_rtu_frame, RtuRequestFramer
+from modbus_client.protocol.pdu import decode_request, encode_response, encode_exception_response, ModbusRequest
+
+
+class FramingTest(unittest.TestCase):
+    def test_crc16(self) -> None:
+        # read holding registers, unit 1, address 0, count 1
+        self.assertEqual(b"\x01\x03\x00\x00\x00\x01\x84\x0a", encode_rtu_frame(1, b"\x03\x00\x00\x00\x01"))
+        self.assertEqual(0x4B37, crc16(b"123456789"))
+
+    def test_rtu_framer_split(self) -> None:
+        frame = encode_rtu_frame(5, b"\x04\x00\x10\x00\x02")
+
+        framer = RtuRequestFramer()
+        self.assertEqual([], framer.feed(frame[:3]))
+        self.assertEqual([(5, frame[1:-2])], framer.feed(frame[3:]))
+
+    def test_rtu_framer_resync(self) -> None:
+        frame1 = encode_rtu_frame(1, b"\x06\x00\x01\x12\x34")
+        frame2 = encode_rtu_frame(2, b"\x10\x00\x01\x00\x02\x04\x00\x01\x00\x02")
+
+        framer = RtuRequestFramer()
+        frames = framer.feed(b"\xff\x00" + frame1 + frame2)
+        self.assertEqual([(1, frame1[1:-2]), (2, frame2[1:-2])], frames)
+
+    def test_pdu(self) -> None:
+        request = decode_request(b"\x10\x00\x01\x00\x02\x04\x00\x01\x00\x02")
+        self.assertEqual(ModbusRequest(ModbusFunctionCode.WriteMultipleRegisters, 1, 2, [1, 2]), request)
+        self.assertEqual(b"\x10\x00\x01\x00\x02", encode_response(request, []))
+
+        request = decode_request(b"\x03\x00\x00\x00\x02")
+        self.assertEqual(b"\x03\x04\x12\x34\x56\x78", encode_response(request, [0x1234, 0x5678]))
+
+        request = decode_request(b"\x01\x00\x00\x00\x0a")
+        self.assertEqual(b"\x01\x02\x05\x02", encode_response(request, [1, 0, 1, 0, 0, 0, 0, 0, 0, 1]))
+
+        self.assertEqual(b"\x83\x02", encode_exception_response(0x03, ModbusExceptionCode.IllegalDataAddress))
@@ -0,0 +1,147 @@
+import struct
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from modbus_client.client.types import ModbusFunctionCode, ModbusExceptionCode, ModbusRegisterType
+
+ExceptionOffset = 0x80
+
+ReadFunctionCodes = (
+    ModbusFunctionCode.ReadCoils,
+    ModbusFunctionCode.ReadDiscreteInputs,
+    ModbusFunctionCode.ReadHoldingRegisters,
+    ModbusFunctionCode.ReadInputRegisters,
+)
+
+ReadFunctionRegisterTypes = {
+    ModbusFunctionCode.ReadCoils: ModbusRegisterType.Coil,
+    ModbusFunctionCode.ReadDiscreteInputs: ModbusRegisterType.DiscreteInputs,
+    ModbusFunctionCode.ReadHoldingRegisters: ModbusRegisterType.HoldingRegister,
+    ModbusFunctionCode.ReadInputRegisters: ModbusRegisterType.InputRegister,
+}
+
+WriteFunctionRegisterTypes = {
+    ModbusFunctionCode.WriteSingleCoil: ModbusRegisterType.Coil,
+    ModbusFunctionCode.WriteMultipleCoils: ModbusRegisterType.Coil,
+    ModbusFunctionCode.WriteSingleRegister: ModbusRegisterType.HoldingRegister,
+    ModbusFunctionCode.WriteMultipleRegisters: ModbusRegisterType.HoldingRegister,
+}
+
+
+class ModbusProtocolException(Exception):
+    def __init__(self, exception_code: ModbusExceptionCode) -> None:
+        super().__init__(exception_code.name)
+        self.exception_code = exception_code
+
+
+@dataclass
+class ModbusRequest:
+    function_code: ModbusFunctionCode
+    address: int
+    count: int
+    values: List[int] = field(default_factory=list)
+
+    def is_read(self) -> bool:
+        return self.function_code in ReadFunctionCodes
+
+
+def _pack_bits(bits: List[int]) -> bytes:
+    data = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            data[i // 8] |= 1 << (i % 8)
+    return bytes(data)
+
+
+def _unpack_bits(data: bytes, count: int) -> List[int]:
+    return [(data[i // 8] >> (i % 8)) & 0x01 for i in range(count)]
+
+
+def get_request_pdu_length(data: bytes) -> Optional[int]:
+    """
+    Returns the full length of the request PDU starting at the beginning of `data`, or None if more bytes are needed
+    to tell. Raises ModbusProtocolException for function codes this module doesn't understand.
+    """
+    if len(data) < 1:
+        return None
+
+    function_code = data[0]
+    if function_code in (ModbusFunctionCode.ReadCoils, ModbusFunctionCode.ReadDiscreteInputs,
+                         ModbusFunctionCode.ReadHoldingRegisters, ModbusFunctionCode.ReadInputRegisters,
+                         ModbusFunctionCode.WriteSingleCoil, ModbusFunctionCode.WriteSingleRegister):
+        return 5
+    elif function_code in (ModbusFunctionCode.WriteMultipleCoils, ModbusFunctionCode.WriteMultipleRegisters):
+        if len(data) < 6:
+            return None
+        return 6 + data[5]
+    else:
+        raise ModbusProtocolException(ModbusExceptionCode.IllegalFunction)
+
+
+def decode_request(pdu: bytes) -> ModbusRequest:
+    if len(pdu) < 1:
+        raise ModbusProtocolException(ModbusExceptionCode.IllegalFunction)
+
+    try:
+        function_code = ModbusFunctionCode(pdu[0])
+    except ValueError:
+        raise ModbusProtocolException(ModbusExceptionCode.IllegalFunction)
+
+    try:
+        if function_code in ReadFunctionCodes:
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            if count < 1 or count > (2000 if function_code in (ModbusFunctionCode.ReadCoils,
+                                                                ModbusFunctionCode.ReadDiscreteInputs) else 125):
+                raise ModbusProtocolException(ModbusExceptionCode.IllegalDataValue)
+            return ModbusRequest(function_code, address, count)
+        elif function_code == ModbusFunctionCode.WriteSingleCoil:
+            address, value = struct.unpack_from(">HH", pdu, 1)
+            if value not in (0x0000, 0xFF00):
+                raise ModbusProtocolException(ModbusExceptionCode.IllegalDataValue)
+            return ModbusRequest(function_code, address, 1, [1 if value == 0xFF00 else 0])
+        elif function_code == ModbusFunctionCode.WriteSingleRegister:
+            address, value = struct.unpack_from(">HH", pdu, 1)
+            return ModbusRequest(function_code, address, 1, [value])
+        elif function_code == ModbusFunctionCode.WriteMultipleCoils:
+            address, count, byte_count = struct.unpack_from(">HHB", pdu, 1)
+            if byte_count != (count + 7) // 8 or len(pdu) != 6 + byte_count:
+                raise ModbusProtocolException(ModbusExceptionCode.IllegalDataValue)
+            return ModbusRequest(function_code, address, count, _unpack_bits(pdu[6:], count))
+        else:
+            address, count, byte_count = struct.unpack_from(">HHB", pdu, 1)
+            if byte_count != count * 2 or len(pdu) != 6 + byte_count:
+                raise ModbusProtocolException(ModbusExceptionCode.IllegalDataValue)
+            return ModbusRequest(function_code, address, count, list(struct.unpack_from(f">{count}H", pdu, 6)))
+    except struct.error:
+        raise ModbusProtocolException(ModbusExceptionCode.IllegalDataValue)
+
+
+def encode_response(request: ModbusRequest, values: List[int]) -> bytes:
+    fc = request.function_code
+    if fc in (ModbusFunctionCode.ReadCoils, ModbusFunctionCode.ReadDiscreteInputs):
+        data = _pack_bits(values)
+        return struct.pack(">BB", fc, len(data)) + data
+    elif fc in (ModbusFunctionCode.ReadHoldingRegisters, ModbusFunctionCode.ReadInputRegisters):
+        return struct.pack(f">BB{len(values)}H", fc, len(values) * 2, *values)
+    elif fc == ModbusFunctionCode.WriteSingleCoil:
+        return struct.pack(">BHH", fc, request.address, 0xFF00 if request.values[0] else 0x0000)
+    elif fc == ModbusFunctionCode.WriteSingleRegister:
+        return struct.pack(">BHH", fc, request.address, request.values[0])
+    else:
+        return struct.pack(">BHH", fc, request.address, request.count)
+
+
+def encode_exception_response(function_code: int, exception_code: ModbusExceptionCode) -> bytes:
+    return struct.pack(">BB", (function_code | ExceptionOffset) & 0xFF, exception_code)
+
+
+__all__ = [
+    "ReadFunctionRegisterTypes",
+    "WriteFunctionRegisterTypes",
+    "ModbusProtocolException",
+    "ModbusRequest",
+    "get_request_pdu_length",
+    "decode_request",
+    "encode_response",
+    "encode_exception_response",
+]
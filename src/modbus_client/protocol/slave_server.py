@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import tty
+from typing import List, Optional, Protocol, Set, Dict, Callable, Awaitable, Coroutine, Any
+
+from modbus_client.protocol.framing import RtuRequestFramer, encode_rtu_frame, encode_mbap_frame, decode_mbap_header, \
+    MbapHeaderSize, InvalidFrameException
+from modbus_client.protocol.pdu import ModbusRequest, ModbusProtocolException, decode_request, encode_response, \
+    encode_exception_response
+
+BroadcastUnit = 0
+
+logger = logging.getLogger("modbus_slave")
+
+
+class ModbusRequestHandler(Protocol):
+    async def handle_request(self, unit: int, request: ModbusRequest) -> Optional[List[int]]:
+        """
+        Returns values for read requests (ignored for writes) or None if the unit should stay silent, like a device
+        that is not present on the bus. Raise ModbusProtocolException to send an exception response.
+        """
+        ...
+
+
+async def process_request_pdu(handler: ModbusRequestHandler, unit: int, pdu: bytes) -> Optional[bytes]:
+    try:
+        request = decode_request(pdu)
+        values = await handler.handle_request(unit, request)
+    except ModbusProtocolException as e:
+        return encode_exception_response(pdu[0] if len(pdu) > 0 else 0, e.exception_code)
+
+    if values is None:
+        return None
+
+    return encode_response(request, values)
+
+
+class ModbusSlaveServer:
+    """
+    Minimal asyncio Modbus slave transport serving requests with the provided handler over Modbus TCP,
+    RTU-over-TCP and RTU on a pseudo-terminal.
+    """
+
+    def __init__(self, handler: ModbusRequestHandler) -> None:
+        self._handler = handler
+        self._servers: List[asyncio.AbstractServer] = []
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._connections: Dict[asyncio.StreamWriter, "asyncio.Task[Any]"] = {}
+        self._pty_fds: List[int] = []
+        self._pty_links: List[str] = []
+
+    async def start_tcp(self, host: str, port: int) -> int:
+        server = await asyncio.start_server(self._serve_tcp_connection, host, port)
+        self._servers.append(server)
+        return int(server.sockets[0].getsockname()[1])
+
+    async def start_rtu_over_tcp(self, host: str, port: int) -> int:
+        server = await asyncio.start_server(self._serve_rtu_over_tcp_connection, host, port)
+        self._servers.append(server)
+        return int(server.sockets[0].getsockname()[1])
+
+    def start_rtu_pty(self, link: Optional[str] = None) -> str:
+        """
+        Opens a pseudo-terminal pair, serves RTU on the master side and returns the path of the slave side
+        (or `link`, if given, which is created as a symlink to it).
+        """
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        os.set_blocking(master_fd, False)
+        self._pty_fds += [master_fd, slave_fd]
+
+        path = os.ttyname(slave_fd)
+        if link is not None:
+            if os.path.islink(link):
+                os.unlink(link)
+            os.symlink(path, link)
+            self._pty_links.append(link)
+            path = link
+
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def on_readable() -> None:
+            try:
+                queue.put_nowait(os.read(master_fd, 4096))
+            except OSError:
+                pass
+
+        loop.add_reader(master_fd, on_readable)
+
+        async def write(data: bytes) -> None:
+            os.write(master_fd, data)
+
+        self._spawn(self._serve_rtu_stream(queue.get, write))
+        return path
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+        # closing the transports makes connection handlers finish on their own
+        connection_tasks = list(self._connections.values())
+        for writer in list(self._connections.keys()):
+            writer.close()
+        if len(connection_tasks) > 0:
+            await asyncio.wait(connection_tasks, timeout=1)
+        for task in list(self._tasks):
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        for i, fd in enumerate(self._pty_fds):
+            if i % 2 == 0:
+                loop.remove_reader(fd)
+            os.close(fd)
+        for link in self._pty_links:
+            if os.path.islink(link):
+                os.unlink(link)
+        self._servers.clear()
+        self._pty_fds.clear()
+        self._pty_links.clear()
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _add_connection(self, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[writer] = task
+
+    async def _serve_tcp_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._add_connection(writer)
+        try:
+            while True:
+                header = await reader.readexactly(MbapHeaderSize)
+                transaction_id, protocol_id, pdu_length, unit = decode_mbap_header(header)
+                pdu = await reader.readexactly(pdu_length)
+                if protocol_id != 0:
+                    continue
+
+                response = await process_request_pdu(self._handler, unit, pdu)
+                if response is not None:
+                    writer.write(encode_mbap_frame(transaction_id, unit, response))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except InvalidFrameException as e:
+            # the stream cannot be resynchronized after a broken header
+            logger.warning(f"closing TCP connection: {e}")
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _serve_rtu_over_tcp_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def read() -> bytes:
+            data = await reader.read(4096)
+            if len(data) == 0:
+                raise ConnectionError("connection closed")
+            return data
+
+        async def write(data: bytes) -> None:
+            writer.write(data)
+            await writer.drain()
+
+        self._add_connection(writer)
+        try:
+            await self._serve_rtu_stream(read, write)
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _serve_rtu_stream(self, read: Callable[[], Awaitable[bytes]],
+                                write: Callable[[bytes], Awaitable[None]]) -> None:
+        # requests on a serial line are strictly sequential, so frames are processed one by one
+        framer = RtuRequestFramer()
+        while True:
+            for unit, pdu in framer.feed(await read()):
+                response = await process_request_pdu(self._handler, unit, pdu)
+                if response is not None and unit != BroadcastUnit:
+                    await write(encode_rtu_frame(unit, response))
+
+
+__all__ = [
+    "ModbusRequestHandler",
+    "ModbusSlaveServer",
+    "process_request_pdu",
+]
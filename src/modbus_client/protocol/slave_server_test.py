@@ -0,0 +1,57 @@
+import asyncio
+import struct
+import unittest
+from typing import List, Optional
+
+from modbus_client.client.types import ModbusExceptionCode
+from modbus_client.protocol.framing import encode_mbap_frame, decode_mbap_header, InvalidFrameException
+from modbus_client.protocol.pdu import ModbusRequest, ModbusProtocolException
+from modbus_client.protocol.slave_server import ModbusSlaveServer
+
+
+class RegistersHandler:
+    def __init__(self) -> None:
+        self.registers = {0: 0x1234, 1: 0x5678}
+
+    async def handle_request(self, unit: int, request: ModbusRequest) -> Optional[List[int]]:
+        if unit != 1:
+            return None
+        if not all(x in self.registers for x in range(request.address, request.address + request.count)):
+            raise ModbusProtocolException(ModbusExceptionCode.IllegalDataAddress)
+        return [self.registers[x] for x in range(request.address, request.address + request.count)]
+
+
+class ModbusSlaveServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = ModbusSlaveServer(RegistersHandler())
+        port = await self.server.start_tcp("127.0.0.1", 0)
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def asyncTearDown(self) -> None:
+        self.writer.close()
+        await self.server.close()
+
+    async def read_response(self) -> bytes:
+        header = await asyncio.wait_for(self.reader.readexactly(7), 2)
+        pdu_length = decode_mbap_header(header)[2]
+        return header + await asyncio.wait_for(self.reader.readexactly(pdu_length), 2)
+
+    async def test_tcp_round_trip(self) -> None:
+        self.writer.write(encode_mbap_frame(0x0102, 1, b"\x03\x00\x00\x00\x02"))
+        self.assertEqual(encode_mbap_frame(0x0102, 1, b"\x03\x04\x12\x34\x56\x78"), await self.read_response())
+
+        self.writer.write(encode_mbap_frame(7, 1, b"\x03\x00\x05\x00\x01"))
+        self.assertEqual(encode_mbap_frame(7, 1, b"\x83\x02"), await self.read_response())
+
+        # a silent unit is followed by the response to the next request
+        self.writer.write(encode_mbap_frame(8, 2, b"\x03\x00\x00\x00\x01"))
+        self.writer.write(encode_mbap_frame(9, 1, b"\x03\x00\x01\x00\x01"))
+        self.assertEqual(encode_mbap_frame(9, 1, b"\x03\x02\x56\x78"), await self.read_response())
+
+    async def test_invalid_length_closes_connection(self) -> None:
+        for length in (0, 1, 300):
+            with self.assertRaises(InvalidFrameException):
+                decode_mbap_header(struct.pack(">HHHB", 1, 0, length, 1))
+
+        self.writer.write(struct.pack(">HHHB", 1, 0, 0, 1))
+        self.assertEqual(b"", await asyncio.wait_for(self.reader.read(), 2))
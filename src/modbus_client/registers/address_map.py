@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Set, Iterable, Tuple
+
+import yaml
+
+from modbus_client.client.types import ModbusRegisterType, ModbusExceptionCode
+from modbus_client.registers.address_range import AddressRange, BridgePredicate
+
+logger = logging.getLogger("address_map")
+
+ReadableRanges = Dict[ModbusRegisterType, List[AddressRange]]
+
+# exceptions devices send for addresses they don't implement, some use other codes than IllegalDataAddress
+UnreadableExceptionCodes = (ModbusExceptionCode.IllegalDataAddress, ModbusExceptionCode.IllegalDataValue,
+                            ModbusExceptionCode.SlaveDeviceFailure)
+# of these, exceptions also sent for transient failures, holes rejected with them are learned only if it repeats
+AmbiguousExceptionCodes = (ModbusExceptionCode.SlaveDeviceFailure,)
+AmbiguousRejectionsToLearn = 2
+
+_ranges_file_keys = {
+    "coils": ModbusRegisterType.Coil,
+    "discrete_inputs": ModbusRegisterType.DiscreteInputs,
+    "input_registers": ModbusRegisterType.InputRegister,
+    "holding_registers": ModbusRegisterType.HoldingRegister,
+}
+
+
+def format_address_range(rng: AddressRange) -> str:
+    if rng.count == 1:
+        return f"0x{rng.first_address:04x}"
+    return f"0x{rng.first_address:04x}-0x{rng.last_address:04x}"
+
+
+def parse_address_range(value: str) -> AddressRange:
+    m = re.match(r"^\s*(0x[0-9a-fA-F]+|[0-9]+)\s*(?:-\s*(0x[0-9a-fA-F]+|[0-9]+)\s*)?$", value)
+    if m is None:
+        raise ValueError(f"invalid address range /{value}/")
+    first = int(m.group(1), 0)
+    last = int(m.group(2), 0) if m.group(2) is not None else first
+    if last < first:
+        raise ValueError(f"invalid address range /{value}/")
+    return AddressRange(first, last - first + 1)
+
+
+def group_addresses(addresses: Iterable[int]) -> List[AddressRange]:
+    ranges: List[AddressRange] = []
+    for address in sorted(addresses):
+        if len(ranges) > 0 and ranges[-1].last_address + 1 == address:
+            ranges[-1].count += 1
+        else:
+            ranges.append(AddressRange(address, 1))
+    return ranges
+
+
+def load_readable_ranges(path: str) -> ReadableRanges:
+    """
+    Loads a readable ranges file, a YAML mapping of register types (`input_registers`, `holding_registers`, ...) to
+    lists of protocol (zero-based) address ranges like `0x0000-0x0031`.
+    """
+    with open(path, "rt") as f:
+        data = yaml.load(f, Loader=yaml.SafeLoader) or {}
+
+    ranges: ReadableRanges = {}
+    for key, values in data.items():
+        if key not in _ranges_file_keys:
+            raise ValueError(f"unknown register type /{key}/")
+        ranges[_ranges_file_keys[key]] = [parse_address_range(str(x)) for x in values]
+    return ranges
+
+
+def save_readable_ranges(path: str, ranges: ReadableRanges) -> None:
+    data = {key: [format_address_range(x) for x in ranges[reg_type]]
+            for key, reg_type in _ranges_file_keys.items() if reg_type in ranges}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wt") as f:
+        yaml.dump(data, f, sort_keys=False)
+    os.replace(tmp_path, path)
+
+
+class AddressMap:
+    """
+    Known layout of the address space of a device model, used by the read planner to decide which holes between
+    registers can be read over. For register types with known readable ranges, holes are bridged only within them.
+    Addresses found unreadable while reading (see `mark_unreadable`) are never bridged. With `set_learned_file`, they
+    are persisted, so they don't have to be learned again after a restart.
+    """
+
+    def __init__(self, readable: Optional[ReadableRanges] = None) -> None:
+        self.readable: ReadableRanges = readable if readable is not None else {}
+        self.unreadable: Dict[ModbusRegisterType, Set[int]] = {}
+        self._learned_file: Optional[str] = None
+        # holes rejected with an ambiguous exception code -> number of rejections
+        self._suspected: Dict[Tuple[ModbusRegisterType, int, int], int] = {}
+
+    def can_bridge(self, reg_type: ModbusRegisterType, first: int, last: int) -> bool:
+        unreadable = self.unreadable.get(reg_type)
+        if unreadable is not None and any(x in unreadable for x in range(first, last + 1)):
+            return False
+
+        ranges = self.readable.get(reg_type)
+        if ranges is None:
+            return True
+        return any(x.first_address <= first and last <= x.last_address for x in ranges)
+
+    def get_bridge_predicate(self, reg_type: ModbusRegisterType) -> BridgePredicate:
+        return lambda first, last: self.can_bridge(reg_type, first, last)
+
+    def mark_unreadable(self, reg_type: ModbusRegisterType, first: int, last: int) -> None:
+        """
+        Records that a read spanning `first`-`last` was rejected, while the addresses around it are readable.
+        """
+        unreadable = self.unreadable.setdefault(reg_type, set())
+        addresses = set(range(first, last + 1))
+        if addresses <= unreadable:
+            return
+        unreadable.update(addresses)
+        logger.info(f"{reg_type.name} 0x{first:04x}-0x{last:04x} marked unreadable")
+
+        if self._learned_file is not None:
+            save_readable_ranges(self._learned_file, {k: group_addresses(v) for k, v in self.unreadable.items()})
+
+    def record_rejected_hole(self, reg_type: ModbusRegisterType, first: int, last: int,
+                             exception_code: Optional[int]) -> None:
+        """
+        Records that a read spanning `first`-`last` was rejected with `exception_code`, while the addresses around it
+        are readable. Holes rejected with an ambiguous code are marked unreadable only after being rejected
+        `AmbiguousRejectionsToLearn` times without being read successfully in between.
+        """
+        if exception_code in AmbiguousExceptionCodes:
+            key = (reg_type, first, last)
+            rejections = self._suspected.get(key, 0) + 1
+            if rejections < AmbiguousRejectionsToLearn:
+                self._suspected[key] = rejections
+                return
+            self._suspected.pop(key, None)
+        self.mark_unreadable(reg_type, first, last)
+
+    def record_readable(self, reg_type: ModbusRegisterType, first: int, last: int) -> None:
+        """
+        Records that `first`-`last` was read, clearing suspected holes within it.
+        """
+        if len(self._suspected) == 0:
+            return
+        for key in [x for x in self._suspected if x[0] == reg_type and first <= x[1] and x[2] <= last]:
+            del self._suspected[key]
+
+    def set_learned_file(self, path: Optional[str]) -> None:
+        """
+        Loads unreadable addresses from `path` (in the readable ranges file format) if it exists and saves them there
+        whenever new ones are learned.
+        """
+        self._learned_file = path
+        if path is None or not os.path.exists(path):
+            return
+
+        for reg_type, ranges in load_readable_ranges(path).items():
+            unreadable = self.unreadable.setdefault(reg_type, set())
+            for rng in ranges:
+                unreadable.update(range(rng.first_address, rng.last_address + 1))
+
+
+__all__ = [
+    "ReadableRanges",
+    "UnreadableExceptionCodes",
+    "AmbiguousExceptionCodes",
+    "AmbiguousRejectionsToLearn",
+    "format_address_range",
+    "parse_address_range",
+    "group_addresses",
+    "load_readable_ranges",
+    "save_readable_ranges",
+    "AddressMap",
+]
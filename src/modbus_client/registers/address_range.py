@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional, Sequence, Protocol
+from typing import List, Optional, Sequence, Protocol, Callable, Tuple
 
 
 class AddressRangeTrait(Protocol):
@@ -28,8 +28,16 @@ class AddressRange(AddressRangeTrait):
         return self.address + self.count - 1
 
 
-def merge_address_ranges(registers: Sequence[AddressRangeTrait], allow_holes: bool, max_read_size: int) \
-        -> List[AddressRange]:
+# first and last address of a hole
+BridgePredicate = Callable[[int, int], bool]
+
+
+def merge_address_ranges(registers: Sequence[AddressRangeTrait], allow_holes: bool, max_read_size: int,
+                         can_bridge: Optional[BridgePredicate] = None) -> List[AddressRange]:
+    """
+    Merges register address ranges into as few reads as possible. With `allow_holes`, reads may span addresses not
+    belonging to any register, if `can_bridge` (when given) accepts the hole.
+    """
     buckets: List[AddressRange] = []
     cur_rng: Optional[AddressRange] = None
 
@@ -44,7 +52,11 @@ def merge_address_ranges(registers: Sequence[AddressRangeTrait], allow_holes: bo
         else:
             diff = rng.first_address - cur_rng.last_address
             to_add = rng.last_address - cur_rng.last_address
-            if (diff <= 1 or allow_holes) and cur_rng.count + to_add <= max_read_size:
+            if diff <= 1:
+                mergeable = True
+            else:
+                mergeable = allow_holes and (can_bridge is None or can_bridge(cur_rng.last_address + 1, rng.first_address - 1))
+            if mergeable and cur_rng.count + to_add <= max_read_size:
                 cur_rng.count += to_add
             else:
                 buckets.append(cur_rng)
@@ -56,7 +68,34 @@ def merge_address_ranges(registers: Sequence[AddressRangeTrait], allow_holes: bo
     return buckets
 
 
+def split_at_largest_hole(registers: Sequence[AddressRangeTrait]) \
+        -> Optional[Tuple[AddressRange, AddressRange, AddressRange]]:
+    """
+    Splits the span of given registers at the largest hole not covered by any of them. Returns the spans of the
+    registers before the hole, the hole and the spans of the registers after it, or None if the registers have no holes.
+    """
+    hole: Optional[AddressRange] = None
+    covered_first: Optional[int] = None
+    covered_last = 0
+    for register in sorted(registers, key=lambda x: (x.get_address(), -x.get_count())):
+        first = register.get_address()
+        last = first + register.get_count() - 1
+        if covered_first is None:
+            covered_first = first
+        elif first > covered_last + 1 and (hole is None or first - covered_last - 1 > hole.count):
+            hole = AddressRange(covered_last + 1, first - covered_last - 1)
+        covered_last = max(covered_last, last)
+
+    if hole is None or covered_first is None:
+        return None
+    return (AddressRange(covered_first, hole.first_address - covered_first),
+            hole,
+            AddressRange(hole.last_address + 1, covered_last - hole.last_address))
+
+
 __all__ = [
     "AddressRange",
+    "BridgePredicate",
     "merge_address_ranges",
+    "split_at_largest_hole",
 ]
@@ -1,17 +1,19 @@
 import unittest
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 
-from modbus_client.registers.address_range import AddressRange, merge_address_ranges
+from modbus_client.registers.address_range import AddressRange, merge_address_ranges, BridgePredicate, \
+    split_at_largest_hole
 
 
 # tests use (start, end) tuples instead of (start, count)
 
 class AddressRangesTest(unittest.TestCase):
     def _test_range(self, expected_output: List[Tuple[int, int]], ranges: List[Tuple[int, int]], allow_holes: bool,
-                    max_read_size: int = 10) -> None:
+                    max_read_size: int = 10, can_bridge: Optional[BridgePredicate] = None) -> None:
         address_ranges = [AddressRange(x[0], x[1] - x[0] + 1) for x in ranges]
 
-        res = merge_address_ranges(address_ranges, allow_holes=allow_holes, max_read_size=max_read_size)
+        res = merge_address_ranges(address_ranges, allow_holes=allow_holes, max_read_size=max_read_size,
+                                   can_bridge=can_bridge)
         res_tuples = [(x.address, x.address + x.count - 1) for x in res]
 
         self.assertEqual(expected_output, res_tuples)
@@ -54,3 +56,23 @@ class AddressRangesTest(unittest.TestCase):
 
     def test_max_read_no_holes(self) -> None:
         self._test_range([(0, 4), (4, 6)], [(0, 2), (2, 4), (4, 6)], allow_holes=False, max_read_size=5)
+
+    def test_can_bridge(self) -> None:
+        holes: List[Tuple[int, int]] = []
+
+        def can_bridge(first: int, last: int) -> bool:
+            holes.append((first, last))
+            return first > 5
+
+        self._test_range([(0, 1), (5, 12)], [(0, 1), (5, 6), (10, 12)], allow_holes=True, max_read_size=100,
+                         can_bridge=can_bridge)
+        self.assertEqual([(2, 4), (7, 9)], holes)
+
+    def test_split_at_largest_hole(self) -> None:
+        def split(ranges: List[Tuple[int, int]]) -> Optional[List[Tuple[int, int]]]:
+            res = split_at_largest_hole([AddressRange(x[0], x[1] - x[0] + 1) for x in ranges])
+            return None if res is None else [(x.first_address, x.last_address) for x in res]
+
+        self.assertIsNone(split([(0, 1), (2, 5), (1, 3)]))
+        self.assertEqual([(0, 3), (4, 4), (5, 6)], split([(5, 6), (0, 1), (2, 3)]))
+        self.assertEqual([(0, 6), (7, 9), (10, 10)], split([(0, 1), (3, 4), (2, 6), (10, 10)]))
@@ -0,0 +1,85 @@
+from functools import lru_cache
+from typing import Sequence, List, Optional, Tuple
+
+BitsArray = List[int]
+
+LutChunkBits = 8
+
+
+class Bitfield:
+    """
+    A field stored in bits of a word, bit `i` of the field being bit `bits[i]` of the word. Contiguous fields (all
+    fields parsed from `bits=hi:lo`) are extracted and inserted with a single shift and mask, other layouts use lookup
+    tables translating the word (or the field value) a byte at a time.
+    """
+
+    __slots__ = ("bits", "shift", "mask", "word_mask", "_extract_lut", "_insert_lut")
+
+    def __init__(self, bits: Sequence[int]) -> None:
+        self.bits = list(bits)
+        self.word_mask = 0
+        for bit in self.bits:
+            self.word_mask |= 1 << bit
+
+        self.shift = self.bits[0] if self.bits else 0
+        self.mask = (1 << len(self.bits)) - 1
+
+        self._extract_lut: Optional[List[List[int]]] = None
+        self._insert_lut: Optional[List[List[int]]] = None
+        if self.bits != list(range(self.shift, self.shift + len(self.bits))):
+            self._extract_lut = _build_lut(self.bits, max(self.bits))
+            self._insert_lut = _build_lut(list(range(len(self.bits))), len(self.bits) - 1, self.bits)
+
+    def is_contiguous(self) -> bool:
+        return self._extract_lut is None
+
+    def extract(self, value: int) -> int:
+        if self._extract_lut is None:
+            return (value >> self.shift) & self.mask
+        return _apply_lut(self._extract_lut, value)
+
+    def insert(self, value: int, existing_value: int) -> int:
+        if self._insert_lut is None:
+            field_bits = (value & self.mask) << self.shift
+        else:
+            field_bits = _apply_lut(self._insert_lut, value)
+        return (existing_value & ~self.word_mask) | field_bits
+
+
+def _build_lut(src_bits: Sequence[int], max_src_bit: int, dst_bits: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Builds a table per byte of the source value, mapping the byte to its bits moved to their destination positions
+    (bit `src_bits[i]` to bit `dst_bits[i]`, or to bit `i` if `dst_bits` is None).
+    """
+    dst_of_src = {src: (dst_bits[i] if dst_bits is not None else i) for i, src in enumerate(src_bits)}
+    luts = []
+    for chunk in range(max_src_bit // LutChunkBits + 1):
+        lut = []
+        for byte in range(1 << LutChunkBits):
+            result = 0
+            for i in range(LutChunkBits):
+                dst = dst_of_src.get(chunk * LutChunkBits + i)
+                if dst is not None and (byte >> i) & 1:
+                    result |= 1 << dst
+            lut.append(result)
+        luts.append(lut)
+    return luts
+
+
+def _apply_lut(luts: List[List[int]], value: int) -> int:
+    result = 0
+    for chunk, lut in enumerate(luts):
+        result |= lut[(value >> (chunk * LutChunkBits)) & 0xff]
+    return result
+
+
+@lru_cache(maxsize=None)
+def get_bitfield(bits: Tuple[int, ...]) -> Bitfield:
+    return Bitfield(bits)
+
+
+__all__ = [
+    "BitsArray",
+    "Bitfield",
+    "get_bitfield",
+]
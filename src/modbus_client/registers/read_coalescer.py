@@ -0,0 +1,129 @@
+import asyncio
+from typing import Dict, Tuple, Set, List, Sequence, Callable, Awaitable, Optional
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.registers.address_map import AddressMap, group_addresses
+from modbus_client.registers.read_session import ModbusRegisterTrait, WordKey, get_register_words, ModbusReadSession, \
+    BucketError
+
+ReadFunction = Callable[[Sequence[ModbusRegisterTrait]], Awaitable[ModbusReadSession]]
+
+# unit, allow_holes, max_read_size, address_map, partial
+BatchKey = Tuple[int, bool, int, Optional[AddressMap], bool]
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.registers: List[ModbusRegisterTrait] = []
+        self.words: Set[WordKey] = set()
+        self.future: asyncio.Future[ModbusReadSession] = asyncio.get_running_loop().create_future()
+
+
+class ReadCoalescer:
+    """
+    Single-flight layer for `ModbusReadSession.read_registers`. Registers whose words are all covered by a read already
+    in flight for the same unit wait for it and take their words from its result, the rest is read. Registers are
+    never assembled from words of different reads, so multi-word values are not torn. Reads arriving within
+    `merge_window` seconds are merged into a single plan. With a zero window, reads started in the same event loop
+    iteration are merged. A partial read gets the errors of the failed buckets its words were to be read in, while
+    a regular read fails with the first of them, even if it waits for a partial read. Waiters of a read whose task is
+    cancelled fail with `ReadErrorException`.
+    """
+
+    def __init__(self, merge_window: float = 0.0) -> None:
+        self.merge_window = merge_window
+
+        self._in_flight: Dict[int, List[_Batch]] = {}
+        self._pending: Dict[BatchKey, _Batch] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    async def read(self, unit: int, registers: Sequence[ModbusRegisterTrait], allow_holes: bool, max_read_size: int,
+                   read_fn: ReadFunction, address_map: Optional[AddressMap] = None,
+                   partial: bool = False) -> ModbusReadSession:
+        in_flight = self._in_flight.get(unit, [])
+
+        waits: Dict[int, Tuple[asyncio.Future[ModbusReadSession], Set[WordKey]]] = {}
+        to_read: List[ModbusRegisterTrait] = []
+        to_read_words: Set[WordKey] = set()
+        for register in registers:
+            words = get_register_words(register)
+            batch = next((x for x in in_flight if words <= x.words), None)
+            if batch is None:
+                to_read.append(register)
+                to_read_words.update(words)
+            else:
+                waits.setdefault(id(batch), (batch.future, set()))[1].update(words)
+
+        if len(to_read) > 0:
+            batch = self._join_pending((unit, allow_holes, max_read_size, address_map, partial), read_fn)
+            batch.registers.extend(to_read)
+            batch.words.update(to_read_words)
+            waits[id(batch)] = (batch.future, to_read_words)
+
+        result = ModbusReadSession()
+        for future, words in waits.values():
+            try:
+                ses = await asyncio.shield(future)
+            except Exception as e:
+                if not partial:
+                    raise
+                for reg_type in {x[0] for x in words}:
+                    for rng in group_addresses(x[1] for x in words if x[0] == reg_type):
+                        result.bucket_errors.append(BucketError(reg_type, rng, e))
+                continue
+
+            for word in words:
+                if word in ses.registers_dict:
+                    result.registers_dict[word] = ses.registers_dict[word]
+                else:
+                    bucket_error = next((x for x in ses.bucket_errors if x.covers(word)), None)
+                    if bucket_error is not None and all(x is not bucket_error for x in result.bucket_errors):
+                        result.bucket_errors.append(bucket_error)
+
+        if not partial and len(result.bucket_errors) > 0:
+            raise result.bucket_errors[0].error
+        return result
+
+    def _join_pending(self, key: BatchKey, read_fn: ReadFunction) -> _Batch:
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _Batch()
+            self._pending[key] = batch
+            task = asyncio.create_task(self._execute(key, batch, read_fn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return batch
+
+    async def _execute(self, key: BatchKey, batch: _Batch, read_fn: ReadFunction) -> None:
+        unit = key[0]
+        try:
+            if self.merge_window > 0:
+                await asyncio.sleep(self.merge_window)
+            else:
+                await asyncio.sleep(0)
+
+            del self._pending[key]
+            self._in_flight.setdefault(unit, []).append(batch)
+
+            batch.future.set_result(await read_fn(batch.registers))
+        except Exception as e:
+            batch.future.set_exception(e)
+            # retrieve the exception so asyncio doesn't complain if all waiters are gone
+            batch.future.exception()
+        finally:
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+            if batch in self._in_flight.get(unit, []):
+                self._in_flight[unit].remove(batch)
+                if len(self._in_flight[unit]) == 0:
+                    del self._in_flight[unit]
+
+            # the read was cancelled (in the merge window or while in flight), waiters must not hang on it
+            if not batch.future.done():
+                batch.future.set_exception(ReadErrorException("read cancelled"))
+                batch.future.exception()
+
+
+__all__ = [
+    "ReadCoalescer",
+]
@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from typing import List, Tuple, Dict
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.registers.read_coalescer import ReadCoalescer
+from modbus_client.registers.read_session import ModbusReadSession
+
+
+class Register:
+    def __init__(self, address: int, count: int = 1) -> None:
+        self.address = address
+        self.count = count
+
+    def get_reg_type(self) -> ModbusRegisterType:
+        return ModbusRegisterType.HoldingRegister
+
+    def get_address(self) -> int:
+        return self.address
+
+    def get_count(self) -> int:
+        return self.count
+
+
+class SlowMockModbusClient(MockModbusClient):
+    def __init__(self, holding_registers: Dict[int, int]) -> None:
+        super().__init__(input_registers={}, holding_registers=holding_registers)
+        self.requests: List[Tuple[int, int]] = []
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.requests.append((address, count))
+        await asyncio.sleep(0.01)
+        return await super().read_holding_registers(unit, address, count)
+
+
+class ReadCoalescerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = SlowMockModbusClient({i: i * 10 for i in range(20)})
+        self.client.set_coalescer(ReadCoalescer())
+
+    async def _read(self, registers: List[Register]) -> Dict[int, int]:
+        ses = await ModbusReadSession.read_registers(self.client, 1, registers, allow_holes=True)
+        return {addr: int(value) for (_, addr), value in ses.registers_dict.items()}
+
+    async def test_concurrent_reads_merged(self) -> None:
+        res = await asyncio.gather(self._read([Register(0, 2)]), self._read([Register(5)]), self._read([Register(1)]))
+
+        self.assertEqual([(0, 6)], self.client.requests)
+        self.assertEqual([{0: 0, 1: 10}, {5: 50}, {1: 10}], res)
+
+    async def test_in_flight_read_shared(self) -> None:
+        first = asyncio.create_task(self._read([Register(0, 4)]))
+        await asyncio.sleep(0.001)
+        second = await self._read([Register(1, 2), Register(3, 2)])
+
+        self.assertEqual({1: 10, 2: 20, 3: 30, 4: 40}, second)
+        self.assertEqual({0: 0, 1: 10, 2: 20, 3: 30}, await first)
+        # only registers not fully covered by the in-flight read are requested
+        self.assertEqual([(0, 4), (3, 2)], self.client.requests)
+
+    async def test_error_shared(self) -> None:
+        res = await asyncio.gather(self._read([Register(19, 2)]), self._read([Register(19)]), return_exceptions=True)
+
+        self.assertEqual(1, len(self.client.requests))
+        self.assertIsInstance(res[0], ReadErrorException)
+        self.assertIsInstance(res[1], ReadErrorException)
+
+    async def test_sequential_reads_not_cached(self) -> None:
+        await self._read([Register(0)])
+        await self._read([Register(0)])
+
+        self.assertEqual([(0, 1), (0, 1)], self.client.requests)
+
+    async def test_partial_read_shared(self) -> None:
+        partial = asyncio.create_task(ModbusReadSession.read_registers(self.client, 1, [Register(0, 2), Register(19, 2)],
+                                                                       max_read_size=2, partial=True))
+        await asyncio.sleep(0.001)
+        res = await asyncio.gather(self._read([Register(1)]), self._read([Register(19)]), return_exceptions=True)
+        partial_ses = await partial
+
+        self.assertEqual([(0, 2), (19, 2)], self.client.requests)
+        self.assertIsNone(partial_ses.get_register_error(Register(0, 2)))
+        self.assertIsInstance(partial_ses.get_register_error(Register(19, 2)), ReadErrorException)
+        # regular reads waiting for the partial one get its words or fail with the error of their bucket
+        self.assertEqual({1: 10}, res[0])
+        self.assertIsInstance(res[1], ReadErrorException)
+
+    async def test_cancelled_batch_resolved(self) -> None:
+        coalescer = ReadCoalescer(merge_window=0.05)
+        self.client.set_coalescer(coalescer)
+
+        # cancelled in the merge window
+        pending = asyncio.create_task(self._read([Register(0)]))
+        await asyncio.sleep(0.001)
+        for task in coalescer._tasks:
+            task.cancel()
+        with self.assertRaises(ReadErrorException):
+            await asyncio.wait_for(pending, 1)
+
+        # cancelled while in flight
+        in_flight = asyncio.create_task(self._read([Register(1)]))
+        await asyncio.sleep(0.055)
+        self.assertEqual([(1, 1)], self.client.requests)
+        for task in coalescer._tasks:
+            task.cancel()
+        with self.assertRaises(ReadErrorException):
+            await asyncio.wait_for(in_flight, 1)
+
+        self.assertEqual({}, coalescer._pending)
+        self.assertEqual({}, coalescer._in_flight)
+        self.assertEqual({2: 20}, await self._read([Register(2)]))
@@ -1,12 +1,20 @@
+import logging
 from dataclasses import dataclass, field
-from typing import Dict, Tuple, Union, Protocol
+from typing import Dict, Tuple, Union, Protocol, Set, List, Optional, Callable, Awaitable
 from typing import Sequence
 
-from modbus_client.registers.address_range import merge_address_ranges, AddressRangeTrait
+from modbus_client.registers.address_map import AddressMap, UnreadableExceptionCodes
+from modbus_client.registers.address_range import merge_address_ranges, AddressRangeTrait, AddressRange, \
+    BridgePredicate, split_at_largest_hole
 from modbus_client.client.async_modbus_client import DefaultMaxReadSize, AsyncModbusClient
+from modbus_client.client.exceptions import ModbusRequestException
 from modbus_client.client.types import ModbusRegisterType
 
+logger = logging.getLogger("read_session")
+
 RegisterValue = Union[int, bool]
+WordKey = Tuple[ModbusRegisterType, int]
+WordsMap = Dict[WordKey, RegisterValue]
 
 
 class ModbusRegisterTypeTrait(Protocol):
@@ -17,47 +25,191 @@ class ModbusRegisterTrait(ModbusRegisterTypeTrait, AddressRangeTrait, Protocol):
     pass
 
 
+def get_register_words(register: ModbusRegisterTrait) -> Set[WordKey]:
+    reg_type = register.get_reg_type()
+    return {(reg_type, register.get_address() + i) for i in range(register.get_count())}
+
+
+@dataclass
+class ReadPlan:
+    coils: List[AddressRange]
+    discrete_inputs: List[AddressRange]
+    input_registers: List[AddressRange]
+    holding_registers: List[AddressRange]
+    # address ranges of the registers themselves, a rejected bucket is split at the holes between them
+    registers: Dict[ModbusRegisterType, List[AddressRange]] = field(default_factory=dict)
+    # receives holes found unreadable
+    address_map: Optional[AddressMap] = None
+
+    def get_buckets_count(self) -> int:
+        return len(self.coils) + len(self.discrete_inputs) + len(self.input_registers) + len(self.holding_registers)
+
+
+@dataclass
+class BucketError:
+    reg_type: ModbusRegisterType
+    range: AddressRange
+    error: Exception
+
+    def covers(self, word: WordKey) -> bool:
+        return word[0] == self.reg_type and self.range.first_address <= word[1] <= self.range.last_address
+
+
 @dataclass
 class ModbusReadSession:
-    registers_dict: Dict[Tuple[ModbusRegisterType, int], RegisterValue] = field(default_factory=dict)
+    """
+    Words read from a unit. Sessions read with `partial` don't fail as a whole when a bucket (a single read request)
+    fails, its words are missing from `registers_dict` and the error is recorded in `bucket_errors`.
+    """
+    registers_dict: WordsMap = field(default_factory=dict)
+    bucket_errors: List[BucketError] = field(default_factory=list)
+
+    def get_word_error(self, word: WordKey) -> Optional[Exception]:
+        return next((x.error for x in self.bucket_errors if x.covers(word)), None)
+
+    def get_register_error(self, register: ModbusRegisterTrait) -> Optional[Exception]:
+        """
+        Returns the error of a failed bucket the register's words were to be read in, None if the register was read.
+        """
+        if len(self.bucket_errors) == 0:
+            return None
+        for word in sorted(get_register_words(register)):
+            if word not in self.registers_dict:
+                error = self.get_word_error(word)
+                if error is not None:
+                    return error
+        return None
 
     @staticmethod
     async def read_registers(client: AsyncModbusClient,
                              unit: int,
                              registers: Sequence[ModbusRegisterTrait],
                              allow_holes: bool = False,
-                             max_read_size: int = DefaultMaxReadSize) -> 'ModbusReadSession':
+                             max_read_size: int = DefaultMaxReadSize,
+                             address_map: Optional[AddressMap] = None,
+                             partial: bool = False) -> 'ModbusReadSession':
+        coalescer = client.coalescer
+        if coalescer is not None:
+            async def read_batch(batch_registers: Sequence[ModbusRegisterTrait]) -> ModbusReadSession:
+                return await ModbusReadSession._read_registers(client, unit, batch_registers, allow_holes,
+                                                               max_read_size, address_map, partial)
+
+            return await coalescer.read(unit, registers, allow_holes, max_read_size, read_batch, address_map, partial)
+
+        return await ModbusReadSession._read_registers(client, unit, registers, allow_holes, max_read_size, address_map,
+                                                       partial)
+
+    @staticmethod
+    def plan(registers: Sequence[ModbusRegisterTrait], allow_holes: bool = False,
+             max_read_size: int = DefaultMaxReadSize, address_map: Optional[AddressMap] = None) -> 'ReadPlan':
+        """
+        Computes the requests reading given registers. The plan doesn't depend on the unit, so it can be executed for
+        any number of units with the same register layout. With `address_map`, holes are read over only where
+        the map allows it, and holes found unreadable while executing the plan are recorded in it.
+        """
         coils_registers = [x for x in registers if x.get_reg_type() == ModbusRegisterType.Coil]
         discrete_inputs_registers = [x for x in registers if x.get_reg_type() == ModbusRegisterType.DiscreteInputs]
         input_registers = [x for x in registers if x.get_reg_type() == ModbusRegisterType.InputRegister]
         holding_registers = [x for x in registers if x.get_reg_type() == ModbusRegisterType.HoldingRegister]
 
-        coils_buckets = merge_address_ranges(coils_registers, allow_holes=False, max_read_size=1)
-        discrete_inputs_buckets = merge_address_ranges(discrete_inputs_registers, allow_holes=False, max_read_size=1)
-        input_registers_buckets = merge_address_ranges(input_registers, allow_holes=allow_holes,
-                                                       max_read_size=max_read_size)
-        holding_registers_buckets = merge_address_ranges(holding_registers, allow_holes=allow_holes,
-                                                         max_read_size=max_read_size)
+        def can_bridge(reg_type: ModbusRegisterType) -> Optional[BridgePredicate]:
+            return None if address_map is None else address_map.get_bridge_predicate(reg_type)
+
+        return ReadPlan(
+            coils=merge_address_ranges(coils_registers, allow_holes=False, max_read_size=1),
+            discrete_inputs=merge_address_ranges(discrete_inputs_registers, allow_holes=False, max_read_size=1),
+            input_registers=merge_address_ranges(input_registers, allow_holes=allow_holes, max_read_size=max_read_size,
+                                                 can_bridge=can_bridge(ModbusRegisterType.InputRegister)),
+            holding_registers=merge_address_ranges(holding_registers, allow_holes=allow_holes,
+                                                   max_read_size=max_read_size,
+                                                   can_bridge=can_bridge(ModbusRegisterType.HoldingRegister)),
+            registers={
+                ModbusRegisterType.InputRegister: [AddressRange(x.get_address(), x.get_count()) for x in input_registers],
+                ModbusRegisterType.HoldingRegister: [AddressRange(x.get_address(), x.get_count())
+                                                     for x in holding_registers],
+            },
+            address_map=address_map)
 
+    @staticmethod
+    async def execute_plan(client: AsyncModbusClient, unit: int, plan: 'ReadPlan',
+                           partial: bool = False) -> 'ModbusReadSession':
+        """
+        Reads all buckets of the plan. The first failed bucket fails the whole read, unless `partial` is given, in which
+        case the remaining buckets are still read and the failures are recorded in `bucket_errors`.
+        """
         ses = ModbusReadSession()
-        for rng in coils_buckets:
-            values1 = await client.read_coils(unit=unit, address=rng.address, count=rng.count)
-            for i, val1 in enumerate(values1):
-                ses.registers_dict[(ModbusRegisterType.Coil, rng.address + i)] = val1
-
-        for rng in discrete_inputs_buckets:
-            values2 = await client.read_discrete_inputs(unit=unit, address=rng.address, count=rng.count)
-            for i, val2 in enumerate(values2):
-                ses.registers_dict[(ModbusRegisterType.DiscreteInputs, rng.address + i)] = val2
-
-        for rng in input_registers_buckets:
-            values3 = await client.read_input_registers(unit=unit, address=rng.address, count=rng.count)
-            for i, val3 in enumerate(values3):
-                ses.registers_dict[(ModbusRegisterType.InputRegister, rng.address + i)] = val3
-
-        for rng in holding_registers_buckets:
-            values4 = await client.read_holding_registers(unit=unit, address=rng.address, count=rng.count)
-            for i, val4 in enumerate(values4):
-                ses.registers_dict[(ModbusRegisterType.HoldingRegister, rng.address + i)] = val4
+        for reg_type, ranges in ((ModbusRegisterType.Coil, plan.coils),
+                                 (ModbusRegisterType.DiscreteInputs, plan.discrete_inputs),
+                                 (ModbusRegisterType.InputRegister, plan.input_registers),
+                                 (ModbusRegisterType.HoldingRegister, plan.holding_registers)):
+            for rng in ranges:
+                try:
+                    await ModbusReadSession._read_bucket(client, unit, plan, reg_type, rng, ses)
+                except Exception as e:
+                    if not partial:
+                        raise
+                    ses.bucket_errors.append(BucketError(reg_type, rng, e))
 
         return ses
+
+    @staticmethod
+    async def _read_bucket(client: AsyncModbusClient, unit: int, plan: 'ReadPlan', reg_type: ModbusRegisterType,
+                           rng: AddressRange, ses: 'ModbusReadSession') -> bool:
+        """
+        Reads a bucket of registers. If the device rejects it and the bucket spans holes, it's split at the largest
+        hole and the parts are read separately. If both are read in a single request, the hole is what the device
+        rejected and it's recorded in the plan's address map, so following plans don't read over it (for
+        SlaveDeviceFailure, which devices also send for transient errors, only once it was rejected repeatedly).
+        Otherwise the hole is left to be tried again by the next read. Returns whether the bucket was read in a single request.
+        """
+        read: Callable[..., Awaitable[Sequence[RegisterValue]]]
+        if reg_type == ModbusRegisterType.Coil:
+            read = client.read_coils
+        elif reg_type == ModbusRegisterType.DiscreteInputs:
+            read = client.read_discrete_inputs
+        elif reg_type == ModbusRegisterType.InputRegister:
+            read = client.read_input_registers
+        else:
+            read = client.read_holding_registers
+
+        try:
+            values = await read(unit=unit, address=rng.address, count=rng.count)
+        except ModbusRequestException as e:
+            if e.exception_code not in UnreadableExceptionCodes:
+                raise
+            registers = [x for x in plan.registers.get(reg_type, [])
+                         if rng.first_address <= x.first_address and x.last_address <= rng.last_address]
+            parts = split_at_largest_hole(registers)
+            if parts is None:
+                raise
+            left, hole, right = parts
+            logger.debug(f"read of {reg_type.name} {rng.address}+{rng.count} rejected, splitting")
+            left_whole = await ModbusReadSession._read_bucket(client, unit, plan, reg_type, left, ses)
+            right_whole = await ModbusReadSession._read_bucket(client, unit, plan, reg_type, right, ses)
+            if left_whole and right_whole and plan.address_map is not None:
+                plan.address_map.record_rejected_hole(reg_type, hole.first_address, hole.last_address,
+                                                      e.exception_code)
+            return False
+
+        if plan.address_map is not None:
+            plan.address_map.record_readable(reg_type, rng.first_address, rng.last_address)
+        for i, val in enumerate(values):
+            ses.registers_dict[(reg_type, rng.address + i)] = val
+        return True
+
+    @staticmethod
+    async def _read_registers(client: AsyncModbusClient,
+                              unit: int,
+                              registers: Sequence[ModbusRegisterTrait],
+                              allow_holes: bool,
+                              max_read_size: int,
+                              address_map: Optional[AddressMap],
+                              partial: bool) -> 'ModbusReadSession':
+        with client.span("read_session.read_registers", unit, registers=len(registers)) as span:
+            with client.span("read_session.plan", unit):
+                plan = ModbusReadSession.plan(registers, allow_holes, max_read_size, address_map)
+
+            if span is not None:
+                span.attributes["buckets"] = plan.get_buckets_count()
+
+            return await ModbusReadSession.execute_plan(client, unit, plan, partial)
@@ -1,7 +1,7 @@
 import struct
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import Union, List, Optional, cast, Set, Iterator
+from typing import Union, List, Optional, cast, Set, Iterator, Any, Iterable, Mapping, Dict
 
 from modbus_client.device.registers.enum_definition import EnumDefinition
 from modbus_client.device.registers.flag_definition import FlagDefinition
@@ -10,33 +10,28 @@ from modbus_client.client.types import ModbusRegisterType
 from modbus_client.registers.type_converters import get_type_converter
 from modbus_client.registers.register_value_type import RegisterValueType
 from modbus_client.registers.read_session import ModbusReadSession
-
-BitsArray = List[int]
+from modbus_client.registers.bitfield import BitsArray, Bitfield, get_bitfield
 
 
 def get_bits(value: int, bits: BitsArray) -> int:
-    final_value = 0
-    for i, bit in enumerate(bits):
-        final_value |= ((value >> bit) & 0x01) << i
-    return final_value
+    return get_bitfield(tuple(bits)).extract(value)
 
 
 def put_bits(bits: BitsArray, value: int, existing_value: int) -> int:
-    final_value = existing_value
-
-    for i, bit in enumerate(bits):
-        final_value &= ~(1 << bit)
-        final_value |= ((value >> i) & 0x01) << bit
+    return get_bitfield(tuple(bits)).insert(value, existing_value)
 
-    return final_value
 
-
-@dataclass
+@dataclass(frozen=True)
 class EnumValue:
+    __slots__ = ("enum_name", "enum_value", "enum_display")
+
     enum_name: Optional[str]
     enum_value: int
     enum_display: Optional[str]
 
+    def __reduce__(self) -> Any:
+        return EnumValue, (self.enum_name, self.enum_value, self.enum_display)
+
     def format(self) -> str:
         if self.enum_name is None:
             return f"<unknown> ({self.enum_value})"
@@ -46,10 +41,15 @@ class EnumValue:
 
 @dataclass(frozen=True)
 class FlagValue:
+    __slots__ = ("flag_name", "flag_bit", "flag_display")
+
     flag_name: Optional[str]
     flag_bit: int
     flag_display: Optional[str]
 
+    def __reduce__(self) -> Any:
+        return FlagValue, (self.flag_name, self.flag_bit, self.flag_display)
+
     def format(self) -> str:
         if self.flag_name is None:
             return f"(bit{self.flag_bit})"
@@ -57,24 +57,79 @@ class FlagValue:
             return f"{self.flag_name} (bit{self.flag_bit})"
 
 
-@dataclass(frozen=True)
 class FlagsCollection:
-    flags: Set[FlagValue]
+    """
+    Set flags of a flags register, stored as a bitmask. `FlagValue` objects are only looked up while iterating, in
+    `flag_values` (mapping bits to flags, shared by all values of a register).
+    """
+
+    __slots__ = ("mask", "_flag_values")
+
+    def __init__(self, flags: Iterable[FlagValue] = ()) -> None:
+        self.mask = 0
+        self._flag_values: Mapping[int, FlagValue] = {x.flag_bit: x for x in flags}
+        for bit in self._flag_values:
+            self.mask |= 1 << bit
+
+    @staticmethod
+    def from_mask(mask: int, flag_values: Mapping[int, FlagValue]) -> 'FlagsCollection':
+        collection = FlagsCollection.__new__(FlagsCollection)
+        collection.mask = mask
+        collection._flag_values = flag_values
+        return collection
+
+    @property
+    def flags(self) -> Set[FlagValue]:
+        return set(self)
 
     def __iter__(self) -> Iterator[FlagValue]:
-        return iter(self.flags)
+        mask = self.mask
+        bit = 0
+        while mask:
+            if mask & 1:
+                flag = self._flag_values.get(bit)
+                yield flag if flag is not None else FlagValue(flag_name=None, flag_bit=bit, flag_display=None)
+            mask >>= 1
+            bit += 1
 
-    def __contains__(self, item: int | FlagValue | FlagDefinition) -> bool:
-        bits = {x.flag_bit for x in self.flags}
+    def __len__(self) -> int:
+        return bin(self.mask).count("1")
 
+    def __contains__(self, item: int | FlagValue | FlagDefinition) -> bool:
         if isinstance(item, int):
-            return item in bits
+            bit = item
         elif isinstance(item, FlagValue):
-            return item.flag_bit in bits
+            bit = item.flag_bit
         elif isinstance(item, FlagDefinition):
-            return item.bit in bits
+            bit = item.bit
         else:
             raise ValueError(f"Unsupported item type {type(item)}")
+        return (self.mask >> bit) & 1 == 1
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FlagsCollection):
+            return NotImplemented
+        if self._flag_values is other._flag_values:
+            return self.mask == other.mask
+        return self.flags == other.flags
+
+    def __hash__(self) -> int:
+        return hash(self.mask)
+
+    def __reduce__(self) -> Any:
+        return FlagsCollection, (tuple(self),)
+
+    def __repr__(self) -> str:
+        return f"FlagsCollection(flags={self.flags!r})"
+
+
+def value_to_json(value: Union[int, float, EnumValue, FlagsCollection, str]) -> Any:
+    if isinstance(value, EnumValue):
+        return {"name": value.enum_name, "value": value.enum_value}
+    elif isinstance(value, FlagsCollection):
+        return sorted((x.flag_name or f"bit{x.flag_bit}") for x in value)
+    else:
+        return value
 
 
 class IRegister(AddressRangeTrait):
@@ -86,6 +141,8 @@ class IRegister(AddressRangeTrait):
         self.reg_type = reg_type
         self.value_type = value_type
         self.bits = bits
+        # compiled once, shared by all registers with the same layout
+        self.bitfield: Optional[Bitfield] = get_bitfield(tuple(bits)) if bits is not None else None
 
         if self.bits is not None:
             if self.value_type not in (RegisterValueType.U16,):
@@ -114,20 +171,21 @@ class IRegister(AddressRangeTrait):
     def get_raw_from_read_session(self, read_session: ModbusReadSession) -> int:
         val = self._get_base_value_from_read_session(read_session)
 
-        if self.bits is None:
+        if self.bitfield is None:
             return val
         else:
-            return get_bits(val, self.bits)
+            return self.bitfield.extract(val)
 
     def value_to_modbus_registers(self, value: Union[int, float, str], existing_read_session: ModbusReadSession | None) -> List[int]:
         reg_type_converter = get_type_converter(self.value_type)
         count = struct.calcsize(reg_type_converter.format_str) // 2
 
         if self.bits:
+            assert self.bitfield is not None
             assert existing_read_session is not None
             assert isinstance(value, int)
             existing_value = self._get_base_value_from_read_session(existing_read_session)
-            value = put_bits(self.bits, value, existing_value)
+            value = self.bitfield.insert(value, existing_value)
 
         raw_value = reg_type_converter.converter_func(value)
         value_bytes = struct.pack("<" + reg_type_converter.format_str, raw_value)
@@ -185,15 +243,18 @@ class EnumRegister(IRegister):
 
         self.enum_by_value = {x.value: x for x in enum}
         self.enum_by_name = {x.name: x for x in enum}
+        # values are immutable, so a single instance per defined value is shared by all reads; undefined values are
+        # created per read, caching them would grow without bound on registers reading garbage
+        self._enum_values: Dict[int, EnumValue] = {
+            x.value: EnumValue(enum_name=x.name, enum_value=x.value, enum_display=x.display) for x in enum}
 
     def get_value_from_read_session(self, read_session: ModbusReadSession) -> EnumValue:
         value = super().get_raw_from_read_session(read_session)
 
-        enum_def = self.enum_by_value.get(value)
-        if enum_def is None:
-            return EnumValue(enum_name=None, enum_value=value, enum_display=None)
-        else:
-            return EnumValue(enum_name=enum_def.name, enum_value=value, enum_display=enum_def.display)
+        enum_value = self._enum_values.get(value)
+        if enum_value is None:
+            enum_value = EnumValue(enum_name=None, enum_value=value, enum_display=None)
+        return enum_value
 
     def value_to_modbus_registers(self, value: Union[int, float, str], existing_read_session: ModbusReadSession | None) -> List[int]:
         assert isinstance(value, (int, str)), "value must be int or string"
@@ -244,6 +305,13 @@ class FlagsRegister(IRegister):
         super().__init__(name=name, reg_type=reg_type, address=address, value_type=RegisterValueType.U16, bits=bits)
 
         self.bit_to_flag = {x.bit: x for x in flags}
+        self._flag_values: Dict[int, FlagValue] = {}
+        for bit in range(16):
+            f = self.bit_to_flag.get(bit)
+            if f is not None:
+                self._flag_values[bit] = FlagValue(flag_name=f.name, flag_bit=f.bit, flag_display=f.display)
+            else:
+                self._flag_values[bit] = FlagValue(flag_name=None, flag_bit=bit, flag_display=None)
 
         if self.value_type not in (RegisterValueType.U16,):
             raise ValueError("Flags only supports uint16 type")
@@ -254,20 +322,7 @@ class FlagsRegister(IRegister):
     def get_value_from_read_session(self, read_session: ModbusReadSession) -> FlagsCollection:
         value = super().get_raw_from_read_session(read_session)
 
-        flags: Set[FlagValue] = set()
-        bit = 0
-        while value > 0:
-            if value & 1 == 1:
-                f = self.bit_to_flag.get(bit)
-                if f is not None:
-                    flags.add(FlagValue(flag_name=f.name, flag_bit=f.bit, flag_display=f.display))
-                else:
-                    flags.add(FlagValue(flag_name=None, flag_bit=bit, flag_display=None))
-
-            value >>= 1
-            bit += 1
-
-        return FlagsCollection(flags)
+        return FlagsCollection.from_mask(value, self._flag_values)
 
     def value_to_modbus_registers(self, value: Union[int, float, str], existing_read_session: ModbusReadSession | None) -> List[int]:
         raise Exception("writing to flags register is not supported")
@@ -0,0 +1,71 @@
+import pickle
+import unittest
+from typing import List
+
+from modbus_client.client.types import ModbusRegisterType
+from modbus_client.device.registers.enum_definition import EnumDefinition
+from modbus_client.device.registers.flag_definition import FlagDefinition
+from modbus_client.registers.bitfield import Bitfield
+from modbus_client.registers.read_session import ModbusReadSession
+from modbus_client.registers.registers import FlagsRegister, FlagValue, FlagsCollection, EnumRegister, EnumValue
+
+
+def create_read_session(value: int) -> ModbusReadSession:
+    read_session = ModbusReadSession()
+    read_session.registers_dict[(ModbusRegisterType.HoldingRegister, 0)] = value
+    return read_session
+
+
+class FlagsCollectionTest(unittest.TestCase):
+    def test_decode(self) -> None:
+        register = FlagsRegister(name="status", reg_type=ModbusRegisterType.HoldingRegister, address=0,
+                                 flags=[FlagDefinition(name="alarm", bit=1), FlagDefinition(name="run", bit=4)])
+
+        value = register.get_value_from_read_session(create_read_session(0b10010010))
+
+        self.assertEqual(0b10010010, value.mask)
+        self.assertEqual([FlagValue("alarm", 1, None), FlagValue("run", 4, None), FlagValue(None, 7, None)],
+                         list(value))
+        self.assertIn(4, value)
+        self.assertIn(FlagDefinition(name="alarm", bit=1), value)
+        self.assertNotIn(FlagValue(None, 2, None), value)
+        self.assertEqual(3, len(value))
+        self.assertEqual(FlagsCollection({FlagValue("alarm", 1, None), FlagValue("run", 4, None),
+                                          FlagValue(None, 7, None)}), value)
+        self.assertEqual(value, pickle.loads(pickle.dumps(value)))
+        # flags are shared by all values of the register
+        self.assertIs(next(iter(value)), next(iter(register.get_value_from_read_session(create_read_session(2)))))
+
+
+class EnumValueTest(unittest.TestCase):
+    def test_decode(self) -> None:
+        register = EnumRegister(name="mode", reg_type=ModbusRegisterType.HoldingRegister, address=0,
+                                enum=[EnumDefinition(name="idle", value=0), EnumDefinition(name="run", value=1)])
+
+        self.assertEqual(EnumValue("run", 1, None), register.get_value_from_read_session(create_read_session(1)))
+        self.assertEqual(EnumValue(None, 5, None), register.get_value_from_read_session(create_read_session(5)))
+        self.assertIs(register.get_value_from_read_session(create_read_session(1)),
+                      register.get_value_from_read_session(create_read_session(1)))
+        # undefined values are not cached
+        for value in range(2, 100):
+            register.get_value_from_read_session(create_read_session(value))
+        self.assertEqual({0, 1}, set(register._enum_values))
+
+
+class BitfieldTest(unittest.TestCase):
+    def test_matches_bitwise(self) -> None:
+        def get_bits_reference(value: int, bits: List[int]) -> int:
+            return sum(((value >> bit) & 1) << i for i, bit in enumerate(bits))
+
+        def put_bits_reference(bits: List[int], value: int, existing_value: int) -> int:
+            for i, bit in enumerate(bits):
+                existing_value = (existing_value & ~(1 << bit)) | (((value >> i) & 1) << bit)
+            return existing_value
+
+        layouts: List[List[int]] = [[0], [15], [8, 9, 10], list(range(16)), [3, 1, 12], []]
+        for bits in layouts:
+            bitfield = Bitfield(bits)
+            self.assertEqual(bits != [3, 1, 12], bitfield.is_contiguous())
+            for value in [0, 1, 0x5a5a, 0xa5a5, 0xffff, 0x1234]:
+                self.assertEqual(get_bits_reference(value, bits), bitfield.extract(value))
+                self.assertEqual(put_bits_reference(bits, value, 0xc3c3), bitfield.insert(value, 0xc3c3))
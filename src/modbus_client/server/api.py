@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+from typing import Any, Optional, Dict, List, AsyncIterator
+
+from nicegui import app
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from modbus_client.device.registers.device_register import DeviceHoldingRegister
+from modbus_client.registers.registers import value_to_json
+from modbus_client.server.runtime_data import RuntimeData, DeviceRuntime
+from modbus_client.server.server_config import ServerConfig
+from modbus_client.server.value_stream import ValueStream
+
+log = logging.getLogger("api")
+
+StreamKeepaliveInterval = 15.0
+
+
+class PrettyJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content, indent=2, sort_keys=True).encode("utf-8")
+
+
+class CompactJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def get_etag(content: Any) -> str:
+    # weak, as pretty and compact outputs are equivalent representations
+    data = json.dumps(content, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return f'W/"{hashlib.sha1(data).hexdigest()}"'
+
+
+def json_response(content: Any, pretty: bool, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    if pretty:
+        return PrettyJSONResponse(content, status_code=status_code, headers=headers)
+    else:
+        return CompactJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def parse_names(names: Optional[str]) -> Optional[List[str]]:
+    if names is None:
+        return None
+    return [x.strip() for x in names.split(",") if len(x.strip()) > 0]
+
+
+def register_api(runtime_data: RuntimeData) -> None:
+    for device in runtime_data.devices:
+        register_device_api(runtime_data.server_config, device)
+
+
+def register_device_api(server_config: ServerConfig, device: DeviceRuntime) -> None:
+    poller = device.poller
+    prefix = device.route_prefix
+
+    @app.get(f"{prefix}/api/values")
+    async def get_values(request: Request, names: Optional[str] = None, max_age: Optional[float] = None,
+                         pretty: bool = False, timestamps: bool = False) -> Response:
+        register_names = parse_names(names)
+        if max_age is None:
+            max_age = server_config.api_max_age
+
+        # registers whose read failed are reported in `errors`, the request fails only if none of them was read
+        errors: Dict[str, BaseException] = {}
+        try:
+            values = await poller.get_values(register_names, max_age=max_age, errors=errors)
+        except KeyError as e:
+            return json_response({"error": str(e.args[0])}, pretty, status_code=404)
+        except Exception as e:
+            log.warning(f"unable to read registers: {e!r}")
+            return json_response({"error": str(e)}, pretty, status_code=502)
+
+        content: Dict[str, Any] = {"values": {name: value_to_json(value) for name, value in values.items()}}
+        if len(errors) > 0:
+            log.warning(f"unable to read registers: {', '.join(errors)}")
+            content["errors"] = {name: str(e) for name, e in errors.items()}
+        if timestamps:
+            content["timestamps"] = {name: poller.timestamps[name] for name in values}
+
+        etag = get_etag(content)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag in [x.strip() for x in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return json_response(content, pretty, headers=headers)
+
+    @app.post(f"{prefix}/api/values")
+    async def write_values(request: Request, pretty: bool = False) -> Response:
+        if not server_config.api_write:
+            return json_response({"error": "writing is disabled, set api_write in the server config"}, pretty,
+                                 status_code=403)
+
+        try:
+            new_values = await request.json()
+        except ValueError:
+            return json_response({"error": "invalid JSON"}, pretty, status_code=400)
+        if not isinstance(new_values, dict):
+            return json_response({"error": "expected an object mapping register names to values"}, pretty,
+                                 status_code=400)
+
+        device_config = device.connector.modbus_device.get_device_config()
+        for name in new_values:
+            register = device_config.find_register(name)
+            if register is None:
+                return json_response({"error": f"unknown register: {name}"}, pretty, status_code=404)
+            if not isinstance(register, DeviceHoldingRegister) or register.readonly:
+                return json_response({"error": f"register is readonly: {name}"}, pretty, status_code=400)
+
+        written: List[str] = []
+        for name, value in new_values.items():
+            try:
+                await poller.write(name, value, refresh=False)
+            except (ValueError, AssertionError) as e:
+                return json_response({"error": f"invalid value for {name}: {e}", "written": written}, pretty,
+                                     status_code=400)
+            except Exception as e:
+                log.warning(f"unable to write register {name}: {e!r}")
+                return json_response({"error": str(e), "written": written}, pretty, status_code=502)
+            written.append(name)
+
+        # the writes are applied, a failed read back is reported along with the registers that were read
+        try:
+            await poller.refresh(written)
+        except Exception as e:
+            log.warning(f"unable to read back written registers: {e!r}")
+            return json_response({"values": {name: value_to_json(poller.values[name]) for name in written
+                                             if name in poller.values and name not in poller.errors},
+                                  "written": written, "refresh_error": str(e)}, pretty)
+
+        return json_response({"values": {name: value_to_json(poller.values[name]) for name in written},
+                              "written": written}, pretty)
+
+    @app.get(f"{prefix}/api/stream")
+    async def stream_values(names: Optional[str] = None) -> Response:
+        register_names = parse_names(names)
+
+        try:
+            values = await poller.get_values(register_names, max_age=server_config.api_max_age)
+        except KeyError as e:
+            return json_response({"error": str(e.args[0])}, False, status_code=404)
+        except Exception as e:
+            log.warning(f"unable to read registers: {e!r}")
+            return json_response({"error": str(e)}, False, status_code=502)
+
+        stream = ValueStream(poller, list(values.keys()), values)
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                while True:
+                    changes = await stream.get(timeout=StreamKeepaliveInterval)
+                    if len(changes) == 0:
+                        yield ": keepalive\n\n"
+                        continue
+
+                    content = {
+                        "values": {name: value_to_json(value) for name, value in changes.items()},
+                        "timestamps": {name: poller.timestamps[name] for name in changes},
+                    }
+                    yield f"event: values\ndata: {json.dumps(content, separators=(',', ':'), sort_keys=True)}\n\n"
+            finally:
+                stream.close()
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+__all__ = [
+    "PrettyJSONResponse",
+    "CompactJSONResponse",
+    "value_to_json",
+    "register_api",
+]
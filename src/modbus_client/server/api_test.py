@@ -0,0 +1,231 @@
+import asyncio
+import itertools
+import json
+import unittest
+from typing import List, Tuple, Dict, Any, MutableMapping
+from unittest import mock
+
+import httpx
+from nicegui import app
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.server.api import register_device_api
+from modbus_client.server.device_poller import DevicePoller
+from modbus_client.server.mytypes import Connector
+from modbus_client.server.runtime_data import DeviceRuntime
+from modbus_client.server.server_config import ServerConfig, ServerDeviceConfig
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+
+  holding_registers:
+    - mode/0x0010/uint16
+    - slave_id/0x0011/uint16
+"""
+
+# routes are registered in the global app, every test device gets its own prefix
+_prefixes = (f"/api_test_{i}" for i in itertools.count())
+
+
+class ApiMockModbusClient(MockModbusClient):
+    def __init__(self) -> None:
+        super().__init__(input_registers={1: 123}, holding_registers={0x10: 1, 0x11: 7})
+        self.reads: List[Tuple[int, int]] = []
+        self.fail_reads = False
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.reads.append((address, count))
+        return await super().read_input_registers(unit, address, count)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.reads.append((address, count))
+        if self.fail_reads:
+            raise ReadErrorException("timeout", timeout=True)
+        return await super().read_holding_registers(unit, address, count)
+
+
+class ApiTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.client = ApiMockModbusClient()
+        device = ModbusDeviceFactory.from_config(config).create_device(1)
+        self.poller = DevicePoller(Connector(device, lambda: self.client), poll_interval=0)
+        self.server_config = ServerConfig(api_write=True)
+
+        self.prefix = next(_prefixes)
+        runtime = DeviceRuntime(ServerDeviceConfig(name="meter", device="meter.yaml", unit=1, mock={}),
+                                self.poller.connector, self.poller, self.prefix)
+        register_device_api(self.server_config, runtime)
+
+        self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self) -> None:
+        await self.http.aclose()
+        await self.poller.stop()
+
+    async def test_values(self) -> None:
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage,mode"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('{"values":{"mode":1,"voltage":12.3}}', response.text)
+
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage", "pretty": "1",
+                                                                              "timestamps": "1"})
+        content = response.json()
+        self.assertEqual({"voltage": 12.3}, content["values"])
+        self.assertEqual({"voltage"}, set(content["timestamps"]))
+        self.assertEqual(json.dumps(content, indent=2, sort_keys=True), response.text)
+
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "nothing"})
+        self.assertEqual(404, response.status_code)
+
+    async def test_values_partial(self) -> None:
+        self.client.fail_reads = True
+
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage,mode"})
+
+        self.assertEqual(200, response.status_code)
+        content = response.json()
+        self.assertEqual({"voltage": 12.3}, content["values"])
+        self.assertEqual({"mode"}, set(content["errors"]))
+        self.assertIn("timeout", content["errors"]["mode"])
+
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "mode,slave_id"})
+        self.assertEqual(502, response.status_code)
+        self.assertIn("timeout", response.json()["error"])
+
+    async def test_max_age(self) -> None:
+        for _ in range(2):
+            await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage", "max_age": "10"})
+        self.assertEqual([(1, 1)], self.client.reads)
+
+        await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage", "max_age": "0"})
+        self.assertEqual([(1, 1), (1, 1)], self.client.reads)
+
+    async def test_etag(self) -> None:
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage"})
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        # pretty output is an equivalent representation
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage", "pretty": "1"},
+                                       headers={"If-None-Match": f'W/"other", {etag}'})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response.headers["ETag"])
+        self.assertEqual("", response.text)
+
+        self.client.input_registers[1] = 200
+        response = await self.http.get(f"{self.prefix}/api/values", params={"names": "voltage", "max_age": "0"},
+                                       headers={"If-None-Match": etag})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers["ETag"])
+
+    async def test_write_disabled(self) -> None:
+        self.server_config.api_write = False
+
+        response = await self.http.post(f"{self.prefix}/api/values", json={"mode": 5})
+
+        self.assertEqual(403, response.status_code)
+        self.assertEqual(1, self.client.holding_registers[0x10])
+
+    async def test_write(self) -> None:
+        response = await self.http.post(f"{self.prefix}/api/values", json={"mode": 5, "slave_id": 9})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"values": {"mode": 5, "slave_id": 9}, "written": ["mode", "slave_id"]}, response.json())
+        self.assertEqual({0x10: 5, 0x11: 9}, self.client.holding_registers)
+
+    async def test_write_invalid(self) -> None:
+        response = await self.http.post(f"{self.prefix}/api/values", json={"unknown": 5})
+        self.assertEqual(404, response.status_code)
+
+        response = await self.http.post(f"{self.prefix}/api/values", json={"voltage": 5})
+        self.assertEqual(400, response.status_code)
+
+        response = await self.http.post(f"{self.prefix}/api/values", content=b"[1, 2]")
+        self.assertEqual(400, response.status_code)
+
+        self.assertEqual({0x10: 1, 0x11: 7}, self.client.holding_registers)
+
+    async def test_write_refresh_failed(self) -> None:
+        self.client.fail_reads = True
+
+        response = await self.http.post(f"{self.prefix}/api/values", json={"mode": 5})
+
+        self.assertEqual(200, response.status_code)
+        content = response.json()
+        self.assertEqual({}, content["values"])
+        self.assertEqual(["mode"], content["written"])
+        self.assertIn("timeout", content["refresh_error"])
+        self.assertEqual(5, self.client.holding_registers[0x10])
+
+    async def stream(self, query: str, events_count: int) -> Tuple[MutableMapping[str, Any], List[str]]:
+        """
+        Requests the event stream directly through ASGI, as it never ends, and disconnects after `events_count`
+        events.
+        """
+        messages: asyncio.Queue[MutableMapping[str, Any]] = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive() -> Dict[str, Any]:
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: MutableMapping[str, Any]) -> None:
+            await messages.put(message)
+
+        path = f"{self.prefix}/api/stream"
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+                 "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+                 "headers": [(b"host", b"test")], "server": ("test", 80), "client": ("test", 1234)}
+        task = asyncio.create_task(app(scope, receive, send))
+
+        start = await asyncio.wait_for(messages.get(), 2)
+        events: List[str] = []
+        buffer = ""
+        while len(events) < events_count:
+            buffer += (await asyncio.wait_for(messages.get(), 2)).get("body", b"").decode()
+            *received, buffer = buffer.split("\n\n")
+            events += received
+
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        return start, events
+
+    def parse_event(self, event: str) -> Any:
+        lines = event.split("\n")
+        self.assertEqual("event: values", lines[0])
+        return json.loads(lines[1].removeprefix("data: "))
+
+    async def test_stream(self) -> None:
+        async def change_values() -> None:
+            await asyncio.sleep(0.05)
+            self.client.input_registers[1] = 200
+            # only the changed register is sent
+            await self.poller.refresh(["voltage", "mode"])
+
+        changer = asyncio.create_task(change_values())
+        with mock.patch("modbus_client.server.api.StreamKeepaliveInterval", 0.1):
+            start, events = await self.stream("names=voltage,mode", 3)
+        await changer
+
+        self.assertEqual(200, start["status"])
+        self.assertIn((b"content-type", b"text/event-stream; charset=utf-8"), start["headers"])
+        first = self.parse_event(events[0])
+        self.assertEqual({"mode": 1, "voltage": 12.3}, first["values"])
+        self.assertEqual({"mode", "voltage"}, set(first["timestamps"]))
+        self.assertEqual({"voltage": 20.0}, self.parse_event(events[1])["values"])
+        self.assertEqual(": keepalive", events[2])
+        # the stream unsubscribes when the client disconnects
+        self.assertEqual([], self.poller._subscriptions)
+
+    async def test_stream_unknown_register(self) -> None:
+        response = await self.http.get(f"{self.prefix}/api/stream", params={"names": "voltage,unknown"})
+
+        self.assertEqual(404, response.status_code)
+        self.assertEqual([], self.poller._subscriptions)
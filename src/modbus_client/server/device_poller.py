@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from contextlib import closing
+from typing import Dict, Optional, Sequence, Set, Callable, Any, List, Union, Iterable
+
+from modbus_client.device.registers.device_register import IDeviceRegister
+from modbus_client.server.mytypes import Connector, TValuesMap
+
+log = logging.getLogger("device_poller")
+
+PollerSubscriber = Callable[[TValuesMap], None]
+
+
+class PollerSubscription:
+    def __init__(self, poller: "DevicePoller", subscriber: PollerSubscriber,
+                 registers: Optional[Iterable[str]]) -> None:
+        self.poller = poller
+        self.subscriber = subscriber
+        self.registers: Optional[Set[str]] = None
+        self.set_registers(registers)
+
+    def set_registers(self, registers: Optional[Iterable[str]]) -> None:
+        """
+        Sets names of registers polled on behalf of this subscriber, None means all of them.
+        """
+        self.registers = None if registers is None else set(registers)
+        self.poller._wakeup.set()
+
+    def unsubscribe(self) -> None:
+        if self in self.poller._subscriptions:
+            self.poller._subscriptions.remove(self)
+
+
+class DevicePoller:
+    """
+    Periodically reads all registers of a device and keeps the latest values. All bus access of the WebUI goes through
+    a single poller, refresh requests arriving while a transaction is in flight are merged into the next one.
+    Pollers of devices sharing a line should share `bus_lock`, so their transactions don't interleave.
+    """
+
+    def __init__(self, connector: Connector, poll_interval: float, bus_lock: Optional[asyncio.Lock] = None) -> None:
+        self.connector = connector
+        self.poll_interval = poll_interval
+
+        self.values: TValuesMap = {}
+        self.timestamps: Dict[str, float] = {}
+        # errors of registers whose last read failed, cleared once they are read
+        self.errors: Dict[str, BaseException] = {}
+        self.last_error: Optional[BaseException] = None
+
+        self._registers = {x.name: x for x in connector.modbus_device.get_device_config().get_all_registers()}
+        self._subscriptions: List[PollerSubscription] = []
+        self._bus_lock = asyncio.Lock() if bus_lock is None else bus_lock
+        self._wakeup = asyncio.Event()
+        self._pending: Set[str] = set()
+        self._pending_future: Optional[asyncio.Future[None]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self, subscriber: PollerSubscriber,
+                  registers: Optional[Iterable[str]] = None) -> PollerSubscription:
+        """
+        Registers a callback receiving values updated by each transaction. Periodic polling reads only the registers
+        watched by current subscriptions (`registers`, None means all of them).
+        """
+        subscription = PollerSubscription(self, subscriber, registers)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def get_polled_registers(self) -> List[str]:
+        """
+        Returns names of registers watched by current subscriptions, except static ones already read.
+        """
+        names: Set[str] = set()
+        for subscription in self._subscriptions:
+            if subscription.registers is None:
+                names = set(self._registers.keys())
+                break
+            names.update(subscription.registers)
+        return [name for name, register in self._registers.items()
+                if name in names and not (register.static and name in self.values)]
+
+    def get_snapshot(self) -> TValuesMap:
+        return dict(self.values)
+
+    def get_age(self, name: str) -> Optional[float]:
+        ts = self.timestamps.get(name)
+        return None if ts is None else time.time() - ts
+
+    async def refresh(self, registers: Optional[Sequence[Union[str, IDeviceRegister]]] = None) -> TValuesMap:
+        """
+        Schedules a read of given registers (all if None) and waits for it. Raises if the read failed.
+        """
+        names = list(self._registers.keys()) if registers is None else [self._get_name(x) for x in registers]
+
+        fut = self._schedule(names)
+        await asyncio.shield(fut)
+
+        return {x: self.values[x] for x in names}
+
+    async def get_values(self, registers: Optional[Sequence[Union[str, IDeviceRegister]]] = None,
+                         max_age: float = 0, errors: Optional[Dict[str, BaseException]] = None) -> TValuesMap:
+        """
+        Returns values of given registers (all if None), reading only those not read within last `max_age` seconds.
+        If `errors` is given, a partially failed read doesn't raise, registers whose read failed are left out of the
+        result and their errors are stored in `errors`. It still raises if none of the registers could be read.
+        """
+        names = list(self._registers.keys()) if registers is None else [self._get_name(x) for x in registers]
+
+        now = time.time()
+        stale = [x for x in names if x not in self.timestamps or
+                 (now - self.timestamps[x] > max_age and not self._registers[x].static)]
+        if len(stale) > 0:
+            try:
+                await self.refresh(stale)
+            except Exception:
+                if errors is None:
+                    raise
+                failed = {x: self.errors[x] for x in stale if x in self.errors}
+                if len(failed) == len(names):
+                    raise
+                errors.update(failed)
+
+        return {x: self.values[x] for x in names if errors is None or x not in errors}
+
+    async def write(self, register: Union[str, IDeviceRegister], value: Any, refresh: bool = True) -> None:
+        """
+        Writes a register and, with `refresh`, reads it back, so subscribers get the new value.
+        """
+        reg = self._registers[self._get_name(register)]
+        async with self._bus_lock:
+            with closing(self.connector.client_factory()) as client:
+                await self.connector.modbus_device.write_register(client, reg, value)
+        if refresh:
+            await self.refresh([reg])
+
+    def _get_name(self, register: Union[str, IDeviceRegister]) -> str:
+        name = register if isinstance(register, str) else register.name
+        if name not in self._registers:
+            raise KeyError(f"unknown register: {name}")
+        return name
+
+    def _schedule(self, names: Sequence[str]) -> "asyncio.Future[None]":
+        self._pending.update(names)
+        if self._pending_future is None:
+            self._pending_future = asyncio.get_running_loop().create_future()
+            self._wakeup.set()
+            self.start()
+        return self._pending_future
+
+    async def _run(self) -> None:
+        while True:
+            polled_registers = self.get_polled_registers()
+            timeout = self.poll_interval if self.poll_interval > 0 and len(polled_registers) > 0 else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self._schedule(polled_registers)
+            self._wakeup.clear()
+
+            if self._pending_future is None:
+                continue
+
+            names, fut = self._pending, self._pending_future
+            self._pending, self._pending_future = set(), None
+
+            try:
+                await self._read(names)
+                fut.set_result(None)
+            except Exception as e:
+                log.warning(f"unable to read registers: {e!r}")
+                # the traceback references frames of this task, waiters clearing them (e.g. assertRaises) would
+                # close it
+                fut.set_exception(e.with_traceback(None))
+                # retrieve the exception so asyncio doesn't complain if no one is waiting
+                fut.exception()
+
+    async def _read(self, names: Set[str]) -> None:
+        """
+        Reads given registers. Registers read by requests which succeeded are stored and published even if other
+        requests failed, the read then raises the first error. Errors of the failed registers are kept in `errors`.
+        """
+        registers = [self._registers[x] for x in names]
+        errors: Dict[str, Exception] = {}
+        async with self._bus_lock:
+            try:
+                with closing(self.connector.client_factory()) as client:
+                    values = await self.connector.modbus_device.read_registers(client, registers, errors=errors)
+            except Exception as e:
+                self.last_error = e
+                for name in names:
+                    self.errors[name] = e
+                raise
+
+        now = time.time()
+        self.last_error = next(iter(errors.values()), None)
+        self.values.update(values)
+        for name in values:
+            self.timestamps[name] = now
+            self.errors.pop(name, None)
+        self.errors.update(errors)
+
+        for subscription in list(self._subscriptions):
+            try:
+                subscription.subscriber(values)
+            except Exception:
+                log.exception("subscriber failed")
+
+        if self.last_error is not None:
+            raise self.last_error
+
+
+__all__ = [
+    "DevicePoller",
+    "PollerSubscriber",
+    "PollerSubscription",
+]
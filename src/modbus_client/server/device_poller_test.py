@@ -0,0 +1,132 @@
+import asyncio
+import unittest
+from typing import List, Tuple, Dict
+
+from modbus_client.client.exceptions import ReadErrorException
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.server.device_poller import DevicePoller
+from modbus_client.server.mytypes import Connector, TValuesMap
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+    - current/0x0002/uint16
+    - serial/0x0010/uint16,static
+
+  holding_registers:
+    - mode/0x0020/uint16
+"""
+
+
+class SlowMockModbusClient(MockModbusClient):
+    def __init__(self) -> None:
+        super().__init__(input_registers={1: 123, 2: 5, 0x10: 777}, holding_registers={0x20: 1})
+        self.reads: List[Tuple[int, int]] = []
+        self.fail_holding = False
+
+    async def read_input_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.reads.append((address, count))
+        await asyncio.sleep(0.01)
+        return await super().read_input_registers(unit, address, count)
+
+    async def read_holding_registers(self, unit: int, address: int, count: int) -> List[int]:
+        self.reads.append((address, count))
+        await asyncio.sleep(0.01)
+        if self.fail_holding:
+            raise ReadErrorException("timeout", timeout=True)
+        return await super().read_holding_registers(unit, address, count)
+
+
+class DevicePollerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.client = SlowMockModbusClient()
+        device = ModbusDeviceFactory.from_config(config).create_device(1)
+        self.poller = DevicePoller(Connector(device, lambda: self.client), poll_interval=0.05)
+
+    async def asyncTearDown(self) -> None:
+        await self.poller.stop()
+
+    async def test_refreshes_merged(self) -> None:
+        first = asyncio.create_task(self.poller.refresh(["voltage"]))
+        await asyncio.sleep(0.005)
+        # requested while the first transaction is in flight, merged into the next one
+        results = await asyncio.gather(first, self.poller.refresh(["current"]), self.poller.refresh(["mode"]))
+
+        self.assertEqual([{"voltage": 12.3}, {"current": 5}, {"mode": 1}], results)
+        self.assertEqual([(1, 1), (2, 1), (0x20, 1)], self.client.reads)
+
+    async def test_subscriptions(self) -> None:
+        received: List[TValuesMap] = []
+        self.poller.subscribe(received.append, ["voltage", "serial"])
+        other = self.poller.subscribe(lambda _: None, ["current"])
+
+        self.assertEqual(["voltage", "current", "serial"], self.poller.get_polled_registers())
+        self.poller.start()
+        await asyncio.sleep(0.08)
+
+        self.assertEqual({"voltage": 12.3, "current": 5, "serial": 777}, received[0])
+        # static registers are read once
+        self.assertEqual(["voltage", "current"], self.poller.get_polled_registers())
+
+        other.unsubscribe()
+        self.assertEqual(["voltage"], self.poller.get_polled_registers())
+        other.unsubscribe()
+
+        # the poll already scheduled may still include the unsubscribed register
+        await asyncio.sleep(0.12)
+        self.assertEqual({"voltage": 12.3}, received[-1])
+        self.assertEqual((1, 1), self.client.reads[-1])
+
+    async def test_no_polling_without_subscribers(self) -> None:
+        self.poller.start()
+        await asyncio.sleep(0.08)
+
+        self.assertEqual([], self.client.reads)
+
+    async def test_get_values_max_age(self) -> None:
+        await self.poller.get_values(["voltage", "serial"], max_age=10)
+        await self.poller.get_values(["voltage", "serial"], max_age=10)
+        self.assertEqual([(1, 1), (0x10, 1)], self.client.reads)
+
+        self.client.reads.clear()
+        await self.poller.get_values(["voltage", "serial"], max_age=0)
+        self.assertEqual([(1, 1)], self.client.reads)
+
+        with self.assertRaises(KeyError):
+            await self.poller.get_values(["unknown"])
+
+    async def test_partial_failure(self) -> None:
+        received: List[TValuesMap] = []
+        self.poller.subscribe(received.append, [])
+        self.client.fail_holding = True
+
+        with self.assertRaises(ReadErrorException):
+            await self.poller.refresh(["voltage", "mode"])
+
+        # values read by the successful request are stored and published
+        self.assertEqual({"voltage": 12.3}, self.poller.values)
+        self.assertEqual([{"voltage": 12.3}], received)
+        self.assertEqual({"mode"}, set(self.poller.errors))
+        self.assertIs(self.poller.errors["mode"], self.poller.last_error)
+
+        self.client.fail_holding = False
+        self.assertEqual({"mode": 1}, await self.poller.refresh(["mode"]))
+        self.assertEqual({}, self.poller.errors)
+
+    async def test_get_values_partial(self) -> None:
+        self.client.fail_holding = True
+
+        with self.assertRaises(ReadErrorException):
+            await self.poller.get_values(["voltage", "mode"])
+
+        errors: Dict[str, BaseException] = {}
+        self.assertEqual({"voltage": 12.3}, await self.poller.get_values(["voltage", "mode"], errors=errors))
+        self.assertEqual({"mode"}, set(errors))
+
+        # nothing was read
+        with self.assertRaises(ReadErrorException):
+            await self.poller.get_values(["mode"], errors={})
@@ -1,7 +1,8 @@
 import html
 import traceback
-from contextlib import contextmanager, closing
-from typing import Union, Any, Dict, Optional, cast, Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Union, Any, Optional, cast, Generator, Callable, Dict, List, Sequence
 
 from nicegui import ui, Client
 from nicegui.elements.card import Card
@@ -12,14 +13,13 @@ from modbus_client.device.registers.device_register import DeviceHoldingRegister
 from modbus_client.device.registers.enum_definition import EnumDefinition
 from modbus_client.device.registers.register_type import RegisterType
 from modbus_client.registers.registers import EnumValue, FlagsCollection
-from modbus_client.server.js_helpers import add_custom_js, js_copy_handler
-from modbus_client.server.mytypes import Connector
-from modbus_client.server.runtime_data import RuntimeData
+from modbus_client.server.device_poller import DevicePoller
+from modbus_client.server.js_helpers import add_custom_js, js_copy_handler, js_copy
+from modbus_client.server.mytypes import Connector, TValue, TValuesMap
+from modbus_client.server.runtime_data import RuntimeData, DeviceRuntime
 
 UiElement = Any
-TValue = Union[int, float, EnumValue, FlagsCollection, str]
 TValueForSet = Union[int, float, EnumDefinition]
-TValuesMap = Dict[str, TValue]
 
 
 @contextmanager
@@ -32,22 +32,76 @@ def ui_card(title: str = "") -> Generator[Card, Any, None]:
 
 notification_timeout = 1000
 
+SectionSize = 40
+
 
 class UiState:
-    def __init__(self, conn: Connector, config: DeviceConfig) -> None:
+    def __init__(self, conn: Connector, config: DeviceConfig, poller: DevicePoller) -> None:
         self.conn = conn
         self.config = config
+        self.poller = poller
 
-        self.is_loading = False
         self.write_unlocked = False
 
 
-def append_context_menu(el: UiElement, reg: IDeviceRegister, value_str: str) -> None:
+class RegisterSection:
+    def __init__(self, title: str, registers: Sequence[IDeviceRegister], editable: bool) -> None:
+        self.title = title
+        self.registers = registers
+        self.editable = editable
+
+        self.is_built = False
+        self.expansion: UiElement = None
+        self.content: UiElement = None
+
+    def get_register(self, name: str) -> IDeviceRegister:
+        return next(x for x in self.registers if x.name == name)
+
+
+def get_register_sections(registers: Sequence[IDeviceRegister], editable: bool) -> List[RegisterSection]:
+    """
+    Groups registers into WebUI sections, by `group` if defined, otherwise in chunks of SectionSize registers. Groups
+    larger than SectionSize are split into chunks too.
+    """
+    groups: Dict[str, List[IDeviceRegister]] = {}
+    ungrouped: List[IDeviceRegister] = []
+    for reg in registers:
+        if reg.group is not None:
+            groups.setdefault(reg.group, []).append(reg)
+        else:
+            ungrouped.append(reg)
+
+    sections = []
+    for name, regs in groups.items():
+        chunks_count = (len(regs) + SectionSize - 1) // SectionSize
+        for i in range(chunks_count):
+            title = name if chunks_count == 1 else f"{name} {i + 1}/{chunks_count}"
+            sections.append(RegisterSection(title, regs[i * SectionSize:(i + 1) * SectionSize], editable))
+    for i in range(0, len(ungrouped), SectionSize):
+        chunk = ungrouped[i:i + SectionSize]
+        if len(ungrouped) > SectionSize:
+            sections.append(RegisterSection(f"{chunk[0].address}-{chunk[-1].address}", chunk, editable))
+        else:
+            sections.append(RegisterSection("Other" if len(groups) > 0 else "All", chunk, editable))
+    return sections
+
+
+@dataclass
+class RegisterControl:
+    """
+    Handle of a register widget built once per page. `update` changes only the bound element values, `rebuild`
+    recreates the widget, which is needed only when the write lock changes.
+    """
+    update: Callable[[TValue], None]
+    rebuild: Optional[Callable[[], None]] = None
+
+
+def append_context_menu(el: UiElement, reg: IDeviceRegister, get_value_str: Callable[[], str]) -> None:
     with el:
         with ui.context_menu():
             ui.menu_item(f'Copy name').on('click', js_handler=js_copy_handler(reg.name))
             ui.menu_item(f'Copy address').on('click', js_handler=js_copy_handler(f"{reg.address}"))
-            ui.menu_item(f'Copy value').on('click', js_handler=js_copy_handler(value_str))
+            ui.menu_item(f'Copy value', on_click=lambda: ui.run_javascript(js_copy(get_value_str())))
 
 
 def notify_positive(ui_el: UiElement, text: str) -> None:
@@ -72,79 +126,189 @@ def register_ui(runtime_data: RuntimeData) -> None:
     text-align: right;
 }
 
-.q-checkbox__label { 
+.q-checkbox__label {
     overflow-wrap: anywhere;
     font-size: 12px;
 }
 """, shared=True)
     add_custom_js()
 
-    @ui.page('/')  # type: ignore
+    for device in runtime_data.devices:
+        register_device_ui(device)
+
+    if len(runtime_data.devices) > 1:
+        @ui.page('/')  # type: ignore
+        async def ui_devices() -> None:
+            with ui_card("Devices"):
+                for device in runtime_data.devices:
+                    config = device.device_config
+                    ui.link(f"{device.name} ({config.device}, unit {config.unit})", f"{device.route_prefix}/")
+
+
+def register_device_ui(device: DeviceRuntime) -> None:
+    @ui.page(f'{device.route_prefix}/', title=f"Modbus - {device.name}")  # type: ignore
     async def ui_index(client: Client) -> None:
         await client.connected()
 
-        conn = runtime_data.connector
-        device_config = runtime_data.connector.modbus_device.get_device_config()
-        state = UiState(conn, device_config)
-
-        all_regs = conn.modbus_device.get_device_config().get_all_registers()
+        conn = device.connector
+        poller = device.poller
+        device_config = device.connector.modbus_device.get_device_config()
+        state = UiState(conn, device_config, poller)
 
         input_registers = device_config.registers.input_registers + [x for x in device_config.registers.holding_registers if x.readonly]
         holding_registers = [x for x in device_config.registers.holding_registers if not x.readonly]
 
-        async def read_data() -> Optional[TValuesMap]:
+        input_sections = get_register_sections(input_registers, editable=False)
+        holding_sections = get_register_sections(holding_registers, editable=True)
+        sections = input_sections + holding_sections
+        section_by_register = {reg.name: section for section in sections for reg in section.registers}
+
+        # with few registers all sections start opened, otherwise only the first one of each kind
+        all_opened = len(input_registers) + len(holding_registers) <= SectionSize
+        opened_sections = [x for x in sections if all_opened or x in input_sections[:1] or x in holding_sections[:1]]
+
+        controls: Dict[str, RegisterControl] = {}
+        control_roots: Dict[str, UiElement] = {}
+        placeholders: Dict[str, UiElement] = {}
+        shown_values: TValuesMap = {}
+        filter_text = ""
+
+        def get_opened_registers() -> List[str]:
+            return [reg.name for section in opened_sections for reg in section.registers]
+
+        def matches_filter(reg: IDeviceRegister) -> bool:
+            text = filter_text.lower()
+            return text in reg.name.lower() or text in reg.description.lower()
+
+        async def refresh() -> None:
+            spinner.set_visibility(True)
             try:
-                with closing(conn.client_factory()) as device_client:
-                    return await conn.modbus_device.read_registers(device_client, all_regs)
+                await poller.refresh(get_opened_registers())
             except:
                 traceback.print_exc()
                 ui.notify(f"Unable to update fetch data", type="negative", timeout=notification_timeout)
-                return None
-
-        async def refresh() -> None:
-            state.is_loading = True
-            ui_vars.refresh(None)
-            values = await read_data()
-            state.is_loading = False
-            ui_vars.refresh(values)
-
-        def lock_write() -> None:
-            state.write_unlocked = False
-            ui_vars.refresh()
-
-        def unlock_write() -> None:
-            state.write_unlocked = True
-            ui_vars.refresh()
+                # show what was read and the errors of the rest
+                apply_values({})
+            spinner.set_visibility(False)
+
+        def set_write_unlocked(unlocked: bool) -> None:
+            state.write_unlocked = unlocked
+            ui_header.refresh()
+            for control in controls.values():
+                if control.rebuild is not None:
+                    control.rebuild()
+
+        def build_control(section: RegisterSection, reg: IDeviceRegister, values: TValuesMap) -> None:
+            with control_roots[reg.name]:
+                if section.editable:
+                    controls[reg.name] = emit_edit_control(state, values, cast(DeviceHoldingRegister, reg))
+                else:
+                    controls[reg.name] = emit_view_control(state, values, reg)
+            shown_values[reg.name] = values[reg.name]
+
+        def build_section(section: RegisterSection) -> None:
+            """
+            Builds controls of the registers already read, the others get a placeholder replaced once they are read.
+            """
+            with section.content:
+                for reg in section.registers:
+                    with ui.column() as root:
+                        pass
+                    root.set_visibility(matches_filter(reg))
+                    control_roots[reg.name] = root
+                    if reg.name in poller.values:
+                        build_control(section, reg, poller.values)
+                    else:
+                        with root:
+                            placeholders[reg.name] = ui.label().classes("text-caption")
+            section.is_built = True
+
+        def update_placeholders() -> None:
+            for name, label in placeholders.items():
+                error = poller.errors.get(name)
+                if error is None:
+                    label.set_text(f"{name}: not read yet")
+                    label.classes(remove="text-negative")
+                else:
+                    label.set_text(f"{name}: read error: {error}")
+                    label.classes("text-negative")
+
+        def apply_values(values: TValuesMap) -> None:
+            for section in opened_sections:
+                if not section.is_built and any(x.name in poller.values or x.name in poller.errors
+                                                for x in section.registers):
+                    build_section(section)
+
+            for name, value in values.items():
+                if name in placeholders:
+                    placeholders.pop(name).delete()
+                    section = section_by_register[name]
+                    build_control(section, section.get_register(name), values)
+                elif name in controls and shown_values.get(name) != value:
+                    shown_values[name] = value
+                    controls[name].update(value)
+
+            update_placeholders()
+
+        async def on_section_toggle(section: RegisterSection, is_opened: bool) -> None:
+            if is_opened:
+                if section not in opened_sections:
+                    opened_sections.append(section)
+                # show cached values right away, then fetch the current ones
+                apply_values(poller.values)
+            elif section in opened_sections:
+                opened_sections.remove(section)
+            subscription.set_registers(get_opened_registers())
+
+            if is_opened:
+                try:
+                    await poller.refresh(section.registers)
+                except:
+                    traceback.print_exc()
+                    ui.notify(f"Unable to fetch /{section.title}/", type="negative", timeout=notification_timeout)
+                    apply_values({})
+
+        def on_filter_change(text: str) -> None:
+            nonlocal filter_text
+            filter_text = text or ""
+            for section in sections:
+                section.expansion.set_visibility(any(matches_filter(x) for x in section.registers))
+            for name, root in control_roots.items():
+                root.set_visibility(matches_filter(section_by_register[name].get_register(name)))
 
         @ui.refreshable  # type: ignore
-        def ui_vars(values) -> None:
-            with ui.row():
-                ui.button(text="Refresh all", on_click=refresh)
-                if state.write_unlocked:
-                    ui.button(text="Lock write", on_click=lock_write, color="warning")
-                else:
-                    ui.button(text="Unlock write", on_click=unlock_write, color="secondary")
+        def ui_header() -> None:
+            ui.button(text="Refresh", on_click=refresh)
+            if state.write_unlocked:
+                ui.button(text="Lock write", on_click=lambda: set_write_unlocked(False), color="warning")
+            else:
+                ui.button(text="Unlock write", on_click=lambda: set_write_unlocked(True), color="secondary")
 
-            if state.is_loading:
-                ui.spinner(size='lg')
+        with ui.row(align_items="center"):
+            ui_header()
+            ui.input("Filter", on_change=lambda e: on_filter_change(e.value)).props("dense outlined clearable")
 
-            if values is None:
-                return
+        spinner = ui.spinner(size='lg')
+        spinner.set_visibility(False)
 
-            with ui.row():
-                with ui_card("Input registers"):
-                    for reg in input_registers:
-                        with ui.column():
-                            emit_view_control(state, values, reg)
+        with ui.row(align_items="start"):
+            for title, kind_sections in (("Input registers", input_sections), ("Holding registers", holding_sections)):
+                if len(kind_sections) == 0:
+                    continue
+                with ui_card(title):
+                    for section in kind_sections:
+                        with ui.expansion(f"{section.title} ({len(section.registers)})",
+                                          value=section in opened_sections) as section.expansion:
+                            section.content = ui.column()
+                        section.expansion.on_value_change(lambda e, section=section: on_section_toggle(section, e.value))
 
-                with ui_card("Holding registers"):
-                    for reg in holding_registers:
-                        with ui.column():
-                            emit_edit_control(state, values, reg)
+        subscription = poller.subscribe(apply_values, get_opened_registers())
+        client.on_disconnect(subscription.unsubscribe)
 
-        ui_vars(None)
+        apply_values(poller.values)
 
-        await refresh()
+        if not all(x.is_built for x in opened_sections):
+            await refresh()
 
 
 def process_value_for_copy(val: TValue) -> str:
@@ -181,135 +345,184 @@ def process_value_for_edit(val: TValue) -> str | float:
         raise ValueError("invalid value")
 
 
-def emit_view_control(state: UiState, values: TValuesMap, reg: IDeviceRegister) -> None:
-    conn = state.conn
-    is_refreshing = False
-    ui_root = None
-
+def process_value_for_view(reg: IDeviceRegister, val: TValue) -> str | bool:
     unit_str = "" if reg.unit is None else f" [{reg.unit}]"
 
-    async def fn_refresh(ui_el: UiElement) -> None:
-        nonlocal is_refreshing, ui_root
-        try:
-            is_refreshing = True
-            ui_cont.refresh()
+    if reg.type == RegisterType.BOOL:
+        return cast(bool, val)
+    elif reg.type == RegisterType.ENUM:
+        return cast(EnumValue, val).enum_name or "<unknown>"
+    elif reg.type == RegisterType.STRING:
+        return cast(str, val)
+    elif isinstance(val, int):
+        return str(val) + unit_str
+    elif isinstance(val, float):
+        return str(round(val, 8)) + unit_str
+    else:
+        raise ValueError("invalid value")
 
-            with closing(conn.client_factory()) as device_client:
-                current_value = await conn.modbus_device.read_register(device_client, reg)
 
-            values[reg.name] = current_value
+def emit_view_control(state: UiState, values: TValuesMap, reg: IDeviceRegister) -> RegisterControl:
+    current_value = values[reg.name]
 
-            notify_positive(ui_root, f"/{reg.name}/ refreshed with value /{ui_el.value}/")
+    async def fn_refresh() -> None:
+        try:
+            refresh_button.props("disabled loading")
+
+            new_value = (await state.poller.refresh([reg]))[reg.name]
+
+            notify_positive(ui_root, f"/{reg.name}/ refreshed with value /{process_value_for_copy(new_value)}/")
         except:
             traceback.print_exc()
             notify_negative(ui_root, f"Unable to refresh /{reg.name}/")
         finally:
-            is_refreshing = False
-            ui_cont.refresh()
-
-    @ui.refreshable  # type: ignore
-    def ui_cont() -> None:
-        value = values[reg.name]
+            refresh_button.props(remove="disabled loading")
 
+    with ui.element() as ui_root:
         with ui.row(align_items="center"):
-            # if reg.type == RegisterType.FLAGS:
-            #     ui.separator()
-
             ui_el: UiElement
             if reg.type == RegisterType.BOOL:
-                value = cast(bool, value)
-                ui_el = ui.checkbox(text=reg.name, value=value)
-                ui_el.props("dense outlined readonly").style("width: 200px")
-            elif reg.type == RegisterType.ENUM:
-                value = cast(EnumValue, value)
-                ui_el = ui.input(reg.name, value=value.enum_name or "<unknown>").props("autogrow")
+                ui_el = ui.checkbox(text=reg.name, value=cast(bool, current_value))
                 ui_el.props("dense outlined readonly").style("width: 200px")
             elif reg.type == RegisterType.FLAGS:
                 ui_el = ui.label(text=reg.name)
                 ui_el.style("width: 200px")
-            elif reg.type == RegisterType.STRING:
-                value = cast(EnumValue, value)
-                ui_el = ui.input(reg.name, value=cast(str, value)).props("autogrow")
-                ui_el.props("dense outlined readonly").style("width: 200px")
             else:
-                if isinstance(value, int):
-                    value_str = str(value)
-                elif isinstance(value, float):
-                    value_str = str(round(value, 8))
-                else:
-                    raise ValueError("invalid value")
-
-                ui_el = ui.input(reg.name, value=value_str + unit_str)
+                ui_el = ui.input(reg.name, value=cast(str, process_value_for_view(reg, current_value)))
+                if reg.type in (RegisterType.ENUM, RegisterType.STRING):
+                    ui_el.props("autogrow")
                 ui_el.props("dense outlined readonly").style("width: 200px")
 
-            value_copy_str = process_value_for_copy(value)
-
-            add_tooltip_for_reg_value(ui_el, reg, value)
-            append_context_menu(ui_el, reg, value_copy_str)
+            tooltip = add_tooltip_for_reg_value(ui_el, reg, current_value)
+            append_context_menu(ui_el, reg, lambda: process_value_for_copy(current_value))
 
             # Refresh button
-            el = ui.button(text="Refresh", on_click=lambda: fn_refresh(ui_el))
-            if is_refreshing:
-                el.props("disabled loading")
+            refresh_button = ui.button(text="Refresh", on_click=fn_refresh)
 
+        flag_checkboxes = []
         if reg.type == RegisterType.FLAGS:
             with ui.column():
-                flags_col = cast(FlagsCollection, value)
+                flags_col = cast(FlagsCollection, current_value)
                 assert reg.flags is not None
                 for flag in reg.flags:
                     ui_el2 = ui.checkbox(text=flag.name, value=flag in flags_col)
                     ui_el2.props("dense")  # .style("width: 200px")
+                    flag_checkboxes.append((flag, ui_el2))
 
-    with ui.element() as ui_root:
-        ui_cont()
+    def update(value: TValue) -> None:
+        nonlocal current_value
+        current_value = value
+
+        if reg.type == RegisterType.FLAGS:
+            for flag, checkbox in flag_checkboxes:
+                checkbox.value = flag in cast(FlagsCollection, value)
+        else:
+            ui_el.value = process_value_for_view(reg, value)
+
+        tooltip.set_content(format_tooltip_for_reg_value(reg, value))
+
+    return RegisterControl(update=update)
 
 
-def emit_edit_control(state: UiState, values: Any, reg: DeviceHoldingRegister) -> None:
-    conn = state.conn
+def emit_edit_control(state: UiState, values: TValuesMap, reg: DeviceHoldingRegister) -> RegisterControl:
+    current_value = values[reg.name]
     is_refreshing = False
     is_setting = False
-    override_value = None
-    ui_root = None
+    is_updating = False
+
+    ui_el: UiElement = None
+    tooltip: UiElement = None
+    refresh_button: UiElement = None
+    set_button: UiElement = None
 
     unit_str = "" if reg.unit is None else f" [{reg.unit}]"
 
+    def is_enabled() -> bool:
+        return state.write_unlocked and not is_refreshing and not is_setting
+
+    def get_display_value(value: TValue) -> Any:
+        if reg.type == RegisterType.BOOL:
+            return value
+        elif reg.type == RegisterType.ENUM:
+            return process_value_for_edit(value)
+        elif state.write_unlocked:
+            if isinstance(value, int):
+                return value
+            elif isinstance(value, float):
+                return round(value, 8)
+            else:
+                raise ValueError("invalid value")
+        else:
+            return process_value_for_copy(value) + unit_str
+
+    def set_element_value(value: TValue) -> None:
+        nonlocal is_updating
+        is_updating = True
+        try:
+            ui_el.value = get_display_value(value)
+        finally:
+            is_updating = False
+
+    def update_busy_state() -> None:
+        for btn, is_loading in ((refresh_button, is_refreshing), (set_button, is_setting)):
+            if btn is None:
+                continue
+            btn.props(remove="disabled loading")
+            if is_refreshing or is_setting:
+                btn.props("disabled")
+            if is_loading:
+                btn.props("loading")
+
+        if reg.type == RegisterType.BOOL:
+            ui_el.set_enabled(is_enabled())
+        elif is_enabled():
+            ui_el.props(remove="readonly")
+        else:
+            ui_el.props("readonly")
+
+    def update(value: TValue) -> None:
+        nonlocal current_value
+        previous_value = current_value
+        current_value = value
+
+        if is_refreshing or is_setting:
+            return
+
+        is_user_editing = reg.type not in (RegisterType.BOOL, RegisterType.ENUM) and state.write_unlocked and \
+                          ui_el.value != get_display_value(previous_value)
+        if not is_user_editing:
+            set_element_value(value)
+
+        tooltip.set_content(format_tooltip_for_reg_value(reg, value))
+
     async def fn_refresh() -> None:
         nonlocal is_refreshing
-        nonlocal ui_root
         try:
             is_refreshing = True
-            ui_cont.refresh()
-
-            with closing(conn.client_factory()) as device_client:
-                current_value = await conn.modbus_device.read_register(device_client, reg)
+            update_busy_state()
 
-            values[reg.name] = current_value
+            new_value = (await state.poller.refresh([reg]))[reg.name]
 
-            notify_positive(ui_root, f"/{reg.name}/ refreshed with value /{process_value_for_copy(current_value)}/")
+            notify_positive(ui_root, f"/{reg.name}/ refreshed with value /{process_value_for_copy(new_value)}/")
         except:
-            traceback.print_exc()
             traceback.print_exc()
             notify_negative(ui_root, f"Unable to refresh /{reg.name}/")
         finally:
             is_refreshing = False
-            ui_cont.refresh()
+            update_busy_state()
+            update(current_value)
 
     async def fn_set(new_value: TValueForSet, value_str: str | None = None) -> None:
         nonlocal is_setting
-        nonlocal override_value
-        nonlocal ui_root
 
         if value_str is None:
             value_str = str(new_value)
 
         try:
             is_setting = True
-            override_value = new_value
-            ui_cont.refresh()
+            update_busy_state()
 
-            with closing(conn.client_factory()) as device_client:
-                await conn.modbus_device.write_register(device_client, reg, new_value)
-            values[reg.name] = new_value
+            await state.poller.write(reg, new_value)
 
             notify_positive(ui_root, f"/{reg.name}/ set to /{value_str}/")
         except:
@@ -317,118 +530,108 @@ def emit_edit_control(state: UiState, values: Any, reg: DeviceHoldingRegister) -
             notify_negative(ui_root, f"Unable to update /{reg.name}/ value to /{value_str}/")
         finally:
             is_setting = False
-            override_value = None
-            ui_cont.refresh()
+            update_busy_state()
+            set_element_value(current_value)
+            tooltip.set_content(format_tooltip_for_reg_value(reg, current_value))
+
+    def on_value_change(fn: Callable[[], Any]) -> Callable[[Any], Any]:
+        def handler(_: Any) -> Any:
+            if is_updating or not is_enabled():
+                return None
+            return fn()
+
+        return handler
 
     @ui.refreshable  # type: ignore
     def ui_cont() -> None:
-        is_enabled = state.write_unlocked and not is_refreshing and not is_setting
+        nonlocal ui_el, tooltip, refresh_button, set_button
 
-        value = values[reg.name]
-        if override_value:
-            value = override_value
+        value = current_value
+        set_button = None
 
-        ui_el: UiElement
         set_on_change = None
         if reg.type == RegisterType.BOOL:
-            ui_el = ui.checkbox(reg.name, value=value)
-            if is_enabled:
-                ui_el.on_value_change(lambda sender: fn_set(sender.value))
+            ui_el = ui.checkbox(reg.name, value=get_display_value(value))
+            ui_el.on_value_change(on_value_change(lambda: fn_set(ui_el.value)))
             ui_el.props("dense outlined").style("width: 200px")
-            ui_el.enabled = is_enabled
         elif reg.type == RegisterType.ENUM:
             assert reg.enum is not None
             value_to_enum = {x.value: x for x in reg.enum}
 
             ui_el = ui.select(label=reg.name, options={x.value: x.get_display() for x in reg.enum},
-                              value=process_value_for_edit(value))
-            if is_enabled:
-                ui_el.on_value_change(lambda sender: fn_set(value_to_enum[sender.value], value_str=value_to_enum[sender.value].name))
+                              value=get_display_value(value))
+            ui_el.on_value_change(on_value_change(lambda: fn_set(value_to_enum[ui_el.value],
+                                                                 value_str=value_to_enum[ui_el.value].name)))
             ui_el.props("dense outlined").style("width: 200px")
-            if not is_enabled:
-                ui_el.props("readonly")
         elif reg.type == RegisterType.FLAGS:
             raise Exception("not supported")
         else:
             if state.write_unlocked:
-                value_control: int | float
-                if isinstance(value, int):
-                    value_control = value
-                elif isinstance(value, float):
-                    value_control = round(value, 8)
-                else:
-                    raise ValueError("invalid value")
-
-                ui_el = ui.number(reg.name + unit_str, value=value_control)
+                ui_el = ui.number(reg.name + unit_str, value=get_display_value(value))
                 set_on_change = lambda _: fn_set(ui_el.value)
-                if not is_enabled:
-                    ui_el.props("readonly")
             else:
-                ui_el = ui.input(reg.name, value=process_value_for_copy(value) + unit_str)
-                ui_el.props("readonly")
+                ui_el = ui.input(reg.name, value=get_display_value(value))
             ui_el.props("dense outlined").style("width: 200px")
 
-        value_copy_str = process_value_for_copy(value)
-
-        add_tooltip_for_reg_value(ui_el, reg, value)
-        append_context_menu(ui_el, reg, value_copy_str)
+        tooltip = add_tooltip_for_reg_value(ui_el, reg, value)
+        append_context_menu(ui_el, reg, lambda: process_value_for_copy(current_value))
 
         # Refresh button
-        el = ui.button(text="Refresh", on_click=lambda: fn_refresh())
-        if is_refreshing or is_setting:
-            el.props("disabled")
-        if is_refreshing:
-            el.props("loading")
+        refresh_button = ui.button(text="Refresh", on_click=lambda: fn_refresh())
 
         # Set button
         if state.write_unlocked and set_on_change is not None:
-            el = ui.button(text="Set", on_click=set_on_change, color="warning")
-            if is_refreshing or is_setting:
-                el.props("disabled")
-            if is_setting:
-                el.props("loading")
+            set_button = ui.button(text="Set", on_click=set_on_change, color="warning")
+
+        update_busy_state()
 
     with ui.row(align_items="center") as ui_root:
         ui_cont()
 
+    return RegisterControl(update=update, rebuild=ui_cont.refresh)
 
-def add_tooltip_for_reg_value(el: UiElement, reg: IDeviceRegister, value: TValue) -> None:
-    with el:
-        with Tooltip().props('''anchor="top left" self="bottom left" delay=500''').classes("text-body2"):
-            lines = [
-                f'<b>Name:</b> {html.escape(reg.name)}',
-                f'<b>Address:</b> {reg.address} / {reg.type.value}',
-                ""]
-
-            unit_str = "" if reg.unit is None else f" [{reg.unit}]"
-
-            if isinstance(value, EnumValue):
-                lines.append(f"<b>Value:</b> {html.escape(value.format())}")
-                if value.enum_display is not None:
-                    lines.append(f"<i>{html.escape(value.enum_display)}</i>")
-            elif isinstance(value, EnumDefinition):
-                lines.append(f"<b>Value:</b> {html.escape(value.name)}")
-                if value.display is not None:
-                    lines.append(f"<i>{html.escape(value.display)}</i>")
-            elif isinstance(value, bool):
-                lines.append(f"<b>Value:</b> {'ON' if value else 'OFF'}")
-            elif isinstance(value, int):
-                lines.append(f"<b>Value:</b> {value}{unit_str}")
-            elif isinstance(value, float):
-                lines.append(f"<b>Value:</b> {round(value, 8)}{unit_str}")
-            elif isinstance(value, FlagsCollection):
-                values_str = "".join(f"<br/> {html.escape(x.format())}" for x in value)
-                lines.append(f"<b>Value:</b> {values_str}")
-            elif isinstance(value, str):
-                lines.append(f"<b>Value:</b> {html.escape(value)}")
-            else:
-                raise ValueError("invalid value")
 
-            if len(reg.description) > 0:
-                lines.append("")
-                lines.append(f'<b>Register description:</b><br/>{html.escape(reg.description)}')
+def format_tooltip_for_reg_value(reg: IDeviceRegister, value: TValue) -> str:
+    lines = [
+        f'<b>Name:</b> {html.escape(reg.name)}',
+        f'<b>Address:</b> {reg.address} / {reg.type.value}',
+        ""]
 
-            ui.html("<br/>".join(lines))
+    unit_str = "" if reg.unit is None else f" [{reg.unit}]"
+
+    if isinstance(value, EnumValue):
+        lines.append(f"<b>Value:</b> {html.escape(value.format())}")
+        if value.enum_display is not None:
+            lines.append(f"<i>{html.escape(value.enum_display)}</i>")
+    elif isinstance(value, EnumDefinition):
+        lines.append(f"<b>Value:</b> {html.escape(value.name)}")
+        if value.display is not None:
+            lines.append(f"<i>{html.escape(value.display)}</i>")
+    elif isinstance(value, bool):
+        lines.append(f"<b>Value:</b> {'ON' if value else 'OFF'}")
+    elif isinstance(value, int):
+        lines.append(f"<b>Value:</b> {value}{unit_str}")
+    elif isinstance(value, float):
+        lines.append(f"<b>Value:</b> {round(value, 8)}{unit_str}")
+    elif isinstance(value, FlagsCollection):
+        values_str = "".join(f"<br/> {html.escape(x.format())}" for x in value)
+        lines.append(f"<b>Value:</b> {values_str}")
+    elif isinstance(value, str):
+        lines.append(f"<b>Value:</b> {html.escape(value)}")
+    else:
+        raise ValueError("invalid value")
+
+    if len(reg.description) > 0:
+        lines.append("")
+        lines.append(f'<b>Register description:</b><br/>{html.escape(reg.description)}')
+
+    return "<br/>".join(lines)
+
+
+def add_tooltip_for_reg_value(el: UiElement, reg: IDeviceRegister, value: TValue) -> UiElement:
+    with el:
+        with Tooltip().props('''anchor="top left" self="bottom left" delay=500''').classes("text-body2"):
+            return ui.html(format_tooltip_for_reg_value(reg, value))
 
 
 def add_tooltip(el: UiElement, tooltip_text: str) -> None:
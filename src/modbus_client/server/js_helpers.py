@@ -7,6 +7,10 @@ def js_copy_handler(text: str) -> str:
     return f'() => setTimeout(()=>{{unsecuredCopyToClipboard({json.dumps(text)})}}, 1)'
 
 
+def js_copy(text: str) -> str:
+    return f'unsecuredCopyToClipboard({json.dumps(text)})'
+
+
 def add_custom_js() -> None:
     ui.add_head_html("""<script>
 function unsecuredCopyToClipboard(text) {
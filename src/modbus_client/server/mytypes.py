@@ -1,8 +1,12 @@
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Union, Dict
 
 from modbus_client.client.async_modbus_client import AsyncModbusClient
 from modbus_client.device.modbus_device import ModbusDevice
+from modbus_client.registers.registers import EnumValue, FlagsCollection
+
+TValue = Union[int, float, EnumValue, FlagsCollection, str]
+TValuesMap = Dict[str, TValue]
 
 
 @dataclass
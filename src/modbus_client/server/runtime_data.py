@@ -1,8 +1,23 @@
+from typing import List
+
+from modbus_client.client.metrics import MetricsRegistry
+from modbus_client.server.device_poller import DevicePoller
 from modbus_client.server.mytypes import Connector
-from modbus_client.server.server_config import ServerConfig
+from modbus_client.server.server_config import ServerConfig, ServerDeviceConfig
+
+
+class DeviceRuntime:
+    def __init__(self, device_config: ServerDeviceConfig, connector: Connector, poller: DevicePoller,
+                 route_prefix: str) -> None:
+        self.name = device_config.name
+        self.device_config = device_config
+        self.connector = connector
+        self.poller = poller
+        self.route_prefix = route_prefix
 
 
 class RuntimeData:
-    def __init__(self, server_config: ServerConfig, connector: Connector) -> None:
+    def __init__(self, server_config: ServerConfig, metrics: MetricsRegistry, devices: List[DeviceRuntime]) -> None:
         self.server_config = server_config
-        self.connector = connector
+        self.metrics = metrics
+        self.devices = devices
@@ -1,6 +1,6 @@
-import json
-import os.path
-from typing import Any
+import asyncio
+import os
+from typing import Any, Dict, List, Callable
 
 import uvicorn
 from nicegui import app
@@ -8,63 +8,118 @@ from nicegui import ui
 from starlette.responses import Response
 
 from modbus_client.client.async_modbus_client import AsyncModbusClient
-from modbus_client.client.defaults import DefaultTimeout, DefaultSilentInterval
+from modbus_client.client.metrics import MetricsRegistry
 from modbus_client.client.mock_modbus_client import MockModbusClient
-from modbus_client.client.pymodbus_async_modbus_client import PyAsyncModbusTcpClient, PyAsyncModbusRtuClient, PyAsyncModbusRtuOverTcpClient
+from modbus_client.client.retry import RequestClass, CircuitBreaker
+from modbus_client.client.transport import TransportKey, has_transport, get_transport_key, create_line_client
 from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.registers.read_coalescer import ReadCoalescer
+from modbus_client.server.api import register_api
+from modbus_client.server.device_poller import DevicePoller
 from modbus_client.server.frontend_ui import register_ui
 from modbus_client.server.mytypes import Connector
-from modbus_client.server.runtime_data import RuntimeData
-from modbus_client.server.server_config import load_server_config, ServerConfig
-
-
-class PrettyJSONResponse(Response):
-    media_type = "application/json"
-
-    def render(self, content: Any) -> bytes:
-        return json.dumps(content, indent=2, sort_keys=True).encode("utf-8")
-
-
-def create_device_from_args(server_config: ServerConfig) -> Connector:
-    modbus_device = ModbusDeviceFactory.from_file(server_config.device_file).create_device(server_config.unit)
-
-    config = modbus_device.get_device_config()
-
-    timeout = config.default_timeout or DefaultTimeout
-    silent_interval = config.default_silent_interval or DefaultSilentInterval
-
-    client: AsyncModbusClient
-    if server_config.tcp is not None:
-        client = PyAsyncModbusTcpClient(host=server_config.tcp.host, port=server_config.tcp.port,
-                                        timeout=timeout,
-                                        silent_interval=silent_interval)
-    elif server_config.rtu is not None:
-        client = PyAsyncModbusRtuClient(path=server_config.rtu.path, baudrate=server_config.rtu.baudrate,
-                                        timeout=timeout,
-                                        silent_interval=silent_interval)
-    elif server_config.rtu_over_tcp is not None:
-        client = PyAsyncModbusRtuOverTcpClient(host=server_config.rtu_over_tcp.host, port=server_config.rtu_over_tcp.port,
-                                               timeout=timeout,
-                                               silent_interval=silent_interval)
-    elif server_config.mock is not None:
-        client = MockModbusClient(input_registers={}, holding_registers={}, missing_as_zero=True)
-    else:
-        raise Exception("invalid mode")
-
-    return Connector(modbus_device, lambda: client)
+from modbus_client.server.runtime_data import RuntimeData, DeviceRuntime
+from modbus_client.server.server_config import load_server_config, ServerConfig, ServerDeviceConfig
+
+
+class PrometheusResponse(Response):
+    media_type = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def get_line_key(device: ServerDeviceConfig) -> TransportKey:
+    if not has_transport(device) and device.mock is not None:
+        # every mocked device gets its own memory
+        return "mock", device.name, 0
+    return get_transport_key(device)
+
+
+def get_client_factory(client: AsyncModbusClient) -> Callable[[], AsyncModbusClient]:
+    return lambda: client
+
+
+def create_devices(server_config: ServerConfig, metrics: MetricsRegistry) -> List[DeviceRuntime]:
+    """
+    Creates runtimes of all configured devices. Devices on the same line share a client and a bus lock, so their
+    transactions are serialized, and units of the same model share a single loaded device config.
+    """
+    devices = server_config.get_devices()
+    if len(devices) == 0:
+        raise Exception("no devices configured")
+
+    factories: Dict[str, ModbusDeviceFactory] = {}
+    for device in devices:
+        if device.device not in factories:
+            factories[device.device] = ModbusDeviceFactory.from_file(device.device)
+            if server_config.learned_map_dir is not None:
+                os.makedirs(server_config.learned_map_dir, exist_ok=True)
+                model_name = os.path.splitext(os.path.basename(device.device))[0]
+                factories[device.device].get_address_map().set_learned_file(
+                    os.path.join(server_config.learned_map_dir, f"{model_name}.unreadable.yaml"))
+
+    lines: Dict[TransportKey, List[ServerDeviceConfig]] = {}
+    for device in devices:
+        lines.setdefault(get_line_key(device), []).append(device)
+
+    clients: Dict[TransportKey, AsyncModbusClient] = {}
+    bus_locks: Dict[TransportKey, asyncio.Lock] = {}
+    for key, line_devices in lines.items():
+        client: AsyncModbusClient
+        if key[0] == "mock":
+            client = MockModbusClient(input_registers={}, holding_registers={}, missing_as_zero=True)
+        else:
+            client = create_line_client(line_devices, [factories[x.device].create_device(x.unit).get_device_config()
+                                                       for x in line_devices])
+        client.set_metrics(metrics)
+        client.set_coalescer(ReadCoalescer())
+        client.set_retry_policy(RequestClass.Read, server_config.read_retry)
+        client.set_retry_policy(RequestClass.Write, server_config.write_retry)
+        if server_config.circuit_breaker is not None:
+            client.set_circuit_breaker(CircuitBreaker(server_config.circuit_breaker))
+        clients[key] = client
+        bus_locks[key] = asyncio.Lock()
+
+    runtimes = []
+    for device in devices:
+        key = get_line_key(device)
+        modbus_device = factories[device.device].create_device(device.unit)
+        if server_config.static_cache_dir is not None:
+            os.makedirs(server_config.static_cache_dir, exist_ok=True)
+            modbus_device.set_static_cache_file(os.path.join(server_config.static_cache_dir, f"{device.name}.json"))
+        connector = Connector(modbus_device, get_client_factory(clients[key]))
+
+        poll_interval = server_config.poll_interval if device.poll_interval is None else device.poll_interval
+        poller = DevicePoller(connector, poll_interval=poll_interval, bus_lock=bus_locks[key])
+
+        route_prefix = "" if len(devices) == 1 else f"/{device.name}"
+        runtimes.append(DeviceRuntime(device, connector, poller, route_prefix))
+
+    return runtimes
+
+
+def register_metrics_endpoint(runtime_data: RuntimeData) -> None:
+    @app.get("/metrics", response_class=PrometheusResponse)
+    def metrics() -> PrometheusResponse:
+        return PrometheusResponse(runtime_data.metrics.to_prometheus())
 
 
 def run_server(args: Any) -> None:
     server_config = load_server_config(args.config)
 
-    connector = create_device_from_args(server_config)
+    metrics = MetricsRegistry()
+    devices = create_devices(server_config, metrics)
+
+    for device in devices:
+        app.on_startup(device.poller.start)
+        app.on_shutdown(device.poller.stop)
 
-    runtime_data = RuntimeData(server_config, connector)
+    runtime_data = RuntimeData(server_config, metrics, devices)
 
     register_ui(runtime_data)
+    register_metrics_endpoint(runtime_data)
+    register_api(runtime_data)
 
     ui.run_with(app, mount_path=args.base_href,
-                title=f"Modbus - {os.path.splitext(os.path.basename(server_config.device_file))[0]}",
+                title=f"Modbus - {devices[0].name}" if len(devices) == 1 else "Modbus",
                 dark=args.dark_mode)
 
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=False, access_log=False)
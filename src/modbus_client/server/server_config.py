@@ -1,8 +1,15 @@
-from typing import Optional, Any
+import os
+import re
+from dataclasses import field
+from typing import Optional, Any, List, Annotated
 
 import yaml
+from pydantic import StringConstraints
 from pydantic.dataclasses import dataclass
 
+from modbus_client.cli.system_file import load_system_config
+from modbus_client.client.retry import RetryPolicy, CircuitBreakerConfig
+
 
 @dataclass
 class RtuConfig:
@@ -22,15 +29,79 @@ class RtuOverTcpConfig:
     port: int
 
 
+def get_device_file_name(device_file: str) -> str:
+    """
+    Returns a valid device name derived from the name of a device file, e.g. "SDM_120_v2" for "SDM 120.v2.yaml".
+    """
+    name = os.path.splitext(os.path.basename(device_file))[0]
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", name) or "device"
+
+
 @dataclass
-class ServerConfig:
-    device_file: str
+class ServerDeviceConfig:
+    name: Annotated[str, StringConstraints(pattern=r'^[a-zA-Z0-9_-]+$')]
+    device: str
     unit: int
+    poll_interval: Optional[float] = None
     mock: Optional[Any] = None
     rtu: Optional[RtuConfig] = None
     tcp: Optional[TcpConfig] = None
     rtu_over_tcp: Optional[RtuOverTcpConfig] = None
 
 
+@dataclass
+class ServerConfig:
+    device_file: Optional[str] = None
+    unit: Optional[int] = None
+    poll_interval: float = 5.0
+    api_max_age: float = 5.0
+    api_write: bool = False
+    mock: Optional[Any] = None
+    rtu: Optional[RtuConfig] = None
+    tcp: Optional[TcpConfig] = None
+    rtu_over_tcp: Optional[RtuOverTcpConfig] = None
+    devices: List[ServerDeviceConfig] = field(default_factory=list)
+    system_file: Optional[str] = None
+    static_cache_dir: Optional[str] = None
+    learned_map_dir: Optional[str] = None
+    read_retry: Optional[RetryPolicy] = None
+    write_retry: Optional[RetryPolicy] = None
+    circuit_breaker: Optional[CircuitBreakerConfig] = None
+
+    def __post_init__(self) -> None:
+        if self.device_file is not None and self.unit is None:
+            raise ValueError("/unit/ is required along with /device_file/")
+
+    def get_devices(self) -> List[ServerDeviceConfig]:
+        """
+        Returns all served devices: the top-level one (if `device_file` is set), `devices` and these from `system_file`.
+        """
+        devices: List[ServerDeviceConfig] = []
+
+        if self.device_file is not None:
+            assert self.unit is not None
+            devices.append(ServerDeviceConfig(name=get_device_file_name(self.device_file),
+                                              device=self.device_file, unit=self.unit, mock=self.mock,
+                                              rtu=self.rtu, tcp=self.tcp, rtu_over_tcp=self.rtu_over_tcp))
+
+        devices += self.devices
+
+        if self.system_file is not None:
+            for dev in load_system_config(self.system_file).devices:
+                devices.append(ServerDeviceConfig(
+                        name=dev.name, device=dev.device, unit=dev.unit,
+                        rtu=None if dev.rtu is None else RtuConfig(path=dev.rtu.path, baudrate=dev.rtu.baudrate),
+                        tcp=None if dev.tcp is None else TcpConfig(host=dev.tcp.host, port=dev.tcp.port),
+                        rtu_over_tcp=None if dev.rtu_over_tcp is None else RtuOverTcpConfig(host=dev.rtu_over_tcp.host,
+                                                                                            port=dev.rtu_over_tcp.port)))
+
+        names = [x.name for x in devices]
+        duplicates = {x for x in names if names.count(x) > 1}
+        if len(duplicates) > 0:
+            raise ValueError(f"duplicated device names: {', '.join(sorted(duplicates))}")
+
+        return devices
+
+
 def load_server_config(path: str) -> ServerConfig:
     return ServerConfig(**yaml.load(open(path, "rt"), Loader=yaml.SafeLoader))
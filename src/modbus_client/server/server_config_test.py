@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from modbus_client.client.metrics import MetricsRegistry
+from modbus_client.server.server import create_devices
+from modbus_client.server.server_config import ServerConfig, ServerDeviceConfig, TcpConfig
+
+devices_dir = os.path.join(os.path.dirname(__file__), "..", "device", "devices")
+meter_file = os.path.join(devices_dir, "DDS238.yaml")
+sensor_file = os.path.join(devices_dir, "XY-MD02.yaml")
+
+
+class ServerConfigTest(unittest.TestCase):
+    def test_device_file(self) -> None:
+        config = ServerConfig(device_file="models/SDM 120.v2.yaml", unit=3, tcp=TcpConfig(host="gw", port=502))
+
+        devices = config.get_devices()
+
+        self.assertEqual(["SDM_120_v2"], [x.name for x in devices])
+        self.assertEqual(("models/SDM 120.v2.yaml", 3), (devices[0].device, devices[0].unit))
+        self.assertEqual(TcpConfig(host="gw", port=502), devices[0].tcp)
+
+    def test_device_file_requires_unit(self) -> None:
+        with self.assertRaises(ValueError):
+            ServerConfig(device_file="DDS238.yaml")
+
+    def test_invalid_name(self) -> None:
+        with self.assertRaises(ValueError):
+            ServerDeviceConfig(name="meter 1", device="DDS238.yaml", unit=1)
+
+    def test_devices_and_system_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            system_file = os.path.join(tmp_dir, "system.yaml")
+            with open(system_file, "wt") as f:
+                f.write("""
+devices:
+  - name: sensor
+    device: XY-MD02.yaml
+    unit: 5
+    rtu: { path: /dev/ttyUSB0, baudrate: 9600 }
+""")
+
+            config = ServerConfig(devices=[ServerDeviceConfig(name="meter", device="DDS238.yaml", unit=1, mock={})],
+                                  system_file=system_file)
+            devices = config.get_devices()
+
+            self.assertEqual([("meter", "DDS238.yaml", 1), ("sensor", "XY-MD02.yaml", 5)],
+                             [(x.name, x.device, x.unit) for x in devices])
+            assert devices[1].rtu is not None
+            self.assertEqual(("/dev/ttyUSB0", 9600), (devices[1].rtu.path, devices[1].rtu.baudrate))
+
+            config = ServerConfig(device_file="sensor.yaml", unit=1, mock={}, system_file=system_file)
+            with self.assertRaisesRegex(ValueError, "duplicated device names: sensor"):
+                config.get_devices()
+
+
+class CreateDevicesTest(unittest.IsolatedAsyncioTestCase):
+    async def test_transport_sharing(self) -> None:
+        config = ServerConfig(devices=[
+            ServerDeviceConfig(name="meter1", device=meter_file, unit=1, tcp=TcpConfig(host="gw", port=502)),
+            ServerDeviceConfig(name="meter2", device=meter_file, unit=2, tcp=TcpConfig(host="gw", port=502)),
+            ServerDeviceConfig(name="sensor", device=sensor_file, unit=3, tcp=TcpConfig(host="gw", port=503)),
+            ServerDeviceConfig(name="mock1", device=meter_file, unit=1, mock={}),
+            ServerDeviceConfig(name="mock2", device=meter_file, unit=1, mock={}),
+        ])
+
+        devices = create_devices(config, MetricsRegistry())
+        meter1, meter2, sensor, mock1, mock2 = devices
+
+        self.assertEqual(["/meter1", "/meter2", "/sensor", "/mock1", "/mock2"], [x.route_prefix for x in devices])
+        # devices on the same line share the client and the bus lock
+        self.assertIs(meter1.connector.client_factory(), meter2.connector.client_factory())
+        self.assertIs(meter1.poller._bus_lock, meter2.poller._bus_lock)
+        self.assertIsNot(meter1.connector.client_factory(), sensor.connector.client_factory())
+        self.assertIsNot(meter1.poller._bus_lock, sensor.poller._bus_lock)
+        # every mocked device has its own memory
+        self.assertIsNot(mock1.connector.client_factory(), mock2.connector.client_factory())
+        # units of the same model share the device config
+        self.assertIs(meter1.connector.modbus_device.get_device_config(),
+                      meter2.connector.modbus_device.get_device_config())
+        self.assertEqual([1, 2], [x.connector.modbus_device.get_unit() for x in (meter1, meter2)])
+
+        for device in devices:
+            device.connector.client_factory().close()
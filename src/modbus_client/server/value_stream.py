@@ -0,0 +1,63 @@
+import asyncio
+from typing import Sequence, Optional
+
+from modbus_client.server.device_poller import DevicePoller
+from modbus_client.server.mytypes import TValuesMap
+
+
+class ValueStream:
+    """
+    Collects changes of watched registers for a single consumer. Changes not yet taken by the consumer are replaced by
+    newer ones, so a slow consumer gets only the latest value of each register and memory use stays bounded.
+    """
+
+    def __init__(self, poller: DevicePoller, names: Sequence[str], initial_values: TValuesMap) -> None:
+        self.names = set(names)
+        self.dropped = 0
+
+        self._sent: TValuesMap = {}
+        self._pending: TValuesMap = dict(initial_values)
+        self._event = asyncio.Event()
+        self._event.set()
+
+        self._subscription = poller.subscribe(self._on_values, names)
+
+    def _on_values(self, values: TValuesMap) -> None:
+        for name, value in values.items():
+            if name not in self.names:
+                continue
+
+            pending_value = self._pending.pop(name, None)
+            if pending_value is not None and pending_value != value:
+                self.dropped += 1
+
+            if name in self._sent and self._sent[name] == value:
+                continue
+
+            self._pending[name] = value
+
+        if len(self._pending) > 0:
+            self._event.set()
+
+    async def get(self, timeout: Optional[float] = None) -> TValuesMap:
+        """
+        Waits for changed values, returns an empty map if none arrived within `timeout` seconds.
+        """
+        if not self._event.is_set():
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return {}
+
+        changes, self._pending = self._pending, {}
+        self._event.clear()
+        self._sent.update(changes)
+        return changes
+
+    def close(self) -> None:
+        self._subscription.unsubscribe()
+
+
+__all__ = [
+    "ValueStream",
+]
@@ -0,0 +1,52 @@
+import unittest
+
+from modbus_client.client.mock_modbus_client import MockModbusClient
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.server.device_poller import DevicePoller
+from modbus_client.server.mytypes import Connector
+from modbus_client.server.value_stream import ValueStream
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16
+    - current/0x0002/uint16
+    - power/0x0003/uint16
+"""
+
+
+class ValueStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.client = MockModbusClient(input_registers={1: 230, 2: 5, 3: 1000}, holding_registers={})
+        device = ModbusDeviceFactory.from_config(config).create_device(1)
+        self.poller = DevicePoller(Connector(device, lambda: self.client), poll_interval=0)
+
+    async def asyncTearDown(self) -> None:
+        await self.poller.stop()
+
+    async def test_slow_consumer(self) -> None:
+        stream = ValueStream(self.poller, ["voltage", "current"], {"voltage": 230, "current": 5})
+        self.assertEqual({"voltage": 230, "current": 5}, await stream.get(timeout=0))
+
+        # unchanged values and registers not watched are not sent
+        await self.poller.refresh()
+        self.assertEqual({}, await stream.get(timeout=0))
+
+        # a consumer not keeping up gets only the latest value
+        for voltage in [231, 232, 233]:
+            self.client.input_registers[1] = voltage
+            await self.poller.refresh(["voltage", "current"])
+        self.assertEqual({"voltage": 233}, await stream.get(timeout=0))
+        self.assertEqual(2, stream.dropped)
+
+        # a change reverted before it was taken is not sent
+        self.client.input_registers[2] = 6
+        await self.poller.refresh(["current"])
+        self.client.input_registers[2] = 5
+        await self.poller.refresh(["current"])
+        self.assertEqual({}, await stream.get(timeout=0))
+
+        stream.close()
+        self.assertEqual([], self.poller._subscriptions)
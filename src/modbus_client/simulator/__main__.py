@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import logging
+from typing import List
+
+from modbus_client.cli.argument_parsers import host_port_parser
+from modbus_client.simulator.simulator import Simulator
+from modbus_client.simulator.simulator_config import load_simulator_config, SimulatorConfig, SimulatorEndpointConfig, \
+    SimulatedUnitsConfig, GeneratorType, TcpConfig, RtuPtyConfig
+
+
+def create_config_from_args(args: argparse.Namespace) -> SimulatorConfig:
+    units_configs: List[SimulatedUnitsConfig] = []
+    for device_spec in args.device:
+        device, _, units = device_spec.partition(":")
+        units_configs.append(SimulatedUnitsConfig(device=device, units=units or "1",
+                                                  generator=GeneratorType(args.generator),
+                                                  response_delay=args.delay,
+                                                  response_jitter=args.jitter))
+
+    endpoint = SimulatorEndpointConfig(units=units_configs,
+                                       tcp=TcpConfig(host=args.tcp[0], port=args.tcp[1]) if args.tcp else None,
+                                       rtu_over_tcp=TcpConfig(host=args.rtu_over_tcp[0], port=args.rtu_over_tcp[1])
+                                       if args.rtu_over_tcp else None,
+                                       rtu_pty=RtuPtyConfig(link=args.rtu_pty or None) if args.rtu_pty is not None else None)
+    if endpoint.tcp is None and endpoint.rtu_over_tcp is None and endpoint.rtu_pty is None:
+        endpoint.tcp = TcpConfig()
+
+    return SimulatorConfig(endpoints=[endpoint], update_interval=args.update_interval, seed=args.seed)
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description="Modbus device simulator serving registers defined in device files")
+    argparser.add_argument("device", nargs="*", help="DEVICE[:UNITS], e.g. DDS238:1-32")
+    argparser.add_argument("--config", type=str, help="simulator config file, overrides other options")
+    argparser.add_argument("--tcp", type=host_port_parser("127.0.0.1"), metavar="[HOST:]PORT")
+    argparser.add_argument("--rtu-over-tcp", type=host_port_parser("127.0.0.1"), metavar="[HOST:]PORT")
+    argparser.add_argument("--rtu-pty", type=str, nargs="?", const="", metavar="LINK",
+                           help="serve RTU on a pseudo-terminal, optionally symlinked at LINK")
+    argparser.add_argument("--generator", type=str, choices=[x.value for x in GeneratorType], default="static")
+    argparser.add_argument("--delay", type=float, default=0.0, help="response delay in seconds")
+    argparser.add_argument("--jitter", type=float, default=0.0, help="random extra response delay in seconds")
+    argparser.add_argument("--update-interval", type=float, default=1.0)
+    argparser.add_argument("--seed", type=int)
+    argparser.add_argument("-v", "--verbose", action='store_true')
+
+    args = argparser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="[%(asctime)s] [%(name)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+
+    if args.config is not None:
+        config = load_simulator_config(args.config)
+    elif len(args.device) > 0:
+        config = create_config_from_args(args)
+    else:
+        argparser.print_help()
+        exit(1)
+
+    try:
+        asyncio.run(Simulator(config).run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
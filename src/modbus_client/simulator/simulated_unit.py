@@ -0,0 +1,107 @@
+import random
+import struct
+from typing import Dict, List, Tuple, Set
+
+from modbus_client.client.types import ModbusRegisterType, ModbusExceptionCode
+from modbus_client.device.device_config import DeviceConfig
+from modbus_client.device.modbus_device import create_modbus_register, create_modbus_coil
+from modbus_client.device.registers.device_register import IDeviceRegister
+from modbus_client.device.registers.register_type import RegisterType
+from modbus_client.protocol.pdu import ModbusProtocolException
+from modbus_client.registers.read_session import ModbusReadSession, RegisterValue
+from modbus_client.registers.registers import IRegister, put_bits
+from modbus_client.simulator.simulator_config import SimulatedUnitsConfig, SimulatedValue
+from modbus_client.simulator.value_generators import ValueGenerator, create_value_generator
+
+AddressKey = Tuple[ModbusRegisterType, int]
+
+
+class SimulatedUnit:
+    """
+    Register contents of a single simulated unit. Only addresses defined in the device config exist, reading anything
+    else results in an Illegal Data Address exception, like on real devices, unless holes are filled with zeros
+    (by default, for devices with `allow_holes`).
+    """
+
+    def __init__(self, device_config: DeviceConfig, unit: int, config: SimulatedUnitsConfig) -> None:
+        self.unit = unit
+        self.config = config
+        self.fill_holes = config.fill_holes if config.fill_holes is not None else device_config.allow_holes
+
+        self.words: Dict[AddressKey, RegisterValue] = {}
+        self._session = ModbusReadSession(registers_dict=self.words)
+        self._pinned: Set[AddressKey] = set()
+
+        self._registers: List[Tuple[IDeviceRegister, IRegister, ValueGenerator]] = []
+        for reg in device_config.get_all_registers():
+            modbus_register: IRegister = create_modbus_register(device_config, reg)
+            for i in range(modbus_register.get_count()):
+                self.words[(modbus_register.reg_type, modbus_register.address + i)] = 0
+            self._registers.append((reg, modbus_register, create_value_generator(reg, config)))
+
+        for switch in device_config.switches:
+            coil = create_modbus_coil(device_config, switch)
+            self.words[(ModbusRegisterType.Coil, coil.number)] = False
+
+        for reg, modbus_register, generator in self._registers:
+            self._set_value(reg, modbus_register, generator.value)
+
+    def step(self, rng: random.Random) -> None:
+        for reg, modbus_register, generator in self._registers:
+            value = generator.next_value(rng)
+            if self._is_pinned(modbus_register):
+                continue
+            self._set_value(reg, modbus_register, value)
+
+    def read(self, reg_type: ModbusRegisterType, address: int, count: int) -> List[int]:
+        values = []
+        for i in range(address, address + count):
+            value = self.words.get((reg_type, i))
+            if value is None:
+                if self.fill_holes or reg_type in (ModbusRegisterType.Coil, ModbusRegisterType.DiscreteInputs):
+                    value = 0
+                else:
+                    raise ModbusProtocolException(ModbusExceptionCode.IllegalDataAddress)
+            values.append(int(value))
+        return values
+
+    def write(self, reg_type: ModbusRegisterType, address: int, values: List[int]) -> None:
+        if reg_type == ModbusRegisterType.HoldingRegister:
+            for i in range(address, address + len(values)):
+                if (reg_type, i) not in self.words:
+                    raise ModbusProtocolException(ModbusExceptionCode.IllegalDataAddress)
+
+        for i, value in enumerate(values):
+            key = (reg_type, address + i)
+            self.words[key] = bool(value) if reg_type == ModbusRegisterType.Coil else value
+            self._pinned.add(key)
+
+    def _is_pinned(self, modbus_register: IRegister) -> bool:
+        if len(self._pinned) == 0:
+            return False
+        return any((modbus_register.reg_type, modbus_register.address + i) in self._pinned
+                   for i in range(modbus_register.get_count()))
+
+    def _set_value(self, reg: IDeviceRegister, modbus_register: IRegister, value: SimulatedValue) -> None:
+        address = modbus_register.address
+        reg_type = modbus_register.reg_type
+
+        words: List[int]
+        if reg.type == RegisterType.FLAGS:
+            bits = reg.bits.bits if reg.bits is not None else list(range(16))
+            words = [put_bits(bits, int(value), int(self.words[(reg_type, address)]))]
+        elif reg.type == RegisterType.STRING:
+            data = str(value).encode("ascii")[:reg.words * 2].ljust(reg.words * 2, b"\x00")
+            words = list(struct.unpack(f">{reg.words}H", data))
+        else:
+            if isinstance(value, bool):
+                value = int(value)
+            words = modbus_register.value_to_modbus_registers(value, existing_read_session=self._session)
+
+        for i, word in enumerate(words):
+            self.words[(reg_type, address + i)] = word
+
+
+__all__ = [
+    "SimulatedUnit",
+]
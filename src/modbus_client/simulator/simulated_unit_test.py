@@ -0,0 +1,96 @@
+import random
+import unittest
+from typing import Any
+
+from modbus_client.client.types import ModbusRegisterType, ModbusExceptionCode
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.protocol.pdu import ModbusProtocolException
+from modbus_client.simulator.simulated_unit import SimulatedUnit
+from modbus_client.simulator.simulator_config import SimulatedUnitsConfig
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+    - energy/0x0002/uint32be[Wh]
+    - serial/0x0010/string,words=2,readonly
+
+  holding_registers:
+    - mode/0x0020/uint16,bits=15:8
+    - name: status
+      address: 0x0020
+      type: flags
+      bits: "7:0"
+      readonly: true
+      flags:
+        - alarm/1
+        - run/4
+    - slave_id/0x0021/uint16
+
+switches:
+  - name: relay
+    type: coil
+    number: 5
+"""
+
+
+class SimulatedUnitTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.device_config = ModbusDeviceFactory.from_config(config).get_device_config()
+
+    def create_unit(self, **kwargs: Any) -> SimulatedUnit:
+        return SimulatedUnit(self.device_config, 1, SimulatedUnitsConfig(device="meter", units=1, **kwargs))
+
+    def test_read(self) -> None:
+        sim_unit = self.create_unit(values={"voltage": 230.5, "energy": 0x12345, "serial": "AB12", "mode": 3,
+                                            "status": 0b10010})
+
+        self.assertEqual([2305, 0x1, 0x2345], sim_unit.read(ModbusRegisterType.InputRegister, 1, 3))
+        self.assertEqual([0x4142, 0x3132], sim_unit.read(ModbusRegisterType.InputRegister, 0x10, 2))
+        # flags are put into their bits only, keeping the other field of the word
+        self.assertEqual([0x0312], sim_unit.read(ModbusRegisterType.HoldingRegister, 0x20, 1))
+        self.assertEqual([0], sim_unit.read(ModbusRegisterType.Coil, 5, 1))
+
+    def test_holes(self) -> None:
+        sim_unit = self.create_unit()
+
+        for reg_type, address, count in [(ModbusRegisterType.InputRegister, 0, 2),
+                                         (ModbusRegisterType.InputRegister, 3, 2),
+                                         (ModbusRegisterType.HoldingRegister, 0x10, 1)]:
+            with self.assertRaises(ModbusProtocolException) as cm:
+                sim_unit.read(reg_type, address, count)
+            self.assertEqual(ModbusExceptionCode.IllegalDataAddress, cm.exception.exception_code)
+        with self.assertRaises(ModbusProtocolException):
+            sim_unit.write(ModbusRegisterType.HoldingRegister, 0x21, [1, 2])
+
+        # coils outside of the defined switches read as off
+        self.assertEqual([0, 0], sim_unit.read(ModbusRegisterType.Coil, 6, 2))
+
+        sim_unit = self.create_unit(fill_holes=True, values={"voltage": 230.0})
+        self.assertEqual([0, 2300], sim_unit.read(ModbusRegisterType.InputRegister, 0, 2))
+
+    def test_written_words_pinned(self) -> None:
+        sim_unit = self.create_unit(script={"slave_id": [1, 2, 3], "voltage": [230.0, 231.0]})
+        rng = random.Random(1)
+
+        sim_unit.step(rng)
+        self.assertEqual([2300], sim_unit.read(ModbusRegisterType.InputRegister, 1, 1))
+        sim_unit.write(ModbusRegisterType.HoldingRegister, 0x21, [50])
+        sim_unit.write(ModbusRegisterType.Coil, 5, [1])
+
+        for _ in range(3):
+            sim_unit.step(rng)
+            self.assertEqual([50], sim_unit.read(ModbusRegisterType.HoldingRegister, 0x21, 1))
+        # other registers keep changing
+        self.assertEqual([2310], sim_unit.read(ModbusRegisterType.InputRegister, 1, 1))
+        self.assertIs(True, sim_unit.words[(ModbusRegisterType.Coil, 5)])
+
+    def test_flags_step(self) -> None:
+        sim_unit = self.create_unit(values={"mode": 0xab}, script={"status": [0b10, 0b10000]})
+
+        sim_unit.step(random.Random(1))
+        self.assertEqual([0xab02], sim_unit.read(ModbusRegisterType.HoldingRegister, 0x20, 1))
+        sim_unit.step(random.Random(1))
+        self.assertEqual([0xab10], sim_unit.read(ModbusRegisterType.HoldingRegister, 0x20, 1))
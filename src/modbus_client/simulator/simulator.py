@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import random
+from typing import Dict, List, Optional
+
+from modbus_client.device.device_config import DeviceConfig, load_device_config
+from modbus_client.device.device_config_finder import find_device_file
+from modbus_client.protocol.pdu import ModbusRequest, ReadFunctionRegisterTypes, WriteFunctionRegisterTypes
+from modbus_client.protocol.slave_server import ModbusSlaveServer, BroadcastUnit
+from modbus_client.simulator.simulated_unit import SimulatedUnit
+from modbus_client.simulator.simulator_config import SimulatorConfig, SimulatorEndpointConfig
+
+logger = logging.getLogger("modbus_sim")
+
+
+class SimulatorEndpoint:
+    """
+    Set of simulated units sharing one address space (a bus or a gateway), served over one or more transports.
+    """
+
+    def __init__(self, units: Dict[int, SimulatedUnit], rng: random.Random) -> None:
+        self.units = units
+        self._rng = rng
+
+        self.tcp_port: Optional[int] = None
+        self.rtu_over_tcp_port: Optional[int] = None
+        self.rtu_path: Optional[str] = None
+
+    async def handle_request(self, unit: int, request: ModbusRequest) -> Optional[List[int]]:
+        if unit == BroadcastUnit:
+            if request.is_read():
+                return None
+            for broadcast_unit in self.units.values():
+                broadcast_unit.write(WriteFunctionRegisterTypes[request.function_code], request.address, request.values)
+            return []
+
+        sim_unit = self.units.get(unit)
+        if sim_unit is None:
+            return None
+
+        delay = sim_unit.config.response_delay
+        if sim_unit.config.response_jitter > 0:
+            delay += self._rng.uniform(0, sim_unit.config.response_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if request.is_read():
+            return sim_unit.read(ReadFunctionRegisterTypes[request.function_code], request.address, request.count)
+        else:
+            sim_unit.write(WriteFunctionRegisterTypes[request.function_code], request.address, request.values)
+            return []
+
+
+class Simulator:
+    def __init__(self, config: SimulatorConfig) -> None:
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.endpoints: List[SimulatorEndpoint] = []
+        self._servers: List[ModbusSlaveServer] = []
+        self._device_configs: Dict[str, DeviceConfig] = {}
+
+    def _get_device_config(self, device: str) -> DeviceConfig:
+        device_config = self._device_configs.get(device)
+        if device_config is None:
+            device_config = load_device_config(find_device_file(device))
+            self._device_configs[device] = device_config
+        return device_config
+
+    def _create_endpoint(self, endpoint_config: SimulatorEndpointConfig) -> SimulatorEndpoint:
+        units: Dict[int, SimulatedUnit] = {}
+        for units_config in endpoint_config.units:
+            device_config = self._get_device_config(units_config.device)
+            for unit in units_config.get_units():
+                if unit in units:
+                    raise ValueError(f"unit /{unit}/ defined more than once on the same endpoint")
+                units[unit] = SimulatedUnit(device_config, unit, units_config)
+        return SimulatorEndpoint(units, self.rng)
+
+    async def start(self) -> None:
+        for endpoint_config in self.config.endpoints:
+            endpoint = self._create_endpoint(endpoint_config)
+            self.endpoints.append(endpoint)
+
+            server = ModbusSlaveServer(endpoint)
+            self._servers.append(server)
+
+            units_str = f"{len(endpoint.units)} unit(s)"
+            if endpoint_config.tcp is not None:
+                endpoint.tcp_port = await server.start_tcp(endpoint_config.tcp.host, endpoint_config.tcp.port)
+                logger.info(f"serving {units_str} over TCP on {endpoint_config.tcp.host}:{endpoint.tcp_port}")
+            if endpoint_config.rtu_over_tcp is not None:
+                endpoint.rtu_over_tcp_port = await server.start_rtu_over_tcp(endpoint_config.rtu_over_tcp.host,
+                                                                             endpoint_config.rtu_over_tcp.port)
+                logger.info(f"serving {units_str} over RTU-over-TCP on {endpoint_config.rtu_over_tcp.host}:{endpoint.rtu_over_tcp_port}")
+            if endpoint_config.rtu_pty is not None:
+                endpoint.rtu_path = server.start_rtu_pty(endpoint_config.rtu_pty.link)
+                logger.info(f"serving {units_str} over RTU on {endpoint.rtu_path}")
+
+    def step(self) -> None:
+        for endpoint in self.endpoints:
+            for sim_unit in endpoint.units.values():
+                sim_unit.step(self.rng)
+
+    async def run(self) -> None:
+        await self.start()
+        try:
+            while True:
+                await asyncio.sleep(self.config.update_interval)
+                self.step()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        for server in self._servers:
+            await server.close()
+        self._servers.clear()
+
+
+__all__ = [
+    "SimulatorEndpoint",
+    "Simulator",
+]
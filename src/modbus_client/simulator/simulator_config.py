@@ -0,0 +1,64 @@
+from dataclasses import field
+from enum import Enum
+from typing import Optional, List, Dict, Union
+
+import yaml
+from pydantic import StrictInt, StrictFloat, StrictBool
+from pydantic.dataclasses import dataclass
+
+from modbus_client.cli.argument_parsers import parse_units
+
+SimulatedValue = Union[StrictBool, StrictInt, StrictFloat, str]
+
+
+class GeneratorType(str, Enum):
+    Static = 'static'
+    RandomWalk = 'random_walk'
+    Scripted = 'scripted'
+
+
+@dataclass
+class TcpConfig:
+    host: str = "127.0.0.1"
+    port: int = 5020
+
+
+@dataclass
+class RtuPtyConfig:
+    link: Optional[str] = None
+
+
+@dataclass
+class SimulatedUnitsConfig:
+    device: str
+    units: Union[StrictInt, str]
+    generator: GeneratorType = GeneratorType.Static
+    response_delay: float = 0.0
+    response_jitter: float = 0.0
+    walk_step: float = 0.01
+    walk_probability: float = 0.05
+    fill_holes: Optional[bool] = None
+    values: Dict[str, SimulatedValue] = field(default_factory=dict)
+    script: Dict[str, List[SimulatedValue]] = field(default_factory=dict)
+
+    def get_units(self) -> List[int]:
+        return parse_units(self.units)
+
+
+@dataclass
+class SimulatorEndpointConfig:
+    units: List[SimulatedUnitsConfig]
+    tcp: Optional[TcpConfig] = None
+    rtu_over_tcp: Optional[TcpConfig] = None
+    rtu_pty: Optional[RtuPtyConfig] = None
+
+
+@dataclass
+class SimulatorConfig:
+    endpoints: List[SimulatorEndpointConfig] = field(default_factory=list)
+    update_interval: float = 1.0
+    seed: Optional[int] = None
+
+
+def load_simulator_config(path: str) -> SimulatorConfig:
+    return SimulatorConfig(**yaml.load(open(path, "rt"), Loader=yaml.SafeLoader))
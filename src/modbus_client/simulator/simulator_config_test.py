@@ -0,0 +1,8 @@
+import unittest
+
+from modbus_client.simulator.simulator_config import SimulatedUnitsConfig
+
+
+class SimulatorConfigTest(unittest.TestCase):
+    def test_units_config(self) -> None:
+        self.assertEqual([1, 2, 3], SimulatedUnitsConfig(device="DDS238", units="1-3").get_units())
@@ -0,0 +1,133 @@
+import random
+from abc import abstractmethod
+from typing import List, Tuple
+
+from modbus_client.device.registers.device_register import IDeviceRegister
+from modbus_client.device.registers.register_type import RegisterType
+from modbus_client.registers.register_value_type import RegisterValueType
+from modbus_client.registers.type_converters import get_type_converter
+from modbus_client.simulator.simulator_config import SimulatedValue, SimulatedUnitsConfig, GeneratorType
+
+FloatMax = 3.4028234663852886e+38
+
+_integer_limits = {
+    "h": (-0x8000, 0x7FFF),
+    "H": (0, 0xFFFF),
+    "i": (-0x80000000, 0x7FFFFFFF),
+    "I": (0, 0xFFFFFFFF),
+    "q": (-0x8000000000000000, 0x7FFFFFFFFFFFFFFF),
+    "Q": (0, 0xFFFFFFFFFFFFFFFF),
+}
+
+
+def get_value_limits(reg: IDeviceRegister) -> Tuple[float, float]:
+    """
+    Returns the (min, max) range of the value, in register units (i.e. after scaling).
+    """
+    if reg.bits is not None:
+        raw_min, raw_max = 0, (1 << len(reg.bits.bits)) - 1
+    else:
+        format_str = get_type_converter(RegisterValueType(reg.type)).format_str
+        if format_str == "f":
+            return -FloatMax, FloatMax
+        raw_min, raw_max = _integer_limits[format_str]
+
+    a, b = raw_min * reg.scale, raw_max * reg.scale
+    return min(a, b), max(a, b)
+
+
+def get_default_value(reg: IDeviceRegister) -> SimulatedValue:
+    if reg.type == RegisterType.ENUM:
+        assert reg.enum is not None
+        return reg.enum[0].value if len(reg.enum) > 0 else 0
+    elif reg.type == RegisterType.BOOL:
+        return False
+    elif reg.type == RegisterType.FLAGS:
+        return 0
+    elif reg.type == RegisterType.STRING:
+        return reg.name.upper()
+    else:
+        low, high = get_value_limits(reg)
+        return min(max(100 * reg.scale, low), high)
+
+
+class ValueGenerator:
+    def __init__(self, reg: IDeviceRegister, initial_value: SimulatedValue) -> None:
+        self.reg = reg
+        self.value = initial_value
+
+    @abstractmethod
+    def next_value(self, rng: random.Random) -> SimulatedValue:
+        pass
+
+
+class StaticGenerator(ValueGenerator):
+    def next_value(self, rng: random.Random) -> SimulatedValue:
+        return self.value
+
+
+class RandomWalkGenerator(ValueGenerator):
+    def __init__(self, reg: IDeviceRegister, initial_value: SimulatedValue, step: float, probability: float) -> None:
+        super().__init__(reg, initial_value)
+        self.step = step
+        self.probability = probability
+        self.limits = get_value_limits(reg) if reg.type not in (RegisterType.ENUM, RegisterType.BOOL,
+                                                                  RegisterType.FLAGS, RegisterType.STRING) else (0, 0)
+
+    def next_value(self, rng: random.Random) -> SimulatedValue:
+        reg = self.reg
+        if reg.type == RegisterType.STRING:
+            return self.value
+
+        if reg.type in (RegisterType.ENUM, RegisterType.BOOL, RegisterType.FLAGS):
+            if rng.random() >= self.probability:
+                return self.value
+
+            if reg.type == RegisterType.ENUM:
+                assert reg.enum is not None
+                if len(reg.enum) > 0:
+                    self.value = rng.choice(reg.enum).value
+            elif reg.type == RegisterType.BOOL:
+                self.value = not self.value
+            else:
+                assert reg.flags is not None and isinstance(self.value, int)
+                if len(reg.flags) > 0:
+                    self.value ^= 1 << rng.choice(reg.flags).bit
+            return self.value
+
+        assert isinstance(self.value, (int, float))
+        low, high = self.limits
+        value = self.value + rng.gauss(0, self.step * max(abs(self.value), abs(reg.scale)))
+        self.value = min(max(value, low), high)
+        return self.value
+
+
+class ScriptedGenerator(ValueGenerator):
+    def __init__(self, reg: IDeviceRegister, script: List[SimulatedValue]) -> None:
+        super().__init__(reg, script[0])
+        self.script = script
+        self.position = 0
+
+    def next_value(self, rng: random.Random) -> SimulatedValue:
+        self.value = self.script[self.position]
+        self.position = (self.position + 1) % len(self.script)
+        return self.value
+
+
+def create_value_generator(reg: IDeviceRegister, config: SimulatedUnitsConfig) -> ValueGenerator:
+    initial_value = config.values.get(reg.name, get_default_value(reg))
+
+    script = config.script.get(reg.name)
+    if script is not None and len(script) > 0:
+        return ScriptedGenerator(reg, script)
+
+    if config.generator == GeneratorType.RandomWalk:
+        return RandomWalkGenerator(reg, initial_value, step=config.walk_step, probability=config.walk_probability)
+    else:
+        return StaticGenerator(reg, initial_value)
+
+
+__all__ = [
+    "ValueGenerator",
+    "create_value_generator",
+]
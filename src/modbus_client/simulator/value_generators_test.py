@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from modbus_client.device.modbus_device import ModbusDeviceFactory
+from modbus_client.simulator.simulator_config import SimulatedUnitsConfig, GeneratorType
+from modbus_client.simulator.value_generators import create_value_generator, StaticGenerator, \
+    RandomWalkGenerator, ScriptedGenerator, get_value_limits
+
+config = """
+zero_mode: True
+
+registers:
+  input_registers:
+    - voltage/0x0001/uint16*0.1[V]
+    - temperature/0x0002/int16
+    - level/0x0003/uint16,bits=3:0
+    - name: mode
+      address: 0x0004
+      type: enum
+      enum:
+        - { name: idle, value: 1 }
+        - { name: run, value: 5 }
+"""
+
+
+class ValueGeneratorsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        device_config = ModbusDeviceFactory.from_config(config).get_device_config()
+        self.registers = {x.name: x for x in device_config.get_all_registers()}
+
+    def test_limits(self) -> None:
+        self.assertEqual((0, 0xffff * 0.1), get_value_limits(self.registers["voltage"]))
+        self.assertEqual((-0x8000, 0x7fff), get_value_limits(self.registers["temperature"]))
+        self.assertEqual((0, 15), get_value_limits(self.registers["level"]))
+
+    def test_static(self) -> None:
+        generator = create_value_generator(self.registers["voltage"], SimulatedUnitsConfig(device="meter", units=1))
+
+        self.assertIsInstance(generator, StaticGenerator)
+        # the default value is 100 raw units
+        self.assertEqual([10.0, 10.0], [generator.next_value(random.Random(1)) for _ in range(2)])
+
+    def test_random_walk(self) -> None:
+        units_config = SimulatedUnitsConfig(device="meter", units=1, generator=GeneratorType.RandomWalk, walk_step=0.5,
+                                            walk_probability=1.0, values={"level": 14})
+        rng = random.Random(1)
+
+        generator = create_value_generator(self.registers["level"], units_config)
+        self.assertIsInstance(generator, RandomWalkGenerator)
+        values = [generator.next_value(rng) for _ in range(50)]
+        self.assertTrue(all(isinstance(x, (int, float)) and 0 <= x <= 15 for x in values))
+        self.assertGreater(len(set(values)), 1)
+
+        # the same seed gives the same values
+        generator = create_value_generator(self.registers["level"], units_config)
+        rng = random.Random(1)
+        self.assertEqual(values, [generator.next_value(rng) for _ in range(50)])
+
+        generator = create_value_generator(self.registers["mode"], units_config)
+        self.assertEqual({1, 5}, {generator.next_value(rng) for _ in range(50)})
+
+        units_config.walk_probability = 0.0
+        generator = create_value_generator(self.registers["mode"], units_config)
+        self.assertEqual({1}, {generator.next_value(rng) for _ in range(50)})
+
+    def test_scripted(self) -> None:
+        units_config = SimulatedUnitsConfig(device="meter", units=1, generator=GeneratorType.RandomWalk,
+                                            script={"temperature": [-5, 0, 7]})
+
+        generator = create_value_generator(self.registers["temperature"], units_config)
+
+        # scripts take precedence over the generator type and start with the first value
+        self.assertIsInstance(generator, ScriptedGenerator)
+        self.assertEqual(-5, generator.value)
+        self.assertEqual([-5, 0, 7, -5], [generator.next_value(random.Random(1)) for _ in range(4)])